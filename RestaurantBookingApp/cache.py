@@ -0,0 +1,151 @@
+"""Versioned cache namespaces shared by the apps.
+
+Every cached value lives in a namespace (``reservation``, ``food_menus``,
+``users`` or a dotted sub-namespace such as ``reservation.slots``). Keys
+are built as ``<namespace>:<version>:<key>`` where the version is stored in
+the cache itself, so ``invalidate(namespace)`` drops every key of the
+namespace at once by bumping its version, on any cache backend, without
+having to know which keys exist.
+
+Single entries can still be dropped with ``delete(namespace, *keys)``.
+
+Whole responses of pages that look the same for every anonymous visitor
+can be kept in a namespace with the ``cache_anonymous_page`` decorator.
+"""
+
+import uuid
+from functools import wraps
+
+from django.contrib import messages
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.utils.cache import patch_vary_headers
+
+
+NAMESPACE_VERSION_KEY = "namespace:{}:version"
+
+
+def get_version(namespace):
+    """Current version of a namespace, created on first use"""
+
+    version_key = NAMESPACE_VERSION_KEY.format(namespace)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex[:12], None)
+        version = cache.get(version_key)
+    return version
+
+
+def invalidate(namespace):
+    """Drop every key of a namespace"""
+
+    cache.set(NAMESPACE_VERSION_KEY.format(namespace), uuid.uuid4().hex[:12], None)
+
+
+def make_key(namespace, key, version=None):
+    return f"{namespace}:{version or get_version(namespace)}:{key}"
+
+
+def get(namespace, key, default=None):
+    return cache.get(make_key(namespace, key), default)
+
+
+def set(namespace, key, value, timeout=DEFAULT_TIMEOUT):
+    cache.set(make_key(namespace, key), value, timeout)
+
+
+def add(namespace, key, value, timeout=DEFAULT_TIMEOUT):
+    return cache.add(make_key(namespace, key), value, timeout)
+
+
+def incr(namespace, key, timeout=DEFAULT_TIMEOUT):
+    """Increment a counter, a missing counter starts at 1 and expires after
+    ``timeout`` from then on
+
+    Returns:
+        _type_: the new count
+    """
+
+    cache_key = make_key(namespace, key)
+    if cache.add(cache_key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(cache_key)
+    except ValueError:
+        # expired since add()
+        cache.set(cache_key, 1, timeout)
+        return 1
+
+
+def get_many(namespace, keys):
+    """Cached values of ``keys``, missing keys are left out.
+
+    Returns:
+        _type_: dict of {key: value}
+    """
+
+    version = get_version(namespace)
+    cache_keys = {make_key(namespace, key, version): key for key in keys}
+    return {
+        cache_keys[cache_key]: value
+        for cache_key, value in cache.get_many(cache_keys).items()
+    }
+
+
+def set_many(namespace, mapping, timeout=DEFAULT_TIMEOUT):
+    version = get_version(namespace)
+    cache.set_many(
+        {make_key(namespace, key, version): value for key, value in mapping.items()},
+        timeout,
+    )
+
+
+def delete(namespace, *keys):
+    version = get_version(namespace)
+    cache.delete_many([make_key(namespace, key, version) for key in keys])
+
+
+def get_or_set(namespace, key, default, timeout=DEFAULT_TIMEOUT):
+    """Cached value of ``key``, computed by calling ``default`` on a miss.
+    - None is cached like any other value
+    """
+
+    missing = object()
+    value = get(namespace, key, missing)
+    if value is missing:
+        value = default() if callable(default) else default
+        set(namespace, key, value, timeout)
+    return value
+
+
+def cache_anonymous_page(namespace, timeout=DEFAULT_TIMEOUT):
+    """Serve a view's response to anonymous visitors from the cache
+    - Signed-in users, requests with a query string and visitors with
+      pending flash messages are always rendered
+    - Only 200 responses that set no cookie are stored
+    - Responses vary on Cookie so shared caches never hand an anonymous
+      page to a signed-in user
+    - Stored pages are dropped with the rest of the namespace
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            cacheable = (
+                request.method == "GET"
+                and not request.GET
+                and not request.user.is_authenticated
+                and not len(messages.get_messages(request))
+            )
+            key = f"page:{request.path}"
+            response = get(namespace, key) if cacheable else None
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if cacheable and response.status_code == 200 and not response.cookies:
+                    set(namespace, key, response, timeout)
+            patch_vary_headers(response, ("Cookie",))
+            return response
+
+        return wrapper
+
+    return decorator
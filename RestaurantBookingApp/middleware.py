@@ -0,0 +1,171 @@
+"""Development helper logging the N+1 queries of every request.
+
+Enable with NPLUSONE_DETECTION=True in .env when running with
+settings/local.py. Every query of a request is then fingerprinted (see
+queries.py), and a query shape run NPLUSONE_THRESHOLD times or more is
+logged as a warning with the template line or the project code running it,
+and the select_related/prefetch_related that would most likely fold it into
+a single query.
+
+When the setting is off Django drops the middleware at startup, so it
+costs nothing per request.
+"""
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Node
+
+from .queries import fingerprint
+
+
+logger = logging.getLogger(__name__)
+
+NPLUSONE_THRESHOLD = 3
+
+WHERE_COLUMN = re.compile(r'WHERE \(?"(?P<table>\w+)"\."(?P<column>\w+)" (?:= |IN)')
+
+
+def query_origin():
+    """Where the query being run comes from
+    - The template line rendering it, if any, and the innermost frame of
+      project code outside this module
+
+    Returns:
+        _type_: list of str
+    """
+
+    base_dir = str(settings.BASE_DIR)
+    template = code = None
+    frame = sys._getframe(1)
+    while frame and not (template and code):
+        filename = frame.f_code.co_filename
+        if template is None and frame.f_code.co_name == "render_annotated":
+            node = frame.f_locals.get("self")
+            if isinstance(node, Node) and node.origin and node.token:
+                template = (
+                    f"{node.origin.template_name} line {node.token.lineno}: "
+                    f"{node.token.contents}"
+                )
+        elif (
+            code is None
+            and filename.startswith(base_dir)
+            and "site-packages" not in filename
+            and filename != __file__
+        ):
+            code = f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return [origin for origin in (template, code) if origin]
+
+
+def suggest(sql):
+    """The eager loading that would most likely replace a repeated query
+
+    Returns:
+        _type_: str
+    """
+
+    match = WHERE_COLUMN.search(sql)
+    models = {model._meta.db_table: model for model in apps.get_models(True)}
+    model = models.get(match["table"]) if match else None
+    if model is None:
+        return "load the rows with select_related() or prefetch_related()"
+
+    field = next(
+        (
+            field
+            for field in model._meta.concrete_fields
+            if field.column == match["column"]
+        ),
+        None,
+    )
+    if field is None or field.primary_key:
+        return (
+            f"select_related() the ForeignKey or OneToOneField to "
+            f"{model._meta.label} on the queryset listing the rows"
+        )
+    if not field.is_relation:
+        return "load the rows with select_related() or prefetch_related()"
+
+    if model._meta.auto_created:
+        # the table of a ManyToManyField
+        owner = model._meta.auto_created
+        many_to_many = next(
+            field
+            for field in owner._meta.many_to_many
+            if field.remote_field.through is model
+        )
+        return (
+            f'prefetch_related("{many_to_many.name}") on the '
+            f"{owner._meta.label} queryset"
+        )
+    owner = field.related_model._meta.label
+    accessor = field.remote_field.get_accessor_name()
+    if field.one_to_one:
+        return f'select_related("{accessor}") on the {owner} queryset'
+    return f'prefetch_related("{accessor}") on the {owner} queryset'
+
+
+class QueryRecorder:
+    """Database execute wrapper counting the queries of one request by
+    fingerprint, and keeping where the first repeat of each came from"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        key = fingerprint(sql)
+        self.counts[key] += 1
+        if self.counts[key] == 2:
+            self.origins[key] = query_origin()
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        return [
+            (sql, count)
+            for sql, count in self.counts.most_common()
+            if count >= threshold
+        ]
+
+
+class NPlusOneMiddleware:
+    """Log the query shapes a request runs over and over.
+    - Opt-in with the NPLUSONE_DETECTION setting, for development only
+    - Records the queries of every database connection
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "NPLUSONE_DETECTION", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, "NPLUSONE_THRESHOLD", NPLUSONE_THRESHOLD)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved view"
+        for sql, count in recorder.repeated(self.threshold):
+            origin = "".join(f"\n  from {line}" for line in recorder.origins[sql])
+            logger.warning(
+                "N+1 query in %s %s (%s), run %d times: %s%s\n  suggestion: %s",
+                request.method,
+                request.path,
+                view,
+                count,
+                sql,
+                origin,
+                suggest(sql),
+            )
+        return response
@@ -0,0 +1,42 @@
+"""Grouping of executed SQL by shape, to spot the same query run over and over.
+
+Two queries have the same fingerprint when they only differ in their
+literal values, e.g. every ``SELECT ... FROM users_userprofile WHERE
+user_id = 1``, ``... = 2`` of an N+1 loop.
+"""
+import re
+from collections import Counter
+
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+VALUE_LIST = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """The query with its literals replaced by %s
+
+    Returns:
+        _type_: str
+    """
+
+    sql = STRING_LITERAL.sub("%s", sql)
+    sql = NUMBER_LITERAL.sub("%s", sql)
+    sql = VALUE_LIST.sub("(%s, ...)", sql)
+    return WHITESPACE.sub(" ", sql).strip()
+
+
+def repeated_queries(queries, threshold=2):
+    """Fingerprints executed at least ``threshold`` times, most repeated first
+    - ``queries`` are SQL strings or the dicts of connection.queries
+
+    Returns:
+        _type_: list of (fingerprint, count)
+    """
+
+    counts = Counter(
+        fingerprint(query["sql"] if isinstance(query, dict) else query)
+        for query in queries
+    )
+    return [(sql, count) for sql, count in counts.most_common() if count >= threshold]
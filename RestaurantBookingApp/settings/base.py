@@ -44,10 +44,14 @@ THIRD_PARTY_APPS = [
     "crispy_bootstrap5",
 ]
 LOCAL_APPS = [
+    "tasks.apps.TasksConfig",
+    "notifications.apps.NotificationsConfig",
     "users.apps.UsersConfig",
     "food_menus.apps.FoodMenusConfig",
     "reservation.apps.ReservationConfig",
     "contact.apps.ContactConfig",
+    "imaging.apps.ImagingConfig",
+    "metrics.apps.MetricsConfig",
 ]
 
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
@@ -55,11 +59,13 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 
 MIDDLEWARE = [
+    "metrics.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "users.middleware.UserRoleMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -105,6 +111,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "users.context_processors.user_role",
                 # `allauth` needs this from django
                 "django.template.context_processors.request",
             ],
@@ -141,12 +148,76 @@ STATICFILES_FINDERS = [
 ]
 
 MEDIA_URL = "/media/"
-MEDIA_ROOT = BASE_DIR / "media"
+# run_worker reads and writes the uploads too, point MEDIA_ROOT at a
+# directory the web server and the worker share
+MEDIA_ROOT = Path(env("MEDIA_ROOT", default=str(BASE_DIR / "media")))
+# Uploads are served by imaging/serving.py. Behind nginx set
+# MEDIA_ACCEL_REDIRECT to an internal location aliased to MEDIA_ROOT (or
+# MEDIA_SENDFILE_HEADER=X-Sendfile behind Apache) to let it send the bytes.
+MEDIA_ACCEL_REDIRECT = env("MEDIA_ACCEL_REDIRECT", default=None)
+MEDIA_SENDFILE_HEADER = env("MEDIA_SENDFILE_HEADER", default=None)
+MEDIA_MAX_AGE = env.int("MEDIA_MAX_AGE", default=60 * 60 * 24)
+
+# Uploaded images are resized by the background worker (see tasks/) once
+# stored. On-the-fly renditions (MEDIA_URL<path>?w=&h=&fmt=) are kept in a bounded
+# least-recently-used disk cache, see imaging/disk_cache.py
+IMAGING_CACHE_DIR = env("IMAGING_CACHE_DIR", default=str(BASE_DIR / "media_cache"))
+IMAGING_CACHE_MAX_BYTES = env.int("IMAGING_CACHE_MAX_BYTES", default=256 * 1024 * 1024)
 
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# CACHES
+# https://docs.djangoproject.com/en/dev/topics/cache/
+# Pick the backend with a CACHE_URL environment variable, e.g.
+#   locmemcache://                      (per-process memory, the default)
+#   filecache:///var/tmp/django_cache   (shared by every worker on the host)
+#   rediscache://127.0.0.1:6379/1       (shared by every host)
+# Apps keep their keys in versioned namespaces, see RestaurantBookingApp/cache.py
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+CACHES["default"].setdefault("KEY_PREFIX", "restaurant")
+CACHES["default"].setdefault("TIMEOUT", 60 * 5)
+
+# Contact messages are rate limited to CONTACT_RATE_LIMIT = (submissions,
+# seconds) per IP and per email, and stored in batches by a writer thread,
+# see contact/intake.py
+CONTACT_RATE_LIMIT = (5, 60 * 60)
+CONTACT_BATCH_SIZE = 50
+CONTACT_FLUSH_INTERVAL = 2
+
+# Background tasks queued in the database and run by `manage.py run_worker`,
+# see tasks/queue.py. TASKS_EAGER runs them inline after commit instead.
+TASKS_EAGER = env.bool("TASKS_EAGER", default=False)
+TASKS_CONCURRENCY = env.int("TASKS_CONCURRENCY", default=2)
+TASKS_POOL = env("TASKS_POOL", default="thread")
+TASKS_RETRY_BACKOFF = 10
+TASKS_RETRY_BACKOFF_MAX = 60 * 60
+TASKS_LOCK_TIMEOUT = 60 * 10
+
+# Customer emails are stored in an outbox with the change they report and
+# sent in batches by the background worker, see notifications/outbox.py
+DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", default="webmaster@localhost")
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60 * 5
+OUTBOX_CLAIM_TIMEOUT = 60 * 10
+# Hours ahead of a reservation its reminders are emailed, see
+# reservation/reminders.py
+RESERVATION_REMINDER_HOURS = [24, 2]
+
+# Per URL name request metrics, served in the Prometheus text format at
+# /metrics to superusers and to scrapers sending "Authorization: Bearer
+# <METRICS_TOKEN>". Gunicorn workers share them through files in
+# METRICS_DIR (set by gunicorn.conf.py), see metrics/registry.py
+METRICS_TOKEN = env("METRICS_TOKEN", default=None)
+METRICS_DIR = env("METRICS_DIR", default=None)
+METRICS_FLUSH_INTERVAL = 5
+
+# Clears caches between tests, see RestaurantBookingApp/test_runner.py
+TEST_RUNNER = "RestaurantBookingApp.test_runner.TestRunner"
+
+
 # LOGGING
 # See https://docs.djangoproject.com/en/dev/topics/logging
 LOGGING = {
@@ -15,8 +15,14 @@ INSTALLED_APPS += [
 
 MIDDLEWARE += [
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "RestaurantBookingApp.middleware.NPlusOneMiddleware",
 ]
 
+# log queries a request runs over and over (N+1), see
+# RestaurantBookingApp/middleware.py
+NPLUSONE_DETECTION = env.bool("NPLUSONE_DETECTION", default=False)
+NPLUSONE_THRESHOLD = 3
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 INTERNAL_IPS = [
@@ -32,6 +38,9 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # a file rather than in memory, so the task worker's pool threads can
+        # use the test database at the same time, see tasks/tests.py
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -41,4 +50,8 @@ LOGGING["loggers"] = {
         "level": "DEBUG",
         "propagate": True,
     },
+    "RestaurantBookingApp.middleware": {
+        "handlers": ["console"],
+        "level": "WARNING",
+    },
 }
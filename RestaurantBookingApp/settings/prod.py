@@ -55,6 +55,18 @@ EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
 DATABASES = {"default": dj_database_url.config(conn_max_age=600)}
+
+# Share cached values between the gunicorn workers of a dyno, set CACHE_URL
+# to a Redis or Memcached URL to share them between dynos too.
+CACHES = {
+    "default": env.cache(
+        "CACHE_URL", default=f"filecache://{BASE_DIR / 'django_cache'}"
+    )
+}
+CACHES["default"].setdefault("KEY_PREFIX", "restaurant")
+CACHES["default"].setdefault("TIMEOUT", 60 * 5)
+# the Heroku router appends the client address to X-Forwarded-For
+CONTACT_TRUST_X_FORWARDED_FOR = True
 # DATABASES = {"default": dj_database_url.parse(os.environ.get("DATABASE_URL"))}
 
 DEBUG_PROPAGATE_EXCEPTIONS = True
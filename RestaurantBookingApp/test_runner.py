@@ -0,0 +1,26 @@
+import unittest
+
+from django.core.cache import caches
+from django.test.runner import DiscoverRunner
+
+
+class CacheClearingTestResult:
+    """Clear every configured cache before each test.
+    - Database changes are rolled back after a test but cached rows are not,
+      so without this a row cached by one test would leak into the next
+    """
+
+    def startTest(self, test):
+        for cache in caches.all():
+            cache.clear()
+        super().startTest(test)
+
+
+class TestRunner(DiscoverRunner):
+    def get_resultclass(self):
+        resultclass = super().get_resultclass() or unittest.TextTestResult
+        return type(
+            "CacheClearing" + resultclass.__name__,
+            (CacheClearingTestResult, resultclass),
+            {},
+        )
@@ -0,0 +1,64 @@
+"""Query budget assertions for view tests.
+
+A view's query budget is the most queries one request to it may run. A
+view whose query count grows with the number of rows it lists runs one
+query per row somewhere (an N+1), which a budget measured on a small
+fixture does not catch, so views are also requested before and after
+adding rows and must run the same number of queries.
+
+Requests are made with cold caches, so the budget covers the queries a
+cache hit would hide.
+"""
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .queries import repeated_queries
+
+
+class QueryBudgetTestMixin:
+    """Assertions on the SQL a request runs, for django.test.TestCase"""
+
+    def record_queries(self, client, url, method="get", data=None):
+        """Request ``url`` with cold caches and record its SQL
+
+        Returns:
+            _type_: (response, list of SQL strings)
+        """
+
+        for cache in caches.all():
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(client, method)(url, data)
+        return response, [query["sql"] for query in captured.captured_queries]
+
+    def describe_queries(self, queries):
+        lines = [f"{len(queries)} queries"]
+        for sql, count in repeated_queries(queries):
+            lines.append(f"repeated {count} times: {sql}")
+        lines.extend(f"{number}. {sql}" for number, sql in enumerate(queries, 1))
+        return "\n".join(lines)
+
+    def assertQueryBudget(self, queries, budget, msg=None):
+        """No more than ``budget`` queries were run"""
+
+        if len(queries) > budget:
+            self.fail(
+                self._formatMessage(
+                    msg,
+                    f"{len(queries)} queries over a budget of {budget}\n"
+                    + self.describe_queries(queries),
+                )
+            )
+
+    def assertQueriesDoNotGrow(self, before, after, msg=None):
+        """As many queries were run ``after`` adding rows as ``before``"""
+
+        if len(after) > len(before):
+            self.fail(
+                self._formatMessage(
+                    msg,
+                    f"queries grew from {len(before)} to {len(after)} with more rows\n"
+                    + self.describe_queries(after),
+                )
+            )
@@ -0,0 +1,395 @@
+import datetime
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+
+from RestaurantBookingApp import cache, middleware
+from RestaurantBookingApp import urls as root_urls
+from RestaurantBookingApp.middleware import NPlusOneMiddleware
+from RestaurantBookingApp.testing import QueryBudgetTestMixin
+from food_menus import urls as food_menus_urls
+from food_menus.models import MenuModel
+from reservation import urls as reservation_urls
+from reservation.models import RestaurantModel, ReservationModel, TableModel
+from users import urls as users_urls
+from users.models import RestaurantAdmin
+
+
+class NamespacedCacheTestMixin:
+    """Versioned cache namespaces should work on any cache backend"""
+
+    def test_set_and_get_should_round_trip(self):
+        """a value should be read back from its namespace"""
+
+        cache.set("reservation", "restaurant", {"name": "test"})
+        self.assertEqual(cache.get("reservation", "restaurant"), {"name": "test"})
+        self.assertIsNone(cache.get("food_menus", "restaurant"))
+
+    def test_invalidate_should_drop_only_its_namespace(self):
+        """invalidating a namespace should leave other namespaces alone"""
+
+        cache.set_many("food_menus", {"page:1": "a", "page:2": "b"})
+        cache.set("users", "role-version:1", "v1")
+        cache.invalidate("food_menus")
+        self.assertEqual(cache.get_many("food_menus", ["page:1", "page:2"]), {})
+        self.assertEqual(cache.get("users", "role-version:1"), "v1")
+
+    def test_delete_should_drop_single_keys(self):
+        """deleting keys should keep the rest of the namespace"""
+
+        cache.set_many("reservation", {"a": 1, "b": 2})
+        cache.delete("reservation", "a")
+        self.assertEqual(cache.get_many("reservation", ["a", "b"]), {"b": 2})
+
+    def test_get_or_set_should_cache_none(self):
+        """get_or_set should compute a missing value only once"""
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return None
+
+        self.assertIsNone(cache.get_or_set("reservation", "restaurant", compute))
+        self.assertIsNone(cache.get_or_set("reservation", "restaurant", compute))
+        self.assertEqual(len(calls), 1)
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "namespaced-cache-tests",
+        }
+    }
+)
+class LocMemNamespacedCacheTest(NamespacedCacheTestMixin, SimpleTestCase):
+    pass
+
+
+class FileNamespacedCacheTest(NamespacedCacheTestMixin, SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": directory.name,
+                }
+            }
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class ViewBudget:
+    """The query budget of one URL name
+    - ``user`` is None (anonymous), "customer", "admin" or "superuser"
+    - ``kwargs`` and ``data`` are called with the test case, so each request
+      can get a row of its own to update or delete
+    """
+
+    def __init__(
+        self, budget, user=None, method="get", kwargs=None, query="", data=None
+    ):
+        self.budget = budget
+        self.user = user
+        self.method = method
+        self.kwargs = kwargs
+        self.query = query
+        self.data = data
+
+
+def admin_post(case):
+    number = User.objects.count()
+    return {
+        "username": f"new_admin{number}",
+        "email": f"new_admin{number}@mail.com",
+        "password1": "Secret-pass-123",
+        "password2": "Secret-pass-123",
+        "name": "New Admin",
+        "role": "Manager",
+        "phone": "01234567890",
+    }
+
+
+# every URL name of the root, reservation, food_menus and users URLconfs
+VIEW_BUDGETS = {
+    # root
+    "index": ViewBudget(1),
+    "home": ViewBudget(1),
+    "contact_us": ViewBudget(1),
+    "radmin_login": ViewBudget(0),
+    "metrics": ViewBudget(2, user="superuser"),
+    "media": ViewBudget(0, kwargs=lambda case: {"path": "avatars/.gitkeep"}),
+    # users
+    "update_profile": ViewBudget(7, user="customer"),
+    # food_menus
+    "menu_list": ViewBudget(3),
+    "menu_search": ViewBudget(2, query="?q=rice"),
+    "admin_menu_list": ViewBudget(7, user="admin"),
+    "menu_create": ViewBudget(
+        6,
+        user="admin",
+        method="post",
+        data=lambda case: {"name": "menu", "food_items": "rice, beans", "price": 10},
+    ),
+    "menu_update": ViewBudget(
+        7, user="admin", kwargs=lambda case: {"menu_id": case.add_menu().id}
+    ),
+    "menu_delete": ViewBudget(
+        10, user="admin", kwargs=lambda case: {"menu_id": case.add_menu().id}
+    ),
+    # reservation
+    "admin_add": ViewBudget(10, user="superuser", method="post", data=admin_post),
+    "update_admin": ViewBudget(
+        4,
+        user="superuser",
+        kwargs=lambda case: {"username": case.add_admin().user.username},
+    ),
+    "delete_admin": ViewBudget(
+        14,
+        user="superuser",
+        kwargs=lambda case: {"username": case.add_admin().user.username},
+    ),
+    "admin_logout": ViewBudget(5, user="admin"),
+    "all_admins": ViewBudget(3, user="superuser"),
+    "admin_dashboard": ViewBudget(8, user="admin"),
+    "todays_reservations": ViewBudget(7, user="admin"),
+    "upcoming_reservations": ViewBudget(7, user="admin"),
+    "past_reservations": ViewBudget(7, user="admin"),
+    "create_restaurant": ViewBudget(7, user="admin"),
+    "update_restaurant": ViewBudget(7, user="admin"),
+    "add_table": ViewBudget(7, user="admin"),
+    "update_table": ViewBudget(
+        7, user="admin", kwargs=lambda case: {"table_id": case.add_table().id}
+    ),
+    "delete_table": ViewBudget(
+        9, user="admin", kwargs=lambda case: {"table_id": case.add_table().id}
+    ),
+    "user_reservations": ViewBudget(7, user="customer"),
+    "make_reservation": ViewBudget(10, user="customer"),
+    "cancel_reservation": ViewBudget(
+        11,
+        user="customer",
+        kwargs=lambda case: {"reservation_id": case.add_reservations(1)[0].id},
+    ),
+}
+
+
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    """Every view should stay within its query budget, whatever the number
+    of tables, reservations, menus and admins"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = RestaurantModel.objects.create(
+            name="test_restaurant",
+            opening_hour="10:00",
+            closing_hour="22:00",
+            contact_number="01234567891",
+            email="test@mail.com",
+        )
+        cls.users = {
+            "customer": User.objects.create_user("customer", "customer@mail.com"),
+            "admin": RestaurantAdmin.objects.create(
+                user=User.objects.create_user("radmin", "radmin@mail.com"),
+                name="Radmin",
+                role="Manager",
+                phone="01234567890",
+            ).user,
+            "superuser": User.objects.create_superuser(
+                "superuser", "superuser@mail.com", None
+            ),
+        }
+        cls.populate(2)
+
+    @classmethod
+    def populate(cls, count):
+        """Add ``count`` of each row the views list"""
+
+        for _ in range(count):
+            cls.add_menu()
+            cls.add_admin()
+        cls.add_reservations(count)
+
+    @classmethod
+    def add_menu(cls):
+        return MenuModel.objects.create(
+            name="menu", food_items="rice, beans, salad", price=10
+        )
+
+    @classmethod
+    def add_admin(cls):
+        number = User.objects.count()
+        return RestaurantAdmin.objects.create(
+            user=User.objects.create_user(f"admin{number}", f"admin{number}@mail.com"),
+            name="Admin",
+            role="Manager",
+            phone="01234567890",
+        )
+
+    @classmethod
+    def add_table(cls):
+        return TableModel.objects.create(
+            restaurant=cls.restaurant,
+            table_number=TableModel.objects.count() + 1,
+            seats=4,
+        )
+
+    @classmethod
+    def add_reservations(cls, count):
+        """``count`` new tables, each booked by the customer on a day ahead
+        and by another customer yesterday, today and ahead
+
+        Returns:
+            _type_: list of the customer's new reservations
+        """
+
+        today = timezone.localdate()
+        booked = []
+        for _ in range(count):
+            table = cls.add_table()
+            other = User.objects.create_user(f"guest{table.table_number}")
+            for customer, days, time in [
+                (cls.users["customer"], table.table_number, "12:00"),
+                (other, -1, "12:00"),
+                (other, 0, "12:00"),
+                (other, 2, "18:00"),
+            ]:
+                reservation = ReservationModel.objects.create(
+                    customer=customer,
+                    table=table,
+                    reservation_date=today + datetime.timedelta(days=days),
+                    reservation_time=parse_time(time),
+                    message="test",
+                )
+                if customer == cls.users["customer"]:
+                    booked.append(reservation)
+        return booked
+
+    def request_view(self, name):
+        view = VIEW_BUDGETS[name]
+        client = Client(HTTP_REFERER="/")
+        if view.user:
+            client.force_login(self.users[view.user])
+        kwargs = view.kwargs(self) if view.kwargs else None
+        data = view.data(self) if view.data else None
+        url = reverse(name, kwargs=kwargs) + view.query
+        response, queries = self.record_queries(client, url, view.method, data)
+        self.assertLess(response.status_code, 400, f"{name} responded {response}")
+        return queries
+
+    def test_every_url_name_should_declare_a_budget(self):
+        """views added to the URLconfs should get a budget too"""
+
+        names = {
+            pattern.name
+            for module in (root_urls, reservation_urls, food_menus_urls, users_urls)
+            for pattern in module.urlpatterns
+            if isinstance(pattern, URLPattern) and pattern.name
+        }
+        self.assertEqual(names - set(VIEW_BUDGETS), set())
+
+    def test_views_should_stay_within_their_budget(self):
+        """no view should run more queries than its budget"""
+
+        for name, view in VIEW_BUDGETS.items():
+            with self.subTest(name):
+                self.assertQueryBudget(self.request_view(name), view.budget)
+
+    def test_query_count_should_not_grow_with_rows(self):
+        """no view should run a query per listed row"""
+
+        before = {name: self.request_view(name) for name in VIEW_BUDGETS}
+        self.populate(8)
+        for name in VIEW_BUDGETS:
+            with self.subTest(name):
+                self.assertQueriesDoNotGrow(before[name], self.request_view(name))
+
+
+@override_settings(NPLUSONE_DETECTION=True, NPLUSONE_THRESHOLD=3)
+class NPlusOneMiddlewareTest(TestCase):
+    """Requests running a query per row should be logged with a fix"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            RestaurantAdmin.objects.create(
+                user=User.objects.create_user(f"admin{number}"),
+                name="Admin",
+                role="Manager",
+                phone="01234567890",
+            )
+
+    def request(self, view):
+        request = RequestFactory().get("/admins/")
+        request.resolver_match = None
+        with self.assertLogs("RestaurantBookingApp.middleware", "WARNING") as logs:
+            NPlusOneMiddleware(view)(request)
+        return "\n".join(logs.output)
+
+    def test_repeated_query_should_be_logged_from_its_template_line(self):
+        """a relation read per row in a template should be reported"""
+
+        template = Template(
+            "{% for admin in admins %}\n{{ admin.user.username }}\n{% endfor %}"
+        )
+
+        def view(request):
+            admins = RestaurantAdmin.objects.all()
+            return HttpResponse(template.render(Context({"admins": admins})))
+
+        log = self.request(view)
+        self.assertIn("run 3 times", log)
+        self.assertIn('FROM "auth_user" WHERE "auth_user"."id" = %s', log)
+        self.assertIn("line 2: admin.user.username", log)
+        self.assertIn("select_related() the ForeignKey or OneToOneField", log)
+
+    def test_reverse_relation_should_suggest_prefetch_related(self):
+        """a reverse relation read per row should suggest prefetch_related"""
+
+        def view(request):
+            for user in User.objects.all():
+                list(user.reservations.all())
+            return HttpResponse()
+
+        log = self.request(view)
+        self.assertIn("RestaurantBookingApp/tests.py", log)
+        self.assertIn('prefetch_related("reservations") on the auth.User', log)
+
+    def test_eager_loading_should_not_be_logged(self):
+        """a queryset with select_related should log nothing"""
+
+        def view(request):
+            for admin in RestaurantAdmin.objects.select_related("user"):
+                admin.user.username
+            return HttpResponse()
+
+        request = RequestFactory().get("/admins/")
+        request.resolver_match = None
+        with mock.patch.object(middleware.logger, "warning") as warning:
+            NPlusOneMiddleware(view)(request)
+        warning.assert_not_called()
+
+    @override_settings(NPLUSONE_DETECTION=False)
+    def test_middleware_should_be_dropped_when_disabled(self):
+        """the detector should not run at all unless enabled"""
+
+        with self.assertRaises(MiddlewareNotUsed):
+            NPlusOneMiddleware(lambda request: HttpResponse())
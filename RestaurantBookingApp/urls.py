@@ -1,11 +1,13 @@
 import imp
+import re
 from django.contrib import admin
 from django.conf import settings
-from django.conf.urls.static import static
-from django.urls import path, include
+from django.urls import path, re_path, include
 
 from reservation.views import index_view, admin_login_view
 from contact.views import contact_us_view
+from imaging.views import media_view
+from metrics.views import metrics_view
 
 
 urlpatterns = [
@@ -18,10 +20,17 @@ urlpatterns = [
     path("home/", index_view, name="home"),
     path("contact/", contact_us_view, name="contact_us"),
     path("radmin/login", admin_login_view, name="radmin_login"),
+    path("metrics", metrics_view, name="metrics"),
     path("profile/", include("users.urls")),
     path("food-menu/", include("food_menus.urls")),
     path("reservations/", include("reservation.urls")),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # uploads, and their renditions with ?w=&h=&fmt=
+    re_path(
+        r"^{}(?P<path>.*)$".format(re.escape(settings.MEDIA_URL.lstrip("/"))),
+        media_view,
+        name="media",
+    ),
+]
 
 
 if settings.DEBUG:
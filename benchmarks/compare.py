@@ -0,0 +1,51 @@
+"""Compare two benchmarks/run.py results, scenario by scenario:
+
+    python benchmarks/compare.py benchmarks/results/abc1234.json benchmarks/results/def5678.json
+
+Latency changes are relative to the first file, query count changes absolute.
+"""
+
+import json
+import sys
+
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "rps"]
+
+
+def change(old, new):
+    if not old:
+        return "     n/a"
+    return f"{(new - old) / old * 100:>+7.1f}%"
+
+
+def main(old_path, new_path):
+    with open(old_path) as file:
+        old = json.load(file)
+    with open(new_path) as file:
+        new = json.load(file)
+
+    print(f"{old['revision']} -> {new['revision']} ({new['database']}, {new['scale']})")
+    if (old["database"], old["scale"]) != (new["database"], new["scale"]):
+        print(f"warning: {old_path} ran on {old['database']} at {old['scale']} scale")
+    header = f"{'scenario':<24}" + "".join(f"{metric:>10}" for metric in METRICS)
+    print(header + f"{'queries':>10}")
+    print("-" * (len(header) + 10))
+    for name, result in new["scenarios"].items():
+        before = old["scenarios"].get(name)
+        if before is None:
+            print(f"{name:<24}{'new':>10}")
+            continue
+        queries = result["queries"] - before["queries"]
+        print(
+            f"{name:<24}"
+            + "".join(
+                f"{change(before[metric], result[metric]):>10}" for metric in METRICS
+            )
+            + f"{queries:>+10}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(f"usage: {sys.argv[0]} OLD.json NEW.json")
+    main(*sys.argv[1:])
@@ -0,0 +1,87 @@
+"""Requests per second of the anonymous home page, uncached vs cached.
+
+Runs with DEBUG off (no debug toolbar) against a throwaway test database
+seeded with menus:
+
+    python benchmarks/home_page.py --requests 500
+
+"Uncached" drops the menu cache namespace before every request, which is
+what every visit cost before the home page was cached: one menu query and
+a full template render.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "RestaurantBookingApp.settings.local")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import caches  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from RestaurantBookingApp import cache  # noqa: E402
+from food_menus.models import MENU_CACHE_NAMESPACE, MenuModel  # noqa: E402
+
+
+def seed(menus):
+    MenuModel.objects.bulk_create(
+        MenuModel(
+            name=f"menu {number}",
+            food_items="rice, beans, salad",
+            price=number,
+            menu_image="menu_images/menu.jpg",
+        )
+        for number in range(menus)
+    )
+
+
+def measure(client, url, requests, before_each=None):
+    started = time.perf_counter()
+    for _ in range(requests):
+        if before_each:
+            before_each()
+        response = client.get(url)
+        assert response.status_code == 200, response.status_code
+    return requests / (time.perf_counter() - started)
+
+
+@override_settings(DEBUG=False)
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--menus", type=int, default=30)
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        for backend in caches.all():
+            backend.clear()
+        seed(args.menus)
+        client = Client()
+        url = reverse("index")
+        client.get(url)
+
+        uncached = measure(
+            client,
+            url,
+            args.requests,
+            before_each=lambda: cache.invalidate(MENU_CACHE_NAMESPACE),
+        )
+        cached = measure(client, url, args.requests)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"uncached: {uncached:8.1f} req/s")
+    print(f"cached:   {cached:8.1f} req/s ({cached / uncached:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
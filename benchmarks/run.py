@@ -0,0 +1,200 @@
+"""Latency, throughput and query counts of the booking and admin hot paths.
+
+Seeds a throwaway database with a deterministic dataset, replays every
+scenario of benchmarks/scenarios.py through the Django test client and
+reports p50/p95/p99 latency, requests per second and queries per request:
+
+    python benchmarks/run.py --scale small --requests 200
+    python benchmarks/run.py --scenario menu_list --scenario admin
+
+Runs against SQLite by default, set BENCHMARK_DATABASE_URL to use a local
+PostgreSQL (see benchmarks/settings.py). Results are written as JSON to
+benchmarks/results/<commit>.json, compare two runs with
+benchmarks/compare.py.
+
+Requests go through the whole middleware stack but not over HTTP, so the
+numbers are the application's share of a response time, measured after a
+few warm-up requests have filled the caches.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import caches  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from benchmarks.scenarios import build_scenarios  # noqa: E402
+from benchmarks.seed import SCALES, create_users, seed  # noqa: E402
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list"""
+
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=BASE_DIR, capture_output=True, text=True
+        ).stdout.strip()
+
+    try:
+        return git("rev-parse", "--short", "HEAD") or None, bool(
+            git("status", "--porcelain", "--untracked-files=no")
+        )
+    except OSError:
+        return None, False
+
+
+def run_scenario(client, scenario, requests, warmup, probes):
+    """Time ``requests`` requests of a scenario after ``warmup`` ones
+
+    Returns:
+        _type_: dict of results
+    """
+
+    errors = 0
+    for _ in range(warmup):
+        scenario.request(client)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        response = scenario.request(client)
+        latencies.append(time.perf_counter() - request_started)
+        if response.status_code != scenario.status:
+            errors += 1
+    elapsed = time.perf_counter() - started
+
+    queries = []
+    for _ in range(probes):
+        with CaptureQueriesContext(connection) as captured:
+            scenario.request(client)
+        queries.append(len(captured))
+
+    latencies.sort()
+    return {
+        "url": scenario.url,
+        "method": scenario.method.upper(),
+        "user": scenario.user or "anonymous",
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "mean_ms": round(sum(latencies) / requests * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "queries": sorted(queries)[len(queries) // 2] if queries else None,
+        "queries_max": max(queries) if queries else None,
+    }
+
+
+def print_results(results):
+    header = f"{'scenario':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        print(
+            f"{name:<24}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+            f"{result['p99_ms']:>9.2f}{result['rps']:>9.1f}{result['queries']:>9}"
+            + (
+                f"  {result['errors']} unexpected status(es)"
+                if result["errors"]
+                else ""
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument(
+        "--probes", type=int, default=3, help="requests made to count queries"
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        default=[],
+        help="only run scenarios whose name contains this, repeatable",
+    )
+    parser.add_argument("--output", help="JSON file, defaults to results/<commit>.json")
+    args = parser.parse_args()
+
+    revision, dirty = git_revision()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        for backend in caches.all():
+            backend.clear()
+        seeded_started = time.perf_counter()
+        dataset = seed(**SCALES[args.scale])
+        users = create_users()
+        print(
+            f"Seeded {args.scale} dataset {dataset} on {connection.vendor} "
+            f"in {time.perf_counter() - seeded_started:.1f}s"
+        )
+
+        clients = {None: Client()}
+        for role, user in users.items():
+            clients[role] = Client()
+            clients[role].force_login(user)
+
+        results = {}
+        for scenario in build_scenarios(SCALES[args.scale]):
+            if args.scenario and not any(s in scenario.name for s in args.scenario):
+                continue
+            results[scenario.name] = run_scenario(
+                clients[scenario.user],
+                scenario,
+                args.requests,
+                args.warmup,
+                args.probes,
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print_results(results)
+
+    report = {
+        "revision": revision,
+        "dirty": dirty,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "scale": args.scale,
+        "dataset": dataset,
+        "scenarios": results,
+    }
+    output = args.output or os.path.join(
+        BASE_DIR, "benchmarks", "results", f"{revision or 'unknown'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Requests replayed by the benchmark suite.
+
+Each scenario is one URL requested over and over by one kind of visitor:
+an anonymous visitor, a signed-in customer, a restaurant admin or a
+superuser. Scenarios posting a form get a fresh payload for every request.
+"""
+
+import datetime
+import itertools
+
+from django.urls import reverse
+from django.utils import timezone
+
+from food_menus.models import FoodItemTag
+from reservation.slots import slots_for_date
+
+
+class Scenario:
+    def __init__(self, name, url, user=None, method="get", data=None, status=200):
+        self.name = name
+        self.url = url
+        self.user = user
+        self.method = method
+        self.data = data
+        self.status = status
+
+    def request(self, client):
+        data = next(self.data) if self.data else None
+        return getattr(client, self.method)(self.url, data)
+
+
+def booking_payloads(table_number, first_day):
+    """Form data booking ``table_number`` in every slot from ``first_day``
+    days ahead on, one slot after the other so no booking collides"""
+
+    today = timezone.localdate()
+    for offset in itertools.count(first_day):
+        date = today + datetime.timedelta(days=offset)
+        for time in slots_for_date(date):
+            yield {
+                "date": date.strftime("%m/%d/%Y"),
+                "time": time,
+                "table_size": str(table_number),
+                "message": "benchmark",
+            }
+
+
+def build_scenarios(scale):
+    """Every scenario of the suite for a dataset seeded at ``scale``
+
+    Returns:
+        _type_: list of Scenario
+    """
+
+    tag = FoodItemTag.objects.order_by("name").first()
+    return [
+        Scenario("index", reverse("index")),
+        Scenario("menu_list", reverse("menu_list")),
+        Scenario("menu_list_page_2", reverse("menu_list") + "?page=2"),
+        Scenario("menu_list_tag", f"{reverse('menu_list')}?tag={tag.slug}"),
+        Scenario("make_reservation_get", reverse("make_reservation"), user="customer"),
+        Scenario(
+            "make_reservation_post",
+            reverse("make_reservation"),
+            user="customer",
+            method="post",
+            data=booking_payloads(1, scale["days_ahead"] + 1),
+        ),
+        Scenario("user_reservations", reverse("user_reservations"), user="customer"),
+        Scenario("admin_dashboard", reverse("admin_dashboard"), user="admin"),
+        Scenario("todays_reservations", reverse("todays_reservations"), user="admin"),
+        Scenario(
+            "upcoming_reservations", reverse("upcoming_reservations"), user="admin"
+        ),
+        Scenario("past_reservations", reverse("past_reservations"), user="admin"),
+        Scenario("all_admins", reverse("all_admins"), user="superuser"),
+    ]
@@ -0,0 +1,138 @@
+"""Deterministic dataset for the benchmark suite.
+
+The same scale always produces the same rows, so results of different
+commits are measured against the same data.
+"""
+
+import datetime
+import random
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+
+from food_menus.models import MenuModel
+from reservation.models import RestaurantModel, ReservationModel, TableModel
+from reservation.slots import generate_slots
+from users.models import RestaurantAdmin, UserProfile
+
+
+SCALES = {
+    "small": dict(menus=30, tables=10, customers=100, days_back=30, days_ahead=14),
+    "medium": dict(menus=120, tables=25, customers=1000, days_back=180, days_ahead=30),
+    "large": dict(menus=500, tables=60, customers=5000, days_back=365, days_ahead=60),
+}
+OPENING_HOUR = datetime.time(10, 0)
+CLOSING_HOUR = datetime.time(22, 0)
+FOOD_ITEMS = [
+    "rice",
+    "beans",
+    "salad",
+    "chicken",
+    "beef",
+    "fish",
+    "noodles",
+    "soup",
+    "bread",
+    "cheese",
+    "tomato",
+    "mushroom",
+]
+
+
+def seed(menus, tables, customers, days_back, days_ahead, occupancy=0.5, seed=0):
+    """Create the restaurant, its tables, menus, users and reservations
+    - ``occupancy`` is the share of table slots booked on every day from
+      ``days_back`` ago to ``days_ahead`` from today
+
+    Returns:
+        _type_: dict of row counts
+    """
+
+    rng = random.Random(seed)
+    restaurant = RestaurantModel.objects.create(
+        name="Benchmark Bistro",
+        opening_hour=OPENING_HOUR,
+        closing_hour=CLOSING_HOUR,
+        email="bistro@example.com",
+        contact_number="0123456789",
+    )
+    TableModel.objects.bulk_create(
+        TableModel(
+            restaurant=restaurant, table_number=number, seats=rng.choice([2, 4, 6])
+        )
+        for number in range(1, tables + 1)
+    )
+    table_list = list(TableModel.objects.order_by("table_number"))
+
+    # menus are saved one by one so their tags and search index are built
+    for number in range(menus):
+        MenuModel.objects.create(
+            name=f"menu {number}",
+            food_items=", ".join(rng.sample(FOOD_ITEMS, 4)),
+            price=rng.randint(5, 60),
+            menu_image="menu_images/menu.jpg",
+        )
+
+    User.objects.bulk_create(
+        User(username=f"customer{number}", email=f"customer{number}@example.com")
+        for number in range(customers)
+    )
+    customer_ids = list(
+        User.objects.filter(username__startswith="customer")
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    # bulk_create skips the post_save signal creating profiles
+    UserProfile.objects.bulk_create(
+        UserProfile(user_id=customer_id) for customer_id in customer_ids
+    )
+
+    today = timezone.localdate()
+    slots = [parse_time(slot) for slot in generate_slots(OPENING_HOUR, CLOSING_HOUR)]
+    reservations = []
+    for offset in range(-days_back, days_ahead + 1):
+        date = today + datetime.timedelta(days=offset)
+        for time in slots:
+            booked = [table for table in table_list if rng.random() < occupancy]
+            # distinct customers per slot, a customer books one table at a time
+            for table, customer_id in zip(
+                booked, rng.sample(customer_ids, len(booked))
+            ):
+                reservations.append(
+                    ReservationModel(
+                        customer_id=customer_id,
+                        table=table,
+                        reservation_date=date,
+                        reservation_time=time,
+                    )
+                )
+    ReservationModel.objects.bulk_create(reservations, batch_size=1000)
+
+    return {
+        "menus": menus,
+        "tables": tables,
+        "customers": customers,
+        "reservations": len(reservations),
+    }
+
+
+def create_users():
+    """The customer, restaurant admin and superuser the scenarios sign in as
+    - The customer is one of the seeded customers, with their reservations
+
+    Returns:
+        _type_: dict of {role: User}
+    """
+
+    admin = User.objects.create_user("bench_admin", "bench_admin@example.com")
+    RestaurantAdmin.objects.create(
+        user=admin, name="Bench Admin", role="Manager", phone="01234567890"
+    )
+    return {
+        "customer": User.objects.get(username="customer0"),
+        "admin": admin,
+        "superuser": User.objects.create_superuser(
+            "bench_superuser", "bench_superuser@example.com", None
+        ),
+    }
@@ -0,0 +1,17 @@
+from django import forms
+
+from .models import Message
+
+
+class ContactForm(forms.ModelForm):
+    class Meta:
+        model = Message
+        fields = ["name", "email", "phone", "message"]
+
+    def clean_message(self):
+        message = self.cleaned_data.get("message", "").strip()
+        if len(message) > 2000:
+            raise forms.ValidationError(
+                "Please keep your message under 2000 characters."
+            )
+        return message
@@ -0,0 +1,211 @@
+"""Buffered intake of contact messages.
+
+Submissions are checked against per-IP and per-email rate limits and a
+recent-fingerprint cache, then put on an in-process queue. A single writer
+thread drains the queue and inserts messages in batches of up to
+CONTACT_BATCH_SIZE. A batch is written once it is full or
+CONTACT_FLUSH_INTERVAL seconds after its first message, whichever comes
+first. Duplicates that slip through are dropped by the writer when the
+same fingerprint was stored within FINGERPRINT_TIMEOUT, so a spam burst
+costs a handful of inserts and never blocks a worker on the database. The
+same content sent again after that is stored as a new message.
+
+Set CONTACT_BUFFERED = False to insert every message inline, which the
+tests do.
+"""
+
+import atexit
+import datetime
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from RestaurantBookingApp import cache
+
+from .models import Message, message_fingerprint
+
+logger = logging.getLogger(__name__)
+
+CONTACT_CACHE_NAMESPACE = "contact"
+RATE_LIMIT_KEY = "rate:{}:{}"
+FINGERPRINT_KEY = "fingerprint:{}"
+FINGERPRINT_TIMEOUT = 60 * 60 * 24
+
+
+class QueueFull(Exception):
+    """Raised when the intake queue can not take another message."""
+
+
+def client_ip(request):
+    """Address of the client, behind a proxy the last X-Forwarded-For hop
+    appended by the proxy when CONTACT_TRUST_X_FORWARDED_FOR is set"""
+
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if forwarded and getattr(settings, "CONTACT_TRUST_X_FORWARDED_FOR", False):
+        return forwarded.split(",")[-1].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def rate_limited(ip, email):
+    """Count a submission against the IP and email limits
+
+    Returns:
+        _type_: True when either limit is exceeded
+    """
+
+    limit, window = getattr(settings, "CONTACT_RATE_LIMIT", (5, 60 * 60))
+    counts = [
+        cache.incr(
+            CONTACT_CACHE_NAMESPACE, RATE_LIMIT_KEY.format(scope, identifier), window
+        )
+        for scope, identifier in (("ip", ip), ("email", email.strip().lower()))
+    ]
+    return max(counts) > limit
+
+
+def write_messages(messages):
+    """Insert a batch, content already stored within FINGERPRINT_TIMEOUT is
+    skipped"""
+
+    for message in messages:
+        message.fingerprint = message_fingerprint(message.email, message.message)
+    since = timezone.now() - datetime.timedelta(seconds=FINGERPRINT_TIMEOUT)
+    seen = set(
+        Message.objects.filter(
+            fingerprint__in={message.fingerprint for message in messages},
+            created_on__gte=since,
+        ).values_list("fingerprint", flat=True)
+    )
+    new = []
+    for message in messages:
+        if message.fingerprint not in seen:
+            seen.add(message.fingerprint)
+            new.append(message)
+    Message.objects.bulk_create(new)
+
+
+class MessageQueue:
+    """Bounded queue drained in batches by one daemon writer thread"""
+
+    def __init__(self, writer, batch_size, flush_interval, maxsize):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def put(self, message):
+        """Hand a message to the writer thread
+
+        Raises:
+            QueueFull: the writer is behind by maxsize messages
+        """
+
+        self.start()
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            raise QueueFull()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name="contact-intake", daemon=True
+                )
+                self.thread.start()
+
+    def next_batch(self, timeout=None):
+        """Wait for a message, then collect more until the batch is full or
+        flush_interval has passed"""
+
+        try:
+            batch = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def write(self, batch):
+        try:
+            self.writer(batch)
+        except Exception:
+            logger.exception("Could not store %d contact message(s)", len(batch))
+        finally:
+            connections.close_all()
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            if batch:
+                self.write(batch)
+
+    def flush(self):
+        """Write whatever is queued right away, e.g. at shutdown"""
+
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.write(batch)
+
+
+message_queue = MessageQueue(
+    write_messages,
+    batch_size=getattr(settings, "CONTACT_BATCH_SIZE", 50),
+    flush_interval=getattr(settings, "CONTACT_FLUSH_INTERVAL", 2),
+    maxsize=getattr(settings, "CONTACT_QUEUE_SIZE", 1000),
+)
+atexit.register(message_queue.flush)
+
+
+def submit(message):
+    """Store a validated, unsaved Message
+
+    Raises:
+        QueueFull: too many messages are waiting to be stored
+    """
+
+    if getattr(settings, "CONTACT_BUFFERED", True):
+        message_queue.put(message)
+    else:
+        write_messages([message])
+
+
+def accept(message):
+    """Queue a validated, unsaved Message unless the same content was
+    accepted within the last day
+
+    Raises:
+        QueueFull: too many messages are waiting to be stored
+
+    Returns:
+        _type_: False for a resubmission
+    """
+
+    key = FINGERPRINT_KEY.format(message_fingerprint(message.email, message.message))
+    if not cache.add(CONTACT_CACHE_NAMESPACE, key, True, FINGERPRINT_TIMEOUT):
+        return False
+    try:
+        submit(message)
+    except QueueFull:
+        cache.delete(CONTACT_CACHE_NAMESPACE, key)
+        raise
+    return True
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:45
+
+import hashlib
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def fingerprint_messages(apps, schema_editor):
+    """Fingerprint existing messages."""
+
+    Message = apps.get_model("contact", "Message")
+    for message in Message.objects.iterator():
+        content = "{}\n{}".format(
+            (message.email or "").strip().lower(),
+            " ".join((message.message or "").lower().split()),
+        )
+        fingerprint = hashlib.sha256(content.encode()).hexdigest()
+        Message.objects.filter(id=message.id).update(fingerprint=fingerprint)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contact", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="created_on",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="fingerprint",
+            field=models.CharField(default="", editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fingerprint_messages, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["fingerprint", "created_on"], name="message_fingerprint_recent"
+            ),
+        ),
+    ]
@@ -1,15 +1,39 @@
+import hashlib
+
 from django.db import models
 
 
+def message_fingerprint(email, message):
+    """Content fingerprint of a submission, the same for resubmissions that
+    only differ in letter case or whitespace"""
+
+    content = "{}\n{}".format(
+        (email or "").strip().lower(), " ".join((message or "").lower().split())
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
 class Message(models.Model):
     name = models.CharField(max_length=40)
     email = models.EmailField(max_length=50)
     phone = models.CharField(max_length=15)
     message = models.TextField()
+    fingerprint = models.CharField(max_length=64, editable=False)
+    created_on = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = "Message"
         verbose_name_plural = "Messages"
+        indexes = [
+            # recent messages with the same content, see contact/intake.py
+            models.Index(
+                fields=["fingerprint", "created_on"], name="message_fingerprint_recent"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.email}"
+
+    def save(self, *args, **kwargs):
+        self.fingerprint = message_fingerprint(self.email, self.message)
+        super(Message, self).save(*args, **kwargs)
@@ -1,7 +1,13 @@
-from django.test import TestCase
+import datetime
+import threading
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.shortcuts import reverse
+from django.utils import timezone
 
-from contact.models import Message
+from contact.intake import MessageQueue, QueueFull, write_messages
+from contact.models import Message, message_fingerprint
 from reservation.models import RestaurantModel
 
 
@@ -90,3 +96,113 @@ class ContactUrlsTest(TestCase):
         """reservation urls should be defined"""
 
         self.assertEqual(reverse("contact_us"), "/contact/")
+
+
+@override_settings(CONTACT_BUFFERED=False, CONTACT_RATE_LIMIT=(3, 60))
+class ContactIntakeTest(TestCase):
+    """Contact submissions are validated, deduplicated and rate limited"""
+
+    def post(self, message="I would like to book a party", **data):
+        data = {
+            "name": "Test Name",
+            "email": "test@mail.com",
+            "phone": "1234567890",
+            "message": message,
+            **data,
+        }
+        return self.client.post(reverse("contact_us"), data, follow=True)
+
+    def test_valid_message_should_be_stored(self):
+        """a valid submission should be stored with its fingerprint"""
+
+        response = self.post()
+        self.assertContains(response, "submitted successfully")
+        message = Message.objects.get()
+        self.assertEqual(
+            message.fingerprint,
+            message_fingerprint("test@mail.com", "I would like to book a party"),
+        )
+
+    def test_invalid_message_should_be_rejected(self):
+        """an invalid email should not be stored"""
+
+        response = self.post(email="not-an-email")
+        self.assertContains(response, "Enter a valid email address")
+        self.assertFalse(Message.objects.exists())
+
+    def test_resubmission_should_be_stored_once(self):
+        """the same content should only be stored once"""
+
+        self.post()
+        response = self.post(message="  I would like to BOOK a party ")
+        self.assertContains(response, "submitted successfully")
+        self.assertEqual(Message.objects.count(), 1)
+
+        # duplicates reaching the database are dropped by the writer
+        write_messages(
+            [
+                Message(
+                    name="x",
+                    email="test@mail.com",
+                    message="I would like to book a party",
+                )
+            ]
+        )
+        self.assertEqual(Message.objects.count(), 1)
+
+    def test_resubmission_after_a_day_should_be_stored(self):
+        """the same content sent again the next day should be stored"""
+
+        self.post()
+        Message.objects.update(created_on=timezone.now() - datetime.timedelta(days=2))
+        cache.clear()
+        response = self.post()
+        self.assertContains(response, "submitted successfully")
+        self.assertEqual(Message.objects.count(), 2)
+
+        # saving a message directly never conflicts with an older one
+        Message.objects.create(
+            name="x", email="test@mail.com", message="I would like to book a party"
+        )
+        self.assertEqual(Message.objects.count(), 3)
+
+    def test_submissions_should_be_rate_limited(self):
+        """more than the limit per IP or email should be refused"""
+
+        for number in range(3):
+            self.post(message=f"message {number}", email=f"user{number}@mail.com")
+        response = self.post(message="one more", email="other@mail.com")
+        self.assertContains(response, "Too many messages")
+        self.assertEqual(Message.objects.count(), 3)
+
+
+class MessageQueueTest(SimpleTestCase):
+    """The intake queue hands messages to its writer in batches"""
+
+    def test_messages_should_be_written_in_batches(self):
+        """a full batch should be written at once, the rest after the interval"""
+
+        batches = []
+        done = threading.Event()
+
+        def writer(batch):
+            batches.append(batch)
+            if sum(len(batch) for batch in batches) == 5:
+                done.set()
+
+        message_queue = MessageQueue(
+            writer, batch_size=3, flush_interval=0.1, maxsize=10
+        )
+        for number in range(5):
+            message_queue.put(number)
+        self.assertTrue(done.wait(2))
+        self.assertEqual(batches, [[0, 1, 2], [3, 4]])
+
+    def test_full_queue_should_refuse_messages(self):
+        """a writer falling behind should push back"""
+
+        message_queue = MessageQueue(list, batch_size=1, flush_interval=0, maxsize=1)
+        message_queue.start = lambda: None
+        message_queue.put(1)
+        with self.assertRaises(QueueFull):
+            message_queue.put(2)
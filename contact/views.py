@@ -1,29 +1,37 @@
-from django.shortcuts import render
+from django.shortcuts import render, reverse
 from django.http import HttpResponseRedirect
 from django.contrib import messages
 
-from .models import Message
 from reservation.models import RestaurantModel
+from . import intake
+from .forms import ContactForm
 
 
 def contact_us_view(request):
-    restaurant = RestaurantModel.objects.all()[0]
+    restaurant = RestaurantModel.current()
 
     if request.method == "POST":
-        name = request.POST.get("name", None)
-        email = request.POST.get("email", None)
-        phone = request.POST.get("phone", None)
-        message = request.POST.get("message", None)
-
-        contact = Message.objects.create(
-            name=name,
-            email=email,
-            phone=phone,
-            message=message,
+        form = ContactForm(request.POST)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                messages.error(request, errors[0])
+        elif intake.rate_limited(intake.client_ip(request), form.cleaned_data["email"]):
+            messages.error(request, "Too many messages sent, please try again later.")
+        else:
+            try:
+                # resubmissions are acknowledged but stored only once
+                intake.accept(form.save(commit=False))
+            except intake.QueueFull:
+                messages.error(
+                    request,
+                    "We are receiving a lot of messages, please try again later.",
+                )
+            else:
+                messages.success(
+                    request, "Your message has been submitted successfully."
+                )
+        return HttpResponseRedirect(
+            request.META.get("HTTP_REFERER") or reverse("contact_us")
         )
-        print(name, email, phone, message)
-        contact.save()
-        messages.success(request, "Your message has been submitted successfully.")
-        return HttpResponseRedirect(request.META.get("HTTP_REFERER"))
 
     return render(request, "pages/contact_us.html", {"restaurant": restaurant})
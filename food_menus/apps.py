@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FoodMenusConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'food_menus'
+
+    def ready(self):
+        import food_menus.signals
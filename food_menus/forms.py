@@ -5,7 +5,7 @@ from django.db import models
 from crispy_forms.helper import FormHelper
 
 from .models import MenuModel
-from .models import FOOD_ITEM_VALIDATOR
+from .models import FOOD_ITEM_MAX_LENGTH, FOOD_ITEM_VALIDATOR
 
 
 class MenuForm(forms.ModelForm):
@@ -24,6 +24,11 @@ class MenuForm(forms.ModelForm):
         food_items = self.cleaned_data.get("food_items")
         if food_items:
             food_items = food_items.lower()
+            for item in food_items.split(","):
+                if len(" ".join(item.split())) > FOOD_ITEM_MAX_LENGTH:
+                    raise forms.ValidationError(
+                        f"Food items can be at most {FOOD_ITEM_MAX_LENGTH} characters long."
+                    )
         return food_items
 
     def __init__(self, *args, **kwargs):
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_menus", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="menumodel",
+            name="updated_on",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:34
+
+from django.db import migrations, models
+import imaging.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_menus", "0002_menu_updated_on"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="menumodel",
+            name="menu_image_ready",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="menumodel",
+            name="menu_image",
+            field=imaging.fields.RenditionImageField(
+                quality=80,
+                ready_field="menu_image_ready",
+                size=[400, 500],
+                upload_to="menu_images/",
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:39
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def tag_existing_menus(apps, schema_editor):
+    """Split every menu's food items into tags and its display string."""
+
+    MenuModel = apps.get_model("food_menus", "MenuModel")
+    FoodItemTag = apps.get_model("food_menus", "FoodItemTag")
+    tags = {}
+    for menu in MenuModel.objects.iterator():
+        names = []
+        for item in (menu.food_items or "").lower().split(","):
+            # the tag name holds 60 characters
+            name = " ".join(item.split())[:60].rstrip()
+            if name and name not in names:
+                names.append(name)
+        for name in names:
+            if name not in tags:
+                tags[name], _ = FoodItemTag.objects.get_or_create(
+                    name=name, defaults={"slug": slugify(name)}
+                )
+        menu.food_items_display = ", ".join(names)
+        menu.save(update_fields=["food_items_display"])
+        menu.tags.set([tags[name] for name in names])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_menus", "0003_renditions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FoodItemTag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=60, unique=True)),
+                ("slug", models.SlugField(max_length=60, unique=True)),
+            ],
+            options={
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="menumodel",
+            name="food_items_display",
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name="menumodel",
+            name="tags",
+            field=models.ManyToManyField(
+                blank=True,
+                editable=False,
+                related_name="menus",
+                to="food_menus.FoodItemTag",
+            ),
+        ),
+        migrations.RunPython(tag_existing_menus, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:41
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def index_existing_menus(apps, schema_editor):
+    """Fill the search index, name words weigh 3 and food item words 1."""
+
+    MenuModel = apps.get_model("food_menus", "MenuModel")
+    MenuSearchToken = apps.get_model("food_menus", "MenuSearchToken")
+    entries = []
+    for menu in MenuModel.objects.iterator():
+        weights = {}
+        for token in re.findall(r"[a-z0-9]+", (menu.food_items or "").lower()):
+            weights[token[:60]] = 1
+        for token in {t[:60] for t in re.findall(r"[a-z0-9]+", menu.name.lower())}:
+            weights[token] = weights.get(token, 0) + 3
+        entries.extend(
+            MenuSearchToken(token=token, menu=menu, weight=weight)
+            for token, weight in weights.items()
+        )
+    MenuSearchToken.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_menus", "0004_food_item_tags"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MenuSearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=60)),
+                ("weight", models.PositiveSmallIntegerField(default=1)),
+                (
+                    "menu",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="food_menus.menumodel",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="menusearchtoken",
+            constraint=models.UniqueConstraint(
+                fields=("token", "menu"), name="unique_menu_search_token"
+            ),
+        ),
+        migrations.RunPython(index_existing_menus, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from imaging.fields import queue_pending_renditions
+
+
+def queue_menu_renditions(apps, schema_editor):
+    """Menu images uploaded before renditions existed were never processed."""
+
+    queue_pending_renditions(apps, "food_menus.MenuModel")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_menus", "0005_menu_search_index"),
+        ("tasks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(queue_menu_renditions, migrations.RunPython.noop),
+    ]
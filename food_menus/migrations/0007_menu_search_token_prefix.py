@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("food_menus", "0006_queue_menu_renditions"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="menusearchtoken",
+            index=models.Index(
+                fields=["token"],
+                name="menu_search_token_prefix",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
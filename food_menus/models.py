@@ -1,9 +1,13 @@
 import uuid
 from django.db import models
+from django.db.models import Count
 from django.shortcuts import reverse
 from django.core.validators import RegexValidator
+from django.utils import timezone
+from django.utils.text import slugify
 
-from django_resized import ResizedImageField
+from RestaurantBookingApp import cache
+from imaging.fields import RenditionImageField
 
 
 FOOD_ITEM_VALIDATOR = RegexValidator(
@@ -11,21 +15,80 @@ FOOD_ITEM_VALIDATOR = RegexValidator(
     "Enter comma separated items. (use space to seperate two-word items)",
 )
 
+# the length of a FoodItemTag name
+FOOD_ITEM_MAX_LENGTH = 60
+
+MENU_CACHE_NAMESPACE = "food_menus"
+MENU_STATE_CACHE_KEY = "state:{}"
+TAG_FACETS_CACHE_KEY = "facets"
+
+
+def parse_food_items(food_items):
+    """Distinct food item names of a comma separated string, in order
+    - Names are cut to FOOD_ITEM_MAX_LENGTH characters, MenuForm rejects
+      longer ones but menus saved otherwise may have them
+    """
+
+    names = []
+    for item in (food_items or "").lower().split(","):
+        name = " ".join(item.split())[:FOOD_ITEM_MAX_LENGTH].rstrip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class FoodItemTag(models.Model):
+    """A food item shared by every menu that contains it"""
+
+    name = models.CharField(max_length=FOOD_ITEM_MAX_LENGTH, unique=True)
+    slug = models.SlugField(max_length=FOOD_ITEM_MAX_LENGTH, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def facets(cls):
+        """Food items with the number of menus containing them, most common
+        first, cached until the next menu change.
+
+        Returns:
+            _type_: list of {"name", "slug", "menu_count"} dicts
+        """
+
+        return cache.get_or_set(
+            MENU_CACHE_NAMESPACE,
+            TAG_FACETS_CACHE_KEY,
+            lambda: list(
+                cls.objects.annotate(menu_count=Count("menus"))
+                .filter(menu_count__gt=0)
+                .order_by("-menu_count", "name")
+                .values("name", "slug", "menu_count")
+            ),
+            None,
+        )
+
 
 class MenuModel(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    menu_image = ResizedImageField(
+    menu_image = RenditionImageField(
         size=[400, 500],
+        ready_field="menu_image_ready",
         upload_to="menu_images/",
-        crop=["middle", "center"],
         quality=80,
-        keep_meta=False,
-        force_format="JPEG",
     )
+    menu_image_ready = models.BooleanField(default=False, editable=False)
     name = models.CharField(max_length=120)
     food_items = models.CharField(max_length=300, validators=[FOOD_ITEM_VALIDATOR])
+    food_items_display = models.CharField(max_length=300, editable=False, blank=True)
+    tags = models.ManyToManyField(
+        FoodItemTag, related_name="menus", blank=True, editable=False
+    )
     price = models.IntegerField(verbose_name="Price")
     created_on = models.DateTimeField(auto_now_add=True)
+    updated_on = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_on"]
@@ -33,13 +96,58 @@ class MenuModel(models.Model):
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def cache_version():
+        """Version of the menu cache namespace, bumped on every menu change"""
+
+        return cache.get_version(MENU_CACHE_NAMESPACE)
+
+    @staticmethod
+    def invalidate_cache():
+        cache.invalidate(MENU_CACHE_NAMESPACE)
+
+    @classmethod
+    def list_state(cls, tag=None):
+        """Number of menus and a time after their latest change, cached until
+        the next menu is saved or deleted.
+        - With a tag slug, only menus containing that food item are counted
+        - last_modified is when the state was computed: a deleted menu leaves
+          no updated_on behind, but every change drops the cached state
+
+        Returns:
+            _type_: dict of {"count": int, "last_modified": datetime}
+        """
+
+        def load():
+            menus = cls.objects.order_by()
+            if tag:
+                menus = menus.filter(tags__slug=tag)
+            return {"count": menus.count(), "last_modified": timezone.now()}
+
+        return cache.get_or_set(
+            MENU_CACHE_NAMESPACE, MENU_STATE_CACHE_KEY.format(tag or ""), load, None
+        )
+
     def save(self, *args, **kwargs):
         if self.food_items:
             self.food_items = self.food_items.lower()
+        self.food_items_display = ", ".join(parse_food_items(self.food_items))
         super(MenuModel, self).save(*args, **kwargs)
+        self.sync_tags()
+
+    def sync_tags(self):
+        """Link the menu to a tag for each of its food items"""
+
+        names = parse_food_items(self.food_items)
+        FoodItemTag.objects.bulk_create(
+            [FoodItemTag(name=name, slug=slugify(name)) for name in names],
+            ignore_conflicts=True,
+        )
+        self.tags.set(FoodItemTag.objects.filter(name__in=names))
 
-    # delete menu image too when menu is deleted
+    # delete menu image and its renditions too when menu is deleted
     def delete(self, *args, **kwargs):
+        self.menu_image.delete_renditions()
         self.menu_image.delete()
         super(MenuModel, self).delete(*args, **kwargs)
 
@@ -48,12 +156,44 @@ class MenuModel(models.Model):
 
     @property
     def get_comma_seperated_food_items(self):
-        return ", ".join([item.strip() for item in self.food_items.split(",")])
+        return self.food_items_display
 
     @property
     def get_menu_image_url(self):
-        return self.menu_image.url
+        return self.menu_image.card_url
 
     @property
     def get_price_in_dollars(self):
         return f"${self.price}"
+
+
+class MenuSearchToken(models.Model):
+    """Inverted index entry: a word found in a menu's name or food items
+    - weight ranks name words above food item words
+    - Rebuilt for a menu whenever it is saved, see food_menus/search.py
+    """
+
+    token = models.CharField(max_length=60)
+    menu = models.ForeignKey(
+        MenuModel, on_delete=models.CASCADE, related_name="search_tokens"
+    )
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["token", "menu"], name="unique_menu_search_token"
+            ),
+        ]
+        indexes = [
+            # lets PostgreSQL answer prefix lookups (LIKE 'pas%') from the
+            # index under any collation, other databases ignore opclasses
+            models.Index(
+                fields=["token"],
+                name="menu_search_token_prefix",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+
+    def __str__(self):
+        return self.token
@@ -0,0 +1,133 @@
+"""Menu search backed by the MenuSearchToken inverted index.
+
+Every word of a menu's name and food items is stored once per menu with
+a weight. A query is split into the same words and each word is looked up
+as a prefix (``token LIKE 'pas%'``), which PostgreSQL answers from the
+``varchar_pattern_ops`` token index whatever the database collation, unlike
+``icontains``. Menus must match every query word. They are ranked
+in the same query by the summed weight of their matching tokens, and
+whole-word matches count double.
+"""
+import hashlib
+import re
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Sum, When
+
+from RestaurantBookingApp import cache
+
+from .models import MENU_CACHE_NAMESPACE, MenuModel, MenuSearchToken
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+NAME_WEIGHT = 3
+FOOD_ITEM_WEIGHT = 1
+MAX_QUERY_TERMS = 5
+SEARCH_CACHE_KEY = "search:{}:{}"
+SEARCH_CACHE_TIMEOUT = 60 * 10
+
+
+def tokenize(text):
+    """Distinct lower-case words of ``text``, in order"""
+
+    tokens = []
+    for token in TOKEN_PATTERN.findall((text or "").lower()):
+        token = token[:60]
+        if token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def menu_tokens(menu):
+    """Tokens of a menu with their weight
+
+    Returns:
+        _type_: dict of {token: weight}
+    """
+
+    weights = {}
+    for token in tokenize(menu.food_items):
+        weights[token] = FOOD_ITEM_WEIGHT
+    for token in tokenize(menu.name):
+        weights[token] = weights.get(token, 0) + NAME_WEIGHT
+    return weights
+
+
+def index_menu(menu):
+    """Replace the menu's entries in the inverted index"""
+
+    with transaction.atomic():
+        MenuSearchToken.objects.filter(menu=menu).delete()
+        MenuSearchToken.objects.bulk_create(
+            [
+                MenuSearchToken(token=token, menu=menu, weight=weight)
+                for token, weight in menu_tokens(menu).items()
+            ]
+        )
+
+
+def _prefix_filter(term):
+    return Q(token__startswith=term)
+
+
+def rank(query, limit=20):
+    """Ids of the menus matching every word of ``query``, best first
+
+    Returns:
+        _type_: list of (menu id, score)
+    """
+
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+
+    condition = Q()
+    matches = {}
+    for position, term in enumerate(terms):
+        condition |= _prefix_filter(term)
+        matches[f"matches_{position}"] = Max(
+            Case(When(_prefix_filter(term), then=1), default=0)
+        )
+    # whole-word matches count double
+    score = Sum(
+        F("weight")
+        * Case(When(token__in=terms, then=2), default=1, output_field=IntegerField())
+    )
+    ranked = (
+        MenuSearchToken.objects.filter(condition)
+        .values("menu_id")
+        .annotate(score=score, **matches)
+        .filter(**{name: 1 for name in matches})
+        .order_by("-score", "menu_id")
+        .values_list("menu_id", "score")
+    )
+    return list(ranked[:limit])
+
+
+def search(query, limit=20):
+    """Menus matching ``query`` serialized for the search endpoint, cached
+    until the next menu change.
+
+    Returns:
+        _type_: list of result dicts, best match first
+    """
+
+    def load():
+        ranked = rank(query, limit)
+        menus = MenuModel.objects.in_bulk([menu_id for menu_id, _ in ranked])
+        return [
+            {
+                "id": str(menu_id),
+                "name": menus[menu_id].name,
+                "price": menus[menu_id].get_price_in_dollars,
+                "food_items": menus[menu_id].get_comma_seperated_food_items,
+                "image": menus[menu_id].menu_image.thumb_url,
+                "score": score,
+            }
+            for menu_id, score in ranked
+            if menu_id in menus
+        ]
+
+    terms = " ".join(tokenize(query)[:MAX_QUERY_TERMS])
+    key = SEARCH_CACHE_KEY.format(hashlib.md5(terms.encode()).hexdigest(), limit)
+    return cache.get_or_set(MENU_CACHE_NAMESPACE, key, load, SEARCH_CACHE_TIMEOUT)
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from imaging.signals import renditions_ready
+from .models import MenuModel
+from .search import index_menu
+
+
+@receiver(post_save, sender=MenuModel)
+@receiver(post_delete, sender=MenuModel)
+@receiver(renditions_ready, sender=MenuModel)
+def invalidate_menu_cache(sender, instance, **kwargs):
+    MenuModel.invalidate_cache()
+
+
+@receiver(m2m_changed, sender=MenuModel.tags.through)
+def invalidate_menu_tags(sender, action, **kwargs):
+    if action.startswith("post_"):
+        MenuModel.invalidate_cache()
+
+
+@receiver(post_save, sender=MenuModel)
+def index_menu_for_search(sender, instance, **kwargs):
+    index_menu(instance)
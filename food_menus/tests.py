@@ -1,9 +1,15 @@
+import datetime
+from unittest import mock
+
 from django.test import TestCase
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
 
-from .models import MenuModel
+from .models import FoodItemTag, MenuModel, MenuSearchToken
 from .forms import MenuForm
+from .views import MENUS_PER_PAGE
+from .search import rank, tokenize
 
 
 class MenuModelTest(TestCase):
@@ -97,6 +103,15 @@ class MenuModelFormTest(TestCase):
         form = MenuForm()
         self.assertEqual(len(form.fields["food_items"].validators), 3)
 
+    def test_menu_model_form_should_reject_long_food_items(self):
+        """food items should fit in a tag name"""
+
+        form = MenuForm(
+            data={"name": "menu", "price": 10, "food_items": f"pizza, {'a' * 61}"}
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("food_items", form.errors)
+
     def test_menu_model_form_should_have_clean_food_items_method(self):
         """menu model form should have save method"""
 
@@ -202,3 +217,221 @@ class FoodMenuUrlsTest(TestCase):
         )
 
         self.assertEqual(reverse("admin_menu_list"), "/food-menu/admin/")
+
+
+class MenuListCachingTest(TestCase):
+    """Public menu list is paginated, cached and conditionally served"""
+
+    def setUp(self):
+        for number in range(MENUS_PER_PAGE + 1):
+            MenuModel.objects.create(
+                name=f"menu{number}",
+                food_items="item_a, item_b",
+                price=number,
+                menu_image="menu_images/menu.jpg",
+            )
+        self.url = reverse("menu_list")
+
+    def test_menu_list_is_paginated(self):
+        """menu list should show one page of menus at a time"""
+
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context["menus"]), MENUS_PER_PAGE)
+        self.assertTrue(response.context["is_paginated"])
+
+        response = self.client.get(self.url, {"page": 2})
+        self.assertEqual(len(response.context["menus"]), 1)
+
+    def test_repeat_visit_is_not_modified(self):
+        """a matching ETag should be answered with 304"""
+
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_menus(self):
+        """saving or deleting a menu should change the ETag"""
+
+        etag = self.client.get(self.url)["ETag"]
+        menu = MenuModel.objects.first()
+        menu.price = 100
+        menu.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        menu.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_deleted_menu_should_change_last_modified(self):
+        """deleting any menu should answer If-Modified-Since with the list"""
+
+        now = timezone.now()
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            last_modified = self.client.get(self.url)["Last-Modified"]
+        # the oldest menu, Max(updated_on) stays the same without it
+        MenuModel.objects.order_by("updated_on").first().delete()
+        later = now + datetime.timedelta(minutes=1)
+        with mock.patch("django.utils.timezone.now", return_value=later):
+            response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_page_makes_no_queries(self):
+        """the menu cards should be rendered from the fragment cache"""
+
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, "menu12")
+
+    def test_saved_menu_is_shown_right_away(self):
+        """the fragment cache should be dropped when a menu is saved"""
+
+        self.client.get(self.url)
+        menu = MenuModel.objects.get(name="menu12")
+        menu.name = "renamed menu"
+        menu.save()
+        self.assertContains(self.client.get(self.url), "renamed menu")
+
+    def test_signed_in_users_have_no_etag(self):
+        """signed in users should always get a fresh page"""
+
+        user = User.objects.create_user(username="customer")
+        self.client.force_login(user)
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header("ETag"))
+
+
+class FoodItemTagTest(TestCase):
+    """Food items are normalized into tags used to filter the menu list"""
+
+    def setUp(self):
+        self.pasta = MenuModel.objects.create(
+            name="pasta menu", food_items="Pasta,  salad, garlic  bread", price=10
+        )
+        self.pizza = MenuModel.objects.create(
+            name="pizza menu", food_items="pizza, salad", price=12
+        )
+
+    def test_food_items_should_be_tagged(self):
+        """every food item should become a shared tag"""
+
+        self.assertEqual(
+            sorted(self.pasta.tags.values_list("name", flat=True)),
+            ["garlic bread", "pasta", "salad"],
+        )
+        self.assertEqual(FoodItemTag.objects.get(name="salad").menus.count(), 2)
+        self.assertEqual(
+            FoodItemTag.objects.get(name="garlic bread").slug, "garlic-bread"
+        )
+
+    def test_display_string_should_be_precomputed(self):
+        """the display string should be stored with the menu"""
+
+        menu = MenuModel.objects.get(pk=self.pasta.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                menu.get_comma_seperated_food_items, "pasta, salad, garlic bread"
+            )
+
+    def test_changed_food_items_should_update_tags(self):
+        """removed food items should be untagged"""
+
+        self.pizza.food_items = "pizza"
+        self.pizza.save()
+        self.assertEqual(
+            list(self.pizza.tags.values_list("name", flat=True)), ["pizza"]
+        )
+        facets = {facet["slug"]: facet["menu_count"] for facet in FoodItemTag.facets()}
+        self.assertEqual(
+            facets, {"garlic-bread": 1, "pasta": 1, "pizza": 1, "salad": 1}
+        )
+
+    def test_long_food_items_should_fit_tags(self):
+        """food items longer than a tag name should be cut to fit it"""
+
+        menu = MenuModel.objects.create(
+            name="long menu", food_items=f"{'a' * 70}, {'b' * 59} c", price=10
+        )
+        self.assertEqual(
+            sorted(menu.tags.values_list("name", flat=True)), ["a" * 60, "b" * 59]
+        )
+
+    def test_menu_list_should_filter_by_tag(self):
+        """?tag= should only list menus containing that food item"""
+
+        response = self.client.get(reverse("menu_list"), {"tag": "pizza"})
+        self.assertEqual(list(response.context["menus"]), [self.pizza])
+        self.assertEqual(response.context["paginator"].count, 1)
+
+        response = self.client.get(reverse("menu_list"), {"tag": "salad"})
+        self.assertEqual(len(response.context["menus"]), 2)
+        self.assertContains(response, "salad (2)")
+
+
+class MenuSearchTest(TestCase):
+    """Menu search is answered from the inverted index"""
+
+    def setUp(self):
+        self.burger = MenuModel.objects.create(
+            name="Chicken Burger", food_items="burger, chips, cola", price=10
+        )
+        self.salad = MenuModel.objects.create(
+            name="Garden Salad", food_items="salad, chicken, olives", price=8
+        )
+        self.pasta = MenuModel.objects.create(
+            name="Pasta Night", food_items="pasta, garlic bread", price=12
+        )
+
+    def test_tokenize(self):
+        """queries should be split into distinct lower-case words"""
+
+        self.assertEqual(tokenize("Chicken, chicken BURGER!"), ["chicken", "burger"])
+
+    def test_menus_should_be_indexed_on_save(self):
+        """saving a menu should replace its index entries"""
+
+        self.pasta.food_items = "lasagne"
+        self.pasta.save()
+        tokens = set(self.pasta.search_tokens.values_list("token", flat=True))
+        self.assertEqual(tokens, {"pasta", "night", "lasagne"})
+
+        self.pasta.delete()
+        self.assertFalse(MenuSearchToken.objects.filter(token="lasagne").exists())
+
+    def test_name_matches_should_rank_first(self):
+        """a word in the menu name should outrank a food item"""
+
+        ranked = [menu_id for menu_id, _ in rank("chicken")]
+        self.assertEqual(ranked, [self.burger.id, self.salad.id])
+
+    def test_prefixes_should_match_every_word(self):
+        """every query word should match a token prefix"""
+
+        self.assertEqual([menu_id for menu_id, _ in rank("chick bur")], [self.burger.id])
+        self.assertEqual(rank("chick pasta"), [])
+        self.assertEqual([menu_id for menu_id, _ in rank("garl")], [self.pasta.id])
+
+    def test_prefixes_ending_in_z_or_9_should_match(self):
+        """prefixes ending in the last letter or digit should match too"""
+
+        pizza = MenuModel.objects.create(
+            name="Pizza 99", food_items="pizza, salad", price=9
+        )
+        self.assertEqual([menu_id for menu_id, _ in rank("pizz")], [pizza.id])
+        self.assertEqual([menu_id for menu_id, _ in rank("9")], [pizza.id])
+
+    def test_search_view_should_return_json(self):
+        """the search endpoint should return ranked menus"""
+
+        url = reverse("menu_search")
+        response = self.client.get(url, {"q": "Chicken"})
+        names = [result["name"] for result in response.json()["results"]]
+        self.assertEqual(names, ["Chicken Burger", "Garden Salad"])
+
+        with self.assertNumQueries(0):
+            self.client.get(url, {"q": "chicken"})
+        self.assertEqual(self.client.get(url).json()["results"], [])
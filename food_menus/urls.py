@@ -6,10 +6,12 @@ from .views import (
     update_menu_view,
     delete_menu_view,
     MenuListView,
+    menu_search_view,
 )
 
 urlpatterns = [
     path("all/", MenuListView.as_view(), name="menu_list"),
+    path("search/", menu_search_view, name="menu_search"),
     path("admin/", radmin_foodmenu_view, name="admin_menu_list"),
     path("create/", add_food_item_view, name="menu_create"),
     path("<str:menu_id>/update/", update_menu_view, name="menu_update"),
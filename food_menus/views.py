@@ -1,24 +1,98 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, JsonResponse
 from django.contrib import messages
 from django.views.generic import ListView
+from django.views.decorators.http import condition
+from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required, user_passes_test
 
 from reservation.views import is_radmin_check
-from .models import MenuModel
+from .models import FoodItemTag, MenuModel
 from .forms import MenuForm
+from .search import search
 
 
+MENUS_PER_PAGE = 12
+MENU_FRAGMENT_TIMEOUT = 60 * 60 * 24
+SEARCH_RESULTS_LIMIT = 20
+
+
+def menu_list_etag(request, *args, **kwargs):
+    """ETag of a menu list page for anonymous visitors
+    - Signed-in users get a personalised header, they are always rendered
+    """
+
+    if request.user.is_authenticated:
+        return None
+    tag = request.GET.get("tag", "")
+    return "menus-{}-{}-{}-{}".format(
+        MenuModel.list_state(tag)["count"],
+        MenuModel.list_state()["last_modified"].timestamp(),
+        tag,
+        request.GET.get("page", "1"),
+    )
+
+
+def menu_list_last_modified(request, *args, **kwargs):
+    if request.user.is_authenticated:
+        return None
+    return MenuModel.list_state()["last_modified"]
+
+
+@method_decorator(
+    condition(etag_func=menu_list_etag, last_modified_func=menu_list_last_modified),
+    name="dispatch",
+)
 class MenuListView(ListView):
     """Index page food menus
 
     - List all food menus
     - Show menu price
     - Customer can view food menu
+    - Filter by food item with ?tag=<slug>, each food item is listed with
+      the number of menus containing it
+    - Paginated, the rendered menu cards are cached per page until a menu
+      is saved or deleted
+    - Repeat anonymous visits are answered with 304 Not Modified
     """
+
     model = MenuModel
     context_object_name = "menus"
     template_name = "food_menus/menu_list.html"
+    paginate_by = MENUS_PER_PAGE
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        self.tag = self.request.GET.get("tag") or None
+        if self.tag:
+            queryset = queryset.filter(tags__slug=self.tag)
+        return queryset
+
+    def get_paginator(self, *args, **kwargs):
+        paginator = super().get_paginator(*args, **kwargs)
+        # the menu count is kept with the cached list state, skip COUNT(*)
+        paginator.count = MenuModel.list_state(self.tag)["count"]
+        return paginator
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["tag"] = self.tag
+        context["facets"] = FoodItemTag.facets()
+        context["menu_cache_version"] = MenuModel.cache_version()
+        context["menu_fragment_timeout"] = MENU_FRAGMENT_TIMEOUT
+        return context
+
+
+def menu_search_view(request):
+    """Search menus by dish or food item
+
+    - ?q= words are matched as prefixes, "chick bur" finds "chicken burger"
+    - Returns JSON results ranked by relevance
+    """
+
+    query = request.GET.get("q", "").strip()
+    results = search(query, SEARCH_RESULTS_LIMIT) if query else []
+    return JsonResponse({"query": query, "results": results})
 
 
 # ===============================
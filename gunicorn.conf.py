@@ -0,0 +1,15 @@
+"""Gunicorn settings, read by gunicorn from the working directory."""
+import glob
+import os
+
+# the workers share their request metrics through files, see metrics/registry.py
+METRICS_DIR = os.environ.setdefault(
+    "METRICS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics_data"),
+)
+
+
+def on_starting(server):
+    # counters start from zero with the server, like a single process would
+    for path in glob.glob(os.path.join(METRICS_DIR, "metrics-*.json")):
+        os.remove(path)
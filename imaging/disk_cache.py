@@ -0,0 +1,133 @@
+"""Bounded disk cache for on-the-fly image renditions.
+
+Entries are files named after a hash of the source file, its modification
+time and the requested size and format, so a re-uploaded source never
+serves stale renditions. Reading an entry touches its modification time
+and, once the cache grows past its size limit, the least recently used
+entries are removed until it is back under 90% of the limit.
+
+Walking the directory costs as much as the cache is large, so a process
+does it only when the size it last saw plus what it wrote since passes the
+limit, or once it wrote EVICT_EVERY of the limit itself, which catches what
+other processes wrote. The cache may go over its limit by that much per
+process in between.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+
+
+EVICT_EVERY = 0.1
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+class RenditionCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # bytes found by the last walk of the directory, None before it
+        self.scanned = None
+        # bytes this process wrote since
+        self.written = 0
+
+    @classmethod
+    def from_settings(cls):
+        """The cache of this process, kept between requests so its running
+        size is too"""
+
+        directory = str(
+            getattr(
+                settings,
+                "IMAGING_CACHE_DIR",
+                os.path.join(settings.BASE_DIR, "media_cache"),
+            )
+        )
+        max_bytes = getattr(settings, "IMAGING_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+        with _instances_lock:
+            if (directory, max_bytes) not in _instances:
+                _instances[(directory, max_bytes)] = cls(directory, max_bytes)
+            return _instances[(directory, max_bytes)]
+
+    @staticmethod
+    def key(source_path, width, height, fmt):
+        """Cache key of a rendition, also used as its strong ETag"""
+
+        stat = os.stat(source_path)
+        value = (
+            f"{source_path}:{stat.st_mtime_ns}:{stat.st_size}:{width}x{height}:{fmt}"
+        )
+        return hashlib.sha256(value.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """The cached entry opened for reading, or None when it is missing
+        - An open file can still be read once another process evicts it
+        """
+
+        path = self.path(key)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return file
+
+    def set(self, key, content):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write aside and rename so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as file:
+            file.write(content)
+        os.replace(temp_path, path)
+        with self.lock:
+            self.written += len(content)
+            due = (
+                self.scanned is None
+                or self.scanned + self.written > self.max_bytes
+                or self.written >= self.max_bytes * EVICT_EVERY
+            )
+        if due:
+            self.evict()
+
+    def entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def evict(self):
+        """Remove least recently used entries while over the size limit"""
+
+        with self.lock:
+            self.written = 0
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * 0.9
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+        with self.lock:
+            self.scanned = total
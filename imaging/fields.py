@@ -0,0 +1,244 @@
+import hashlib
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models
+from django.db.models.fields.files import ImageFieldFile
+from django.db.models.signals import post_init, pre_save, post_save
+from django.templatetags.static import static
+from django.utils import timezone
+
+from tasks.queue import task
+from .renditions import (
+    PLACEHOLDER,
+    RENDITIONS,
+    open_image,
+    render,
+    rendition_name,
+)
+from .signals import renditions_ready
+
+
+class RenditionFieldFile(ImageFieldFile):
+    """Image file with URLs for its renditions
+    - Renditions are served once processing is done, a placeholder before
+    - The field's default image has no renditions, it is served as is
+    """
+
+    def save(self, name, content, save=True):
+        # name uploads after their content so they can be cached forever,
+        # see imaging.serving
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        name = digest.hexdigest()[:16] + os.path.splitext(name)[1].lower()
+        super().save(name, content, save)
+
+    @property
+    def is_default(self):
+        return self.name == self.field.default
+
+    @property
+    def ready(self):
+        return getattr(self.instance, self.field.ready_field)
+
+    def rendition_url(self, name):
+        if self.is_default:
+            return self.url
+        if not self.ready:
+            return static(PLACEHOLDER)
+        rendition = next(r for r in RENDITIONS if r.name == name)
+        return self.storage.url(rendition_name(self.name, rendition))
+
+    @property
+    def thumb_url(self):
+        return self.rendition_url("thumb")
+
+    @property
+    def card_url(self):
+        return self.rendition_url("card")
+
+    @property
+    def retina_url(self):
+        return self.rendition_url("retina")
+
+    @property
+    def srcset(self):
+        return "{} 1x, {} 2x".format(self.card_url, self.retina_url)
+
+    @property
+    def webp_srcset(self):
+        return "{} 1x, {} 2x".format(
+            self.rendition_url("webp"), self.rendition_url("webp_retina")
+        )
+
+    def delete_renditions(self):
+        if self and not self.is_default:
+            delete_renditions(self.name, self.storage)
+
+
+class RenditionImageField(models.ImageField):
+    """Image stored as uploaded and resized in the background
+
+    - size is the (width, height) of the "card" rendition, the other
+      renditions are scaled from it
+    - ready_field names the model's BooleanField set once the renditions
+      are stored
+    """
+
+    attr_class = RenditionFieldFile
+
+    def __init__(self, *args, size=(400, 400), ready_field=None, quality=80, **kwargs):
+        self.size = tuple(size)
+        self.ready_field = ready_field
+        self.quality = quality
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs.update(
+            size=list(self.size), ready_field=self.ready_field, quality=self.quality
+        )
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        if not cls._meta.abstract:
+            uid = f"{cls._meta.label}.{name}"
+            post_init.connect(
+                self.remember_name, sender=cls, weak=False, dispatch_uid=uid
+            )
+            pre_save.connect(
+                self.reset_renditions, sender=cls, weak=False, dispatch_uid=uid
+            )
+            post_save.connect(
+                self.schedule_renditions, sender=cls, weak=False, dispatch_uid=uid
+            )
+
+    def _saved_names(self, instance):
+        return instance.__dict__.setdefault("_rendition_sources", {})
+
+    def remember_name(self, instance, **kwargs):
+        value = instance.__dict__.get(self.attname)
+        self._saved_names(instance)[self.attname] = getattr(value, "name", value)
+
+    def reset_renditions(self, instance, **kwargs):
+        # a new upload needs new renditions, the old ones can go
+        previous = self._saved_names(instance).get(self.attname)
+        current = getattr(instance, self.attname)
+        if not current._committed or current.name != previous:
+            setattr(instance, self.ready_field, False)
+            if not instance._state.adding and previous and previous != self.default:
+                delete_rendition_files.enqueue(
+                    instance._meta.label, self.attname, previous
+                )
+
+    def schedule_renditions(self, instance, **kwargs):
+        fieldfile = getattr(instance, self.attname)
+        self._saved_names(instance)[self.attname] = fieldfile.name
+        if fieldfile and not fieldfile.is_default and not fieldfile.ready:
+            process_renditions.enqueue(
+                instance._meta.label,
+                instance.pk,
+                self.attname,
+                fieldfile.name,
+            )
+
+
+def delete_renditions(name, storage):
+    for rendition in RENDITIONS:
+        storage.delete(rendition_name(name, rendition))
+
+
+def pending_renditions(model, field):
+    """Uploads of ``field`` whose renditions are not stored yet
+
+    Returns:
+        _type_: queryset of (pk, name)
+    """
+
+    pending = (
+        model.objects.filter(**{field.ready_field: False})
+        .exclude(**{field.attname: ""})
+        .exclude(**{f"{field.attname}__isnull": True})
+        .values_list("pk", field.attname)
+    )
+    if field.has_default():
+        pending = pending.exclude(**{field.attname: field.default})
+    return pending
+
+
+def queue_pending_renditions(apps, *model_labels):
+    """Queue process_renditions for the pending uploads of ``model_labels``,
+    from a data migration given its ``apps``
+    - Tasks are inserted as rows of the migration's Task model, the field
+      code may have changed since
+    - Nothing is queued with TASKS_EAGER, no worker would run the tasks: run
+      ``manage.py process_renditions`` instead
+    """
+
+    if getattr(settings, "TASKS_EAGER", False):
+        return
+    Task = apps.get_model("tasks", "Task")
+    now = timezone.now()
+    tasks = []
+    for label in model_labels:
+        model = apps.get_model(label)
+        for field in model._meta.fields:
+            if not isinstance(field, RenditionImageField):
+                continue
+            for pk, name in pending_renditions(model, field).iterator():
+                tasks.append(
+                    Task(
+                        name=process_renditions.name,
+                        args=[label, pk, field.attname, name],
+                        run_at=now,
+                        max_attempts=process_renditions.max_attempts,
+                    )
+                )
+    Task.objects.bulk_create(tasks, batch_size=500)
+
+
+@task
+def delete_rendition_files(model_label, field_name, name):
+    """Delete the renditions of a replaced upload"""
+
+    field = apps.get_model(model_label)._meta.get_field(field_name)
+    delete_renditions(name, field.storage)
+
+
+@task
+def process_renditions(model_label, pk, field_name, name):
+    """Store every rendition of the image uploaded as ``name``
+    - Skipped when the instance is gone or got another upload meanwhile
+    - Marks the instance ready and sends renditions_ready once stored
+    """
+
+    model = apps.get_model(model_label)
+    field = model._meta.get_field(field_name)
+    instance = model.objects.filter(pk=pk, **{field_name: name}).first()
+    if instance is None:
+        return
+
+    fieldfile = getattr(instance, field_name)
+    with fieldfile.open("rb"):
+        image = open_image(fieldfile)
+    for rendition in RENDITIONS:
+        target = rendition_name(name, rendition)
+        fieldfile.storage.delete(target)
+        fieldfile.storage.save(
+            target, ContentFile(render(image, field.size, rendition, field.quality))
+        )
+
+    changes = {field.ready_field: True}
+    now = timezone.now()
+    for model_field in model._meta.concrete_fields:
+        if getattr(model_field, "auto_now", False):
+            changes[model_field.attname] = now
+    updated = model.objects.filter(pk=pk, **{field_name: name}).update(**changes)
+    if updated:
+        for attname, value in changes.items():
+            setattr(instance, attname, value)
+        renditions_ready.send(sender=model, instance=instance, field_name=field_name)
@@ -0,0 +1,23 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from imaging.fields import RenditionImageField, pending_renditions, process_renditions
+
+
+class Command(BaseCommand):
+    help = "Generate the missing renditions of every uploaded image"
+
+    def handle(self, *args, **options):
+        processed = 0
+        for model in apps.get_models():
+            for field in model._meta.fields:
+                if not isinstance(field, RenditionImageField):
+                    continue
+                for pk, name in pending_renditions(model, field).iterator():
+                    try:
+                        process_renditions(model._meta.label, pk, field.attname, name)
+                    except Exception as error:
+                        self.stderr.write(f"{name}: {error}")
+                    else:
+                        processed += 1
+        self.stdout.write(f"Processed {processed} image(s)")
@@ -0,0 +1,78 @@
+"""Renditions generated for every uploaded image.
+
+Uploads are stored as they arrive. Once the upload's transaction commits,
+a background task (``manage.py run_worker``) crops the original to each rendition's size and
+stores the result next to it under ``renditions/``. Until that is done
+templates are given a placeholder.
+"""
+
+import os
+from collections import namedtuple
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+Rendition = namedtuple("Rendition", ["name", "scale", "format"])
+
+RENDITIONS = (
+    Rendition("thumb", 0.25, "JPEG"),
+    Rendition("card", 1, "JPEG"),
+    Rendition("retina", 2, "JPEG"),
+    Rendition("webp", 1, "WEBP"),
+    Rendition("webp_retina", 2, "WEBP"),
+)
+
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+PLACEHOLDER = "img/placeholder.svg"
+
+
+def rendition_size(size, rendition):
+    width, height = size
+    return round(width * rendition.scale), round(height * rendition.scale)
+
+
+def rendition_name(name, rendition):
+    """Storage name of a rendition of the file stored as ``name``
+
+    Returns:
+        _type_: "renditions/<name without extension>/<rendition>.<ext>"
+    """
+
+    stem, _ = os.path.splitext(name)
+    return f"renditions/{stem}/{rendition.name}.{EXTENSIONS[rendition.format]}"
+
+
+def render(image, size, rendition, quality):
+    """Crop ``image`` around its center to the rendition's size
+
+    Returns:
+        _type_: encoded image bytes
+    """
+
+    output = BytesIO()
+    ImageOps.fit(image, rendition_size(size, rendition), Image.LANCZOS).save(
+        output, format=rendition.format, quality=quality
+    )
+    return output.getvalue()
+
+
+def open_image(file):
+    """Decode an uploaded file, upright and without alpha channel"""
+
+    image = ImageOps.exif_transpose(Image.open(file))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return image
+
+
+def resize(image, width=None, height=None):
+    """Resized copy of ``image`` for an on-the-fly rendition
+    - With both sides, crop around the center to exactly that size
+    - With one side, keep the aspect ratio and never upscale
+    """
+
+    if width and height:
+        return ImageOps.fit(image, (width, height), Image.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((width or image.width, height or image.height), Image.LANCZOS)
+    return resized
@@ -0,0 +1,165 @@
+"""Serving uploaded files in production.
+
+Files are answered with ETag and Last-Modified validators and single
+byte ranges. Content-hashed names (see RenditionFieldFile.save) never
+change content, so they may be cached forever. Other files are cached for
+MEDIA_MAX_AGE seconds.
+
+Behind nginx or Apache set MEDIA_ACCEL_REDIRECT (an internal location
+mapped to MEDIA_ROOT) or MEDIA_SENDFILE_HEADER ("X-Sendfile"). Django then
+only checks the request and sets the headers, and the web server sends the
+bytes.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# storage adds a random "_abcdefg" suffix when the same content is uploaded twice
+CONTENT_HASH = re.compile(r"^[0-9a-f]{16}(_[0-9A-Za-z]{7})?$")
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def is_content_hashed(path):
+    """True when a directory or the name of ``path`` is a content hash"""
+
+    return any(
+        CONTENT_HASH.match(os.path.splitext(part)[0]) for part in path.split("/")
+    )
+
+
+def parse_range(header, size):
+    """Byte range requested by a Range header
+
+    - Only single ranges are honoured, anything else is answered in full
+    - A range starting past the end of the file can not be satisfied
+
+    Returns:
+        _type_: (start, end) inclusive, None to send the whole file or
+        False when the range can not be satisfied
+    """
+
+    match = RANGE.match(header.replace(" ", "")) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if not start:
+        # suffix range, the last N bytes
+        length = int(end)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _offload(path):
+    """Response asking the web server to send ``path`` itself"""
+
+    accel_prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT", None)
+    sendfile_header = getattr(settings, "MEDIA_SENDFILE_HEADER", None)
+    if not accel_prefix and not sendfile_header:
+        return None
+    response = HttpResponse()
+    if accel_prefix:
+        relative = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, "/")
+        response["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + quote(relative)
+    else:
+        response[sendfile_header] = path
+    # the web server fills in the body, its type and length
+    del response["Content-Type"]
+    return response
+
+
+def serve_media(request, path):
+    """Serve the file stored as ``path`` under MEDIA_ROOT"""
+
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("File not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404("File not found")
+
+    size = stat_result.st_size
+    last_modified = int(stat_result.st_mtime)
+    etag = quote_etag(f"{stat_result.st_mtime_ns:x}-{size:x}")
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _offload(full_path)
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(full_path)
+        content_type = content_type or "application/octet-stream"
+        byte_range = None
+        if_range = request.META.get("HTTP_IF_RANGE")
+        if not if_range or if_range == etag:
+            byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+        elif byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(full_path, start, end - start + 1),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = end - start + 1
+        else:
+            response = FileResponse(open(full_path, "rb"), content_type=content_type)
+            response["Content-Length"] = size
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    if response.status_code not in (200, 206, 304):
+        return response
+    if not isinstance(response, HttpResponseNotModified):
+        response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    if is_content_hashed(path):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=getattr(settings, "MEDIA_MAX_AGE", 60 * 60 * 24),
+        )
+    return response
@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# sent with the model instance once every rendition of an upload is stored
+renditions_ready = Signal()
@@ -0,0 +1,37 @@
+from urllib.parse import urlencode
+
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag("imaging/picture.html")
+def picture(image, alt="", css_class="", width=None, height=None):
+    """Responsive <picture> of a RenditionImageField
+    - WebP renditions for browsers supporting them, JPEG otherwise
+    - Retina renditions on high density screens
+    """
+
+    return {
+        "image": image,
+        "alt": alt,
+        "css_class": css_class,
+        "width": width,
+        "height": height,
+    }
+
+
+@register.simple_tag
+def rendition_url(image, width=None, height=None, fmt="jpeg"):
+    """URL of an on-the-fly rendition of an uploaded image
+    - Pre-generated renditions are used until the upload is processed
+    """
+
+    if not image:
+        return ""
+    if not image.is_default and not image.ready:
+        return image.thumb_url
+    params = {"w": width, "h": height, "fmt": fmt}
+    return "{}?{}".format(
+        image.url, urlencode({key: value for key, value in params.items() if value})
+    )
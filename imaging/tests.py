@@ -0,0 +1,395 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from PIL import Image
+
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.shortcuts import reverse
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from food_menus.models import MenuModel
+from tasks.models import Task
+from tasks.queue import claim, execute
+from users.roles import UserRole
+from .disk_cache import RenditionCache
+from .fields import queue_pending_renditions
+from .renditions import RENDITIONS, rendition_name
+from .serving import is_content_hashed, parse_range
+
+MEDIA_ROOT = tempfile.mkdtemp()
+IMAGING_CACHE_DIR = tempfile.mkdtemp()
+
+
+def upload(name="menu.png", size=(1200, 900), color="orange"):
+    output = BytesIO()
+    Image.new("RGBA", size, color).save(output, format="PNG")
+    return SimpleUploadedFile(name, output.getvalue(), content_type="image/png")
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, TASKS_EAGER=True)
+class RenditionImageFieldTest(TestCase):
+    """Check uploads are stored raw and their renditions made after commit"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_menu(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return MenuModel.objects.create(
+                name="menu1", food_items="item_a", price=10, **kwargs
+            )
+
+    def test_upload_should_be_stored_raw(self):
+        """the original upload should be kept as it was sent, under a
+        content-hashed name"""
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            menu = MenuModel.objects.create(
+                name="menu1", food_items="item_a", price=10, menu_image=upload()
+            )
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(menu.menu_image.width, 1200)
+        self.assertTrue(is_content_hashed(menu.menu_image.name))
+        self.assertFalse(menu.menu_image_ready)
+        self.assertEqual(menu.menu_image.card_url, "/static/img/placeholder.svg")
+
+    def test_renditions_should_be_generated(self):
+        """every rendition should be stored with its size and format"""
+
+        menu = self.create_menu(menu_image=upload())
+        menu.refresh_from_db()
+        self.assertTrue(menu.menu_image_ready)
+
+        storage = menu.menu_image.storage
+        expected = {
+            "thumb": ((100, 125), "JPEG"),
+            "card": ((400, 500), "JPEG"),
+            "retina": ((800, 1000), "JPEG"),
+            "webp": ((400, 500), "WEBP"),
+            "webp_retina": ((800, 1000), "WEBP"),
+        }
+        for rendition in RENDITIONS:
+            with storage.open(rendition_name(menu.menu_image.name, rendition)) as file:
+                image = Image.open(file)
+                self.assertEqual((image.size, image.format), expected[rendition.name])
+        self.assertEqual(
+            menu.menu_image.card_url,
+            storage.url(rendition_name(menu.menu_image.name, RENDITIONS[1])),
+        )
+
+    @override_settings(TASKS_EAGER=False)
+    def test_renditions_should_be_queued_for_the_worker(self):
+        """an upload should queue a task the worker turns into renditions"""
+
+        menu = self.create_menu(menu_image=upload())
+        task = Task.objects.get()
+        self.assertEqual(task.name, "imaging.fields.process_renditions")
+
+        for task_id in claim("worker", 5):
+            execute(task_id)
+        menu.refresh_from_db()
+        self.assertTrue(menu.menu_image_ready)
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_EAGER=False)
+    def test_existing_uploads_should_be_queued(self):
+        """images stored before renditions existed should be queued"""
+
+        menu = self.create_menu(menu_image=upload())
+        Task.objects.all().delete()
+        queue_pending_renditions(django_apps, "food_menus.MenuModel")
+        task = Task.objects.get()
+        self.assertEqual(
+            task.args,
+            ["food_menus.MenuModel", str(menu.pk), "menu_image", menu.menu_image.name],
+        )
+
+        for task_id in claim("worker", 5):
+            execute(task_id)
+        menu.refresh_from_db()
+        self.assertTrue(menu.menu_image_ready)
+
+        with self.settings(TASKS_EAGER=True):
+            MenuModel.objects.update(menu_image_ready=False)
+            queue_pending_renditions(django_apps, "food_menus.MenuModel")
+        self.assertFalse(Task.objects.exists())
+
+    def test_new_upload_should_replace_renditions(self):
+        """a new upload should reset and regenerate the renditions"""
+
+        menu = self.create_menu(menu_image=upload())
+        old_card = rendition_name(menu.menu_image.name, RENDITIONS[1])
+        menu.menu_image = upload("other.png", color="blue")
+        with self.captureOnCommitCallbacks(execute=True):
+            menu.save()
+        self.assertFalse(menu.menu_image.storage.exists(old_card))
+
+        menu.refresh_from_db()
+        self.assertTrue(menu.menu_image_ready)
+        new_card = rendition_name(menu.menu_image.name, RENDITIONS[1])
+        self.assertTrue(menu.menu_image.storage.exists(new_card))
+
+    def test_delete_should_remove_renditions(self):
+        """deleting a menu should delete its renditions"""
+
+        menu = self.create_menu(menu_image=upload())
+        card = rendition_name(menu.menu_image.name, RENDITIONS[1])
+        menu.delete()
+        self.assertFalse(menu.menu_image.storage.exists(card))
+
+    def test_picture_should_offer_webp_and_retina(self):
+        """the picture tag should list WebP and retina renditions"""
+
+        menu = self.create_menu(menu_image=upload())
+        menu.refresh_from_db()
+        html = Template("{% load imaging %}{% picture menu.menu_image %}").render(
+            Context({"menu": menu})
+        )
+        self.assertIn('type="image/webp"', html)
+        self.assertIn("webp_retina.webp 2x", html)
+        self.assertIn("retina.jpg 2x", html)
+
+    def test_menu_list_should_show_renditions_once_ready(self):
+        """the cached menu cards should switch from the placeholder"""
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            MenuModel.objects.create(
+                name="menu1", food_items="item_a", price=10, menu_image=upload()
+            )
+        self.assertContains(self.client.get(reverse("menu_list")), "placeholder.svg")
+        callbacks[0]()
+        self.assertContains(self.client.get(reverse("menu_list")), "card.jpg")
+
+    def test_default_avatar_should_not_be_processed(self):
+        """the default avatar should be served as is"""
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            user = User.objects.create_user(username="customer")
+        self.assertEqual(callbacks, [])
+        self.assertEqual(user.profile.avatar.thumb_url, "/media/default.jpg")
+        self.assertIsNone(UserRole.resolve(user).avatar_url)
+
+    def test_command_should_process_pending_images(self):
+        """process_renditions should generate renditions left behind"""
+
+        with self.captureOnCommitCallbacks(execute=False):
+            menu = MenuModel.objects.create(
+                name="menu1", food_items="item_a", price=10, menu_image=upload()
+            )
+        call_command("process_renditions", stdout=StringIO())
+        menu.refresh_from_db()
+        self.assertTrue(menu.menu_image_ready)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGING_CACHE_DIR=IMAGING_CACHE_DIR)
+class MediaRenditionViewTest(TestCase):
+    """Check on-the-fly renditions are generated once and cached"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(MEDIA_ROOT, "menu_images"), exist_ok=True)
+        with open(os.path.join(MEDIA_ROOT, "menu_images", "raw.png"), "wb") as file:
+            file.write(upload().read())
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(IMAGING_CACHE_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def cached_files(self):
+        return list(RenditionCache(IMAGING_CACHE_DIR, 0).entries())
+
+    def test_rendition_should_be_resized(self):
+        """the rendition should have the requested size, rounded up"""
+
+        response = self.client.get(
+            "/media/menu_images/raw.png", {"w": 120, "h": 90, "fmt": "webp"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+        self.assertFalse(response["ETag"].startswith("W/"))
+        image = Image.open(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual((image.size, image.format), ((150, 100), "WEBP"))
+
+    def test_rendition_should_be_generated_once(self):
+        """repeat requests should be served from the disk cache"""
+
+        url = "/media/menu_images/raw.png?w=200"
+        etag = self.client.get(url)["ETag"]
+        before = self.cached_files()
+        self.assertEqual(len(before), 1)
+
+        response = self.client.get(url)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(len(self.cached_files()), 1)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalid_requests_should_be_rejected(self):
+        """bad sizes, formats and paths should not be rendered"""
+
+        url = "/media/menu_images/raw.png"
+        self.assertEqual(self.client.get(url, {"w": "-1"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"w": "99999"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"fmt": "gif"}).status_code, 400)
+        response = self.client.get("/media/../manage.py", {"w": 100})
+        self.assertEqual(response.status_code, 404)
+
+    def test_original_should_be_served_without_parameters(self):
+        """the upload itself should be served as is"""
+
+        response = self.client.get("/media/menu_images/raw.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+
+
+class RenditionCacheTest(TestCase):
+    """Check the disk cache stays under its size limit"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def cached(self, disk_cache, key):
+        file = disk_cache.get(key)
+        if file is None:
+            return None
+        with file:
+            return file.read()
+
+    def test_least_recently_used_entries_should_be_evicted(self):
+        """the oldest unread entries should go first"""
+
+        disk_cache = RenditionCache(self.directory, max_bytes=250)
+        for age, key in enumerate(["aa1", "bb2"]):
+            disk_cache.set(key, b"x" * 100)
+            os.utime(disk_cache.path(key), (age, age))
+        # reading aa1 makes bb2 the least recently used entry
+        self.assertIsNotNone(self.cached(disk_cache, "aa1"))
+        disk_cache.set("cc3", b"x" * 100)
+
+        self.assertIsNotNone(self.cached(disk_cache, "aa1"))
+        self.assertIsNone(self.cached(disk_cache, "bb2"))
+        self.assertIsNotNone(self.cached(disk_cache, "cc3"))
+
+    def test_directory_should_be_walked_once_in_a_while(self):
+        """small writes under the limit should not walk the cache"""
+
+        disk_cache = RenditionCache(self.directory, max_bytes=10000)
+        with mock.patch.object(
+            disk_cache, "entries", wraps=disk_cache.entries
+        ) as entries:
+            for number in range(20):
+                disk_cache.set(f"k{number:02}", b"x" * 100)
+        # the first write and then every 10% of the limit
+        self.assertEqual(entries.call_count, 2)
+        self.assertEqual(disk_cache.scanned, 1100)
+
+    def test_evicted_entry_should_still_be_readable_once_opened(self):
+        """an entry got before another process evicts it should be served"""
+
+        disk_cache = RenditionCache(self.directory, max_bytes=1000)
+        disk_cache.set("aa1", b"rendition")
+        with disk_cache.get("aa1") as file:
+            os.remove(disk_cache.path("aa1"))
+            self.assertEqual(file.read(), b"rendition")
+        self.assertIsNone(disk_cache.get("aa1"))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MediaServingTest(TestCase):
+    """Check uploads are served with validators, ranges and cache headers"""
+
+    content = bytes(range(256)) * 4
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(MEDIA_ROOT, "menu_images"), exist_ok=True)
+        for name in ("plain.jpg", "0123456789abcdef.jpg"):
+            with open(os.path.join(MEDIA_ROOT, "menu_images", name), "wb") as file:
+                file.write(cls.content)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_file_should_have_validators(self):
+        """a repeat request should be answered with 304"""
+
+        response = self.client.get("/media/menu_images/plain.jpg")
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("max-age=86400", response["Cache-Control"])
+
+        response = self.client.get(
+            "/media/menu_images/plain.jpg", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            "/media/menu_images/plain.jpg",
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_content_hashed_file_should_be_immutable(self):
+        """content-hashed names should be cached for a year"""
+
+        response = self.client.get("/media/menu_images/0123456789abcdef.jpg")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+
+    def test_range_request(self):
+        """a byte range should be answered with 206 and that slice"""
+
+        url = "/media/menu_images/plain.jpg"
+        response = self.client.get(url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+
+        response = self.client.get(url, HTTP_RANGE="bytes=2000-")
+        self.assertEqual(response.status_code, 416)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_parse_range(self):
+        """ranges should be clamped to the file"""
+
+        self.assertEqual(parse_range("bytes=0-", 100), (0, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=90-200", 100), (90, 99))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertFalse(parse_range("bytes=100-", 100))
+
+    @override_settings(MEDIA_ACCEL_REDIRECT="/protected-media/")
+    def test_accel_redirect_offload(self):
+        """nginx should be asked to send the file"""
+
+        response = self.client.get("/media/menu_images/plain.jpg")
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected-media/menu_images/plain.jpg"
+        )
+        self.assertEqual(response.content, b"")
+        self.assertIn("ETag", response)
+
+    def test_missing_file(self):
+        """missing files and directories should be 404"""
+
+        self.assertEqual(self.client.get("/media/missing.jpg").status_code, 404)
+        self.assertEqual(self.client.get("/media/menu_images").status_code, 404)
@@ -0,0 +1,89 @@
+import mimetypes
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseBadRequest
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .disk_cache import RenditionCache
+from .renditions import open_image, resize
+from .serving import serve_media
+
+RENDITION_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "jpg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+    "png": ("PNG", "image/png"),
+}
+RENDITION_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def _dimension(value):
+    """Requested width or height, rounded up to IMAGING_SIZE_STEP pixels so
+    that the number of renditions per image stays bounded
+
+    Raises:
+        ValueError: not a positive number or above IMAGING_MAX_DIMENSION
+    """
+
+    if not value:
+        return None
+    value = int(value)
+    step = getattr(settings, "IMAGING_SIZE_STEP", 50)
+    if not 0 < value <= getattr(settings, "IMAGING_MAX_DIMENSION", 2000):
+        raise ValueError(value)
+    return -(-value // step) * step
+
+
+def media_view(request, path):
+    """Serve an uploaded file, or a rendition of it with ?w=&h=&fmt=
+
+    - Renditions are generated on first request and kept in the disk cache
+    - Responses carry a strong ETag and may be cached for a year, the key
+      changes whenever the source file does
+    """
+
+    if not any(param in request.GET for param in ("w", "h", "fmt")):
+        return serve_media(request, path)
+
+    try:
+        width = _dimension(request.GET.get("w"))
+        height = _dimension(request.GET.get("h"))
+        fmt, content_type = RENDITION_FORMATS[request.GET.get("fmt", "jpeg")]
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("Invalid rendition")
+
+    try:
+        source = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found")
+    source_type = mimetypes.guess_type(source)[0] or ""
+    if not os.path.isfile(source) or not source_type.startswith("image/"):
+        raise Http404("File not found")
+
+    disk_cache = RenditionCache.from_settings()
+    key = disk_cache.key(source, width, height, fmt)
+    etag = quote_etag(key)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        cached = disk_cache.get(key)
+        if cached is None:
+            try:
+                with open(source, "rb") as file:
+                    image = resize(open_image(file), width, height)
+            except OSError:
+                raise Http404("Not an image")
+            output = BytesIO()
+            image.save(output, format=fmt, quality=80)
+            disk_cache.set(key, output.getvalue())
+            # served from memory, another process may evict the file already
+            output.seek(0)
+            cached = output
+        response = FileResponse(cached, content_type=content_type)
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=RENDITION_MAX_AGE)
+    return response
@@ -0,0 +1,75 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .registry import (
+    LATENCY_BUCKETS,
+    QUERY_BUCKETS,
+    SIZE_BUCKETS,
+    registry,
+)
+
+
+class QueryTimer:
+    """Database execute wrapper counting and timing the queries of a request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def response_size(response):
+    if not response.streaming:
+        return len(response.content)
+    length = response.get("Content-Length")
+    return int(length) if length else None
+
+
+class MetricsMiddleware:
+    """Record the count, latency, database queries and response size of
+    every request, labelled by URL name.
+    - Should come first, so the time spent in other middleware is included
+    - Unresolved URLs (404s) are grouped under "<unresolved>"
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = {"view": match.view_name if match else "<unresolved>"}
+        registry.inc(
+            "http_requests_total",
+            dict(view, method=request.method, status=str(response.status_code)),
+        )
+        registry.observe(
+            "http_request_duration_seconds", view, duration, LATENCY_BUCKETS
+        )
+        size = response_size(response)
+        if size is not None:
+            registry.observe("http_response_size_bytes", view, size, SIZE_BUCKETS)
+        registry.observe("http_request_db_queries", view, queries.count, QUERY_BUCKETS)
+        registry.inc("http_request_db_duration_seconds_total", view, queries.duration)
+
+        directory = getattr(settings, "METRICS_DIR", None)
+        if directory:
+            registry.flush(directory)
+        return response
@@ -0,0 +1,213 @@
+"""Request metrics in the Prometheus text format.
+
+Every process counts its own samples in memory. A sample is a metric name,
+its labels and a value, and histograms are stored as cumulative bucket
+counters, so the samples of several processes add up to the totals of the
+whole site.
+
+Gunicorn workers do not share memory: with METRICS_DIR set, each of them
+writes its samples to METRICS_DIR/metrics-<pid>-<id>.json at most every
+METRICS_FLUSH_INTERVAL seconds, and /metrics adds up the files of every
+worker, the one answering included, so an idle worker's latest requests
+show up once it serves its next one. Files of stopped workers are kept so
+counters never go down, gunicorn.conf.py empties the directory when the
+server starts. Without METRICS_DIR the process reports its own samples.
+"""
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304]
+QUERY_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100]
+
+# name: (type, help)
+METRICS = {
+    "http_requests_total": (
+        "counter",
+        "Requests served, by URL name, method and status code.",
+    ),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Time spent serving a request, by URL name.",
+    ),
+    "http_response_size_bytes": (
+        "histogram",
+        "Size of the response body, by URL name.",
+    ),
+    "http_request_db_queries": (
+        "histogram",
+        "Database queries run by a request, by URL name.",
+    ),
+    "http_request_db_duration_seconds_total": (
+        "counter",
+        "Time spent in database queries, by URL name.",
+    ),
+}
+
+
+class Registry:
+    """The samples of this process
+    - ``samples`` maps (name, labels) to a value, labels being a sorted
+      tuple of (label, value) pairs
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        # the pid alone would be reused by a later worker
+        self.id = uuid.uuid4().hex[:8]
+        self.samples = defaultdict(float)
+        self.flushed_at = time.monotonic()
+
+    def check_fork(self):
+        # samples of a parent process (gunicorn --preload) are the parent's
+        if self.pid != os.getpid():
+            self.reset()
+
+    def inc(self, name, labels, amount=1):
+        with self.lock:
+            self.check_fork()
+            self.samples[(name, tuple(sorted(labels.items())))] += amount
+
+    def observe(self, name, labels, value, buckets):
+        """Count ``value`` in every bucket it falls in, and in _sum/_count
+        - Buckets are cumulative, ``le`` (less or equal) their upper bound"""
+
+        with self.lock:
+            self.check_fork()
+            labels = tuple(sorted(labels.items()))
+            # every bucket is written, even empty, as queries expect them all
+            for bound in buckets:
+                bucket = labels + (("le", format_value(bound)),)
+                self.samples[(f"{name}_bucket", bucket)] += value <= bound
+            self.samples[(f"{name}_bucket", labels + (("le", "+Inf"),))] += 1
+            self.samples[(f"{name}_sum", labels)] += value
+            self.samples[(f"{name}_count", labels)] += 1
+
+    def snapshot(self):
+        with self.lock:
+            self.check_fork()
+            return dict(self.samples)
+
+    def path(self, directory):
+        return os.path.join(directory, f"metrics-{self.pid}-{self.id}.json")
+
+    def flush(self, directory, force=False):
+        """Write the samples to this process' file in ``directory``, at most
+        every METRICS_FLUSH_INTERVAL seconds unless ``force``d"""
+
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+        if not force and time.monotonic() - self.flushed_at < interval:
+            return
+        samples = self.snapshot()
+        self.flushed_at = time.monotonic()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # written aside and renamed, readers never see half a file
+            fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as file:
+                json.dump(
+                    [
+                        [name, labels, value]
+                        for (name, labels), value in samples.items()
+                    ],
+                    file,
+                )
+            os.replace(temporary, self.path(directory))
+        except OSError:
+            logger.exception("Could not write the metrics to %s", directory)
+
+
+registry = Registry()
+
+
+def format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def collect():
+    """The samples of every worker, or of this process without METRICS_DIR
+
+    Returns:
+        _type_: dict of {(name, labels): value}
+    """
+
+    directory = getattr(settings, "METRICS_DIR", None)
+    if not directory:
+        return registry.snapshot()
+
+    registry.flush(directory, force=True)
+    samples = defaultdict(float)
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        try:
+            with open(path) as file:
+                rows = json.load(file)
+        except (OSError, ValueError):
+            # removed since, or written by something else
+            continue
+        for name, labels, value in rows:
+            samples[(name, tuple(tuple(label) for label in labels))] += value
+    return samples
+
+
+def escape(value):
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def sample_line(name, labels, value):
+    if labels:
+        pairs = ",".join(f'{label}="{escape(str(text))}"' for label, text in labels)
+        name = f"{name}{{{pairs}}}"
+    return f"{name} {format_value(value)}"
+
+
+def exposition(samples):
+    """Samples in the Prometheus text format, version 0.0.4
+
+    Returns:
+        _type_: str
+    """
+
+    lines = []
+    for metric, (kind, help_text) in METRICS.items():
+        names = (
+            [f"{metric}_bucket", f"{metric}_sum", f"{metric}_count"]
+            if kind == "histogram"
+            else [metric]
+        )
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        rows = [
+            (labels, name, value)
+            for (name, labels), value in samples.items()
+            if name in names
+        ]
+        for labels, name, value in sorted(rows, key=sort_key):
+            lines.append(sample_line(name, labels, value))
+    return "\n".join(lines) + "\n"
+
+
+def sort_key(row):
+    """Series together, histogram buckets in increasing order"""
+
+    labels, name, value = row
+    series = tuple(pair for pair in labels if pair[0] != "le")
+    bound = dict(labels).get("le")
+    return (series, name, float(bound) if bound else 0.0)
@@ -0,0 +1,133 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.shortcuts import reverse
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .registry import Registry, collect, exposition, registry
+
+
+class MetricsTest(TestCase):
+    """Check requests are measured and served in the Prometheus format"""
+
+    def setUp(self):
+        registry.reset()
+        self.superuser = User.objects.create_superuser(
+            "superuser", "superuser@mail.com", "secret"
+        )
+
+    def scrape(self, **headers):
+        response = self.client.get(reverse("metrics"), **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        return response.content.decode()
+
+    def test_requests_should_be_counted_by_url_name(self):
+        """every request should be counted under its URL name and status"""
+
+        self.client.get(reverse("index"))
+        self.client.get(reverse("index"))
+        self.client.get("/missing/")
+        self.client.force_login(self.superuser)
+        text = self.scrape()
+
+        self.assertIn(
+            'http_requests_total{method="GET",status="200",view="index"} 2', text
+        )
+        self.assertIn(
+            'http_requests_total{method="GET",status="404",view="<unresolved>"} 1',
+            text,
+        )
+        self.assertIn('http_request_duration_seconds_count{view="index"} 2', text)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="index",le="+Inf"} 2', text
+        )
+        self.assertIn('http_request_db_queries_count{view="index"} 2', text)
+        self.assertIn("# TYPE http_response_size_bytes histogram", text)
+        self.assertIn('http_request_db_duration_seconds_total{view="index"}', text)
+
+    def test_metrics_should_be_forbidden_to_visitors(self):
+        """only superusers and the scraper token should read metrics"""
+
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        self.client.force_login(User.objects.create_user("guest"))
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+    @override_settings(METRICS_TOKEN="scrape-token")
+    def test_metrics_should_be_served_to_the_scraper_token(self):
+        """a bearer token matching METRICS_TOKEN should be let in"""
+
+        self.scrape(HTTP_AUTHORIZATION="Bearer scrape-token")
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong-token"
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class RegistryTest(SimpleTestCase):
+    """Check samples add up across processes"""
+
+    def test_histogram_buckets_should_be_cumulative(self):
+        """a value should count in every bucket from the first it fits in"""
+
+        samples = Registry()
+        samples.observe(
+            "http_request_duration_seconds", {"view": "a"}, 0.2, [0.1, 0.5, 1]
+        )
+        samples.observe(
+            "http_request_duration_seconds", {"view": "a"}, 0.7, [0.1, 0.5, 1]
+        )
+        lines = [
+            line
+            for line in exposition(samples.snapshot()).splitlines()
+            if line.startswith("http_request_duration_seconds")
+        ]
+        self.assertEqual(
+            lines,
+            [
+                'http_request_duration_seconds_bucket{view="a",le="0.1"} 0',
+                'http_request_duration_seconds_bucket{view="a",le="0.5"} 1',
+                'http_request_duration_seconds_bucket{view="a",le="1"} 2',
+                'http_request_duration_seconds_bucket{view="a",le="+Inf"} 2',
+                'http_request_duration_seconds_count{view="a"} 2',
+                'http_request_duration_seconds_sum{view="a"} 0.8999999999999999',
+            ],
+        )
+
+    def test_label_values_should_be_escaped(self):
+        """quotes and backslashes in labels should not break the format"""
+
+        samples = Registry()
+        samples.inc("http_requests_total", {"view": 'a"b\\c'})
+        self.assertIn(
+            'http_requests_total{view="a\\"b\\\\c"} 1', exposition(samples.snapshot())
+        )
+
+    def test_workers_should_be_added_up(self):
+        """samples flushed by every worker should be summed"""
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        other_worker = Registry()
+        other_worker.inc("http_requests_total", {"view": "index"}, 3)
+        other_worker.flush(directory.name, force=True)
+        registry.reset()
+        registry.inc("http_requests_total", {"view": "index"}, 2)
+
+        with override_settings(METRICS_DIR=directory.name):
+            samples = collect()
+        self.assertEqual(samples[("http_requests_total", (("view", "index"),))], 5)
+        self.assertEqual(len(os.listdir(directory.name)), 2)
+
+    def test_flush_should_wait_for_the_interval(self):
+        """samples should be written at most every METRICS_FLUSH_INTERVAL"""
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        samples = Registry()
+        with override_settings(METRICS_FLUSH_INTERVAL=60):
+            samples.flush(directory.name)
+            self.assertEqual(os.listdir(directory.name), [])
+            samples.flush(directory.name, force=True)
+            self.assertEqual(len(os.listdir(directory.name)), 1)
@@ -0,0 +1,30 @@
+from hmac import compare_digest
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .registry import collect, exposition
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def is_authorized(request):
+    """Prometheus scrapes with ``Authorization: Bearer <METRICS_TOKEN>``,
+    superusers may read the metrics from their browser
+
+    Returns:
+        _type_: Boolean
+    """
+
+    token = getattr(settings, "METRICS_TOKEN", None)
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    if token and compare_digest(header.encode(), f"Bearer {token}".encode()):
+        return True
+    return request.user.is_authenticated and request.user.is_superuser
+
+
+def metrics_view(request):
+    if not is_authorized(request):
+        return HttpResponseForbidden()
+    return HttpResponse(exposition(collect()), content_type=PROMETHEUS_CONTENT_TYPE)
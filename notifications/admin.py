@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import OutboxEmail
+
+
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "to", "status", "attempts", "created_on", "sent_on"]
+    list_filter = ["status"]
+    search_fields = ["to", "subject"]
+    ordering = ["-created_on"]
+
+
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import dispatch
+
+
+class Command(BaseCommand):
+    help = "Send the pending emails of the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, help="Emails claimed and sent at a time"
+        )
+
+    def handle(self, *args, **options):
+        sent = dispatch(options["batch_size"])
+        self.stdout.write(f"Sent {sent} email(s)")
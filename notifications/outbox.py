@@ -0,0 +1,197 @@
+"""Transactional outbox for customer emails.
+
+``queue_email`` renders an email and stores it as an OutboxEmail row in the
+caller's transaction, so an email exists exactly when the change it reports
+was committed, and the request never waits on the mail server. Jobs
+emailing many customers build emails with ``build_email`` and store them
+with one bulk insert per batch through ``queue_emails``.
+
+The dispatcher (the ``dispatch_outbox`` background task, or ``manage.py
+send_outbox``) claims pending emails in batches of OUTBOX_BATCH_SIZE and
+sends every batch over one reused connection of EMAIL_BACKEND. Claiming is
+a conditional UPDATE on the status, so concurrent dispatchers never send
+the same email twice. Failed emails are retried by a dispatch scheduled
+OUTBOX_RETRY_DELAY later, up to OUTBOX_MAX_ATTEMPTS. Emails left claimed
+by a dispatcher that died are released after OUTBOX_CLAIM_TIMEOUT.
+Delivery is at least once: a dispatcher dying between sending and
+recording a batch sends it again.
+"""
+import datetime
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import get_template
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.queue import task
+from .models import OutboxEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_email(to, subject, template, context):
+    """Unsaved email rendered from ``template``, see queue_emails()
+    - ``template`` is a template name, or a template loaded once with
+      get_template() when building many emails
+    """
+
+    if isinstance(template, str):
+        template = get_template(template)
+    return OutboxEmail(to=to, subject=subject, body=template.render(context))
+
+
+def queue_email(to, subject, template, context):
+    """Store an email rendered from ``template`` for the dispatcher
+
+    Returns:
+        _type_: OutboxEmail, None without a recipient
+    """
+
+    if not to:
+        return None
+    email = build_email(to, subject, template, context)
+    email.save()
+    schedule_dispatch()
+    return email
+
+
+def queue_emails(emails):
+    """Store many emails made by build_email() with bulk inserts
+    - Emails without a recipient are skipped
+
+    Returns:
+        _type_: list of the OutboxEmail stored
+    """
+
+    emails = [email for email in emails if email.to]
+    if emails:
+        OutboxEmail.objects.bulk_create(emails, batch_size=500)
+        schedule_dispatch()
+    return emails
+
+
+def queued_dispatches():
+    return Task.objects.filter(name=dispatch_outbox.name, status=Task.QUEUED)
+
+
+def schedule_dispatch():
+    # one due dispatch drains every pending email, a retry scheduled later
+    # must not hold new emails back until then
+    if not queued_dispatches().filter(run_at__lte=timezone.now()).exists():
+        dispatch_outbox.enqueue()
+
+
+def release_stale():
+    timeout = getattr(settings, "OUTBOX_CLAIM_TIMEOUT", 60 * 10)
+    return OutboxEmail.objects.filter(
+        status=OutboxEmail.SENDING,
+        claimed_at__lt=timezone.now() - datetime.timedelta(seconds=timeout),
+    ).update(status=OutboxEmail.PENDING, claimed_by="", claimed_at=None)
+
+
+def claim(batch_size, exclude=()):
+    """Claim up to ``batch_size`` pending emails, oldest first
+
+    Returns:
+        _type_: list of OutboxEmail
+    """
+
+    token = uuid.uuid4().hex
+    ids = list(
+        OutboxEmail.objects.filter(status=OutboxEmail.PENDING)
+        .exclude(id__in=exclude)
+        .order_by("id")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    OutboxEmail.objects.filter(id__in=ids, status=OutboxEmail.PENDING).update(
+        status=OutboxEmail.SENDING, claimed_by=token, claimed_at=timezone.now()
+    )
+    return list(OutboxEmail.objects.filter(claimed_by=token).order_by("id"))
+
+
+def send_batch(connection, emails):
+    """Send ``emails`` over an open connection and record each outcome
+
+    Returns:
+        _type_: ids of the emails sent
+    """
+
+    max_attempts = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+    sent = []
+    for email in emails:
+        message = EmailMessage(
+            email.subject, email.body, to=[email.to], connection=connection
+        )
+        try:
+            message.send()
+        except Exception as error:
+            logger.warning("Sending %s failed: %s", email, error)
+            email.attempts += 1
+            email.status = (
+                OutboxEmail.FAILED
+                if email.attempts >= max_attempts
+                else OutboxEmail.PENDING
+            )
+            email.last_error = str(error)
+            email.claimed_by = ""
+            email.claimed_at = None
+            email.save(
+                update_fields=[
+                    "attempts",
+                    "status",
+                    "last_error",
+                    "claimed_by",
+                    "claimed_at",
+                ]
+            )
+        else:
+            sent.append(email.id)
+
+    OutboxEmail.objects.filter(id__in=sent).update(
+        status=OutboxEmail.SENT, sent_on=timezone.now(), claimed_by=""
+    )
+    return sent
+
+
+def dispatch(batch_size=None):
+    """Send every pending email, batch after batch over one connection
+    - Emails that failed during this dispatch wait for the next one
+
+    Returns:
+        _type_: number of emails sent
+    """
+
+    batch_size = batch_size or getattr(settings, "OUTBOX_BATCH_SIZE", 100)
+    release_stale()
+    failed = set()
+    sent = 0
+    connection = None
+    try:
+        while True:
+            emails = claim(batch_size, exclude=failed)
+            if not emails:
+                break
+            if connection is None:
+                connection = get_connection()
+                connection.open()
+            sent_ids = send_batch(connection, emails)
+            failed.update(email.id for email in emails if email.id not in sent_ids)
+            sent += len(sent_ids)
+    finally:
+        if connection is not None:
+            connection.close()
+    return sent
+
+
+@task
+def dispatch_outbox():
+    dispatch()
+    pending = OutboxEmail.objects.filter(status=OutboxEmail.PENDING).exists()
+    if pending and not queued_dispatches().exists():
+        # retry what failed once the mail server had time to recover
+        delay = getattr(settings, "OUTBOX_RETRY_DELAY", 60 * 5)
+        dispatch_outbox.schedule(timezone.now() + datetime.timedelta(seconds=delay))
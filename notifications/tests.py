@@ -0,0 +1,147 @@
+import datetime
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tasks.models import Task
+from .models import OutboxEmail
+from .outbox import claim, dispatch, dispatch_outbox, queue_email, release_stale
+
+
+class CountingBackend(EmailBackend):
+    """locmem backend counting the connections opened, failing for
+    recipients at fail.test"""
+
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.to[0].endswith("@fail.test"):
+                raise ConnectionError("mail server unavailable")
+        return super().send_messages(messages)
+
+
+def queue(to="guest@mail.com"):
+    return queue_email(
+        to,
+        "Your reservation is confirmed",
+        "emails/reservation_confirmed.txt",
+        {"customer_name": "guest", "reservation": None},
+    )
+
+
+@override_settings(EMAIL_BACKEND="notifications.tests.CountingBackend")
+class OutboxTest(TestCase):
+    """Check emails are queued with the change and sent in batches"""
+
+    def setUp(self):
+        CountingBackend.opened = 0
+
+    def test_queue_email_should_store_pending_email(self):
+        """a queued email should wait in the outbox for one dispatch task"""
+
+        queue()
+        queue("other@mail.com")
+        self.assertEqual(OutboxEmail.objects.filter(status="pending").count(), 2)
+        self.assertEqual(Task.objects.filter(name=dispatch_outbox.name).count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_email_without_recipient_should_be_skipped(self):
+        """customers without an email address get no email"""
+
+        self.assertIsNone(queue(""))
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_dispatch_should_send_batches_over_one_connection(self):
+        """every pending email should be sent over a single connection"""
+
+        for number in range(5):
+            queue(f"guest{number}@mail.com")
+        self.assertEqual(dispatch(batch_size=2), 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(OutboxEmail.objects.filter(status="sent").count(), 5)
+        self.assertEqual(dispatch(), 0)
+
+    def test_failed_email_should_be_retried_later(self):
+        """a failed email should not block the others and be retried later"""
+
+        queue("guest@fail.test")
+        queue("guest@mail.com")
+        Task.objects.all().delete()
+
+        dispatch_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        failed = OutboxEmail.objects.get(to="guest@fail.test")
+        self.assertEqual(failed.status, OutboxEmail.PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn("unavailable", failed.last_error)
+        retry = Task.objects.get(name=dispatch_outbox.name)
+        self.assertGreater(retry.run_at, timezone.now())
+
+    def test_email_queued_after_a_failed_dispatch_should_be_sent_right_away(self):
+        """a retry scheduled for later should not hold new emails back"""
+
+        queue("guest@fail.test")
+        Task.objects.all().delete()
+        dispatch_outbox()
+        retry = Task.objects.get(name=dispatch_outbox.name)
+
+        queue("guest@mail.com")
+        due = Task.objects.filter(name=dispatch_outbox.name, run_at__lte=timezone.now())
+        self.assertEqual(due.count(), 1)
+        due.delete()
+        dispatch_outbox()
+        self.assertEqual([message.to for message in mail.outbox], [["guest@mail.com"]])
+        # the failed email keeps its single retry
+        self.assertEqual(list(Task.objects.values_list("id", flat=True)), [retry.id])
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_email_should_fail_after_max_attempts(self):
+        """an email should be given up on once out of attempts"""
+
+        queue("guest@fail.test")
+        dispatch()
+        dispatch()
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.FAILED)
+        self.assertEqual(dispatch(), 0)
+
+    def test_claimed_email_should_not_be_claimed_again(self):
+        """concurrent dispatchers should get disjoint batches"""
+
+        for number in range(3):
+            queue(f"guest{number}@mail.com")
+        first = claim(2)
+        second = claim(2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({email.id for email in first} & {second[0].id})
+
+    @override_settings(OUTBOX_CLAIM_TIMEOUT=60)
+    def test_stale_claim_should_be_released(self):
+        """emails claimed by a dispatcher that died should be sent again"""
+
+        queue()
+        claim(5)
+        self.assertEqual(release_stale(), 0)
+        OutboxEmail.objects.update(
+            claimed_at=timezone.now() - datetime.timedelta(minutes=5)
+        )
+        self.assertEqual(release_stale(), 1)
+        self.assertEqual(dispatch(), 1)
+
+    def test_send_outbox_command(self):
+        """send_outbox should report the emails it sent"""
+
+        queue()
+        out = StringIO()
+        call_command("send_outbox", stdout=out)
+        self.assertIn("Sent 1 email(s)", out.getvalue())
@@ -1,8 +1,9 @@
 from django.contrib import admin
 
-from .models import TableModel, RestaurantModel, ReservationModel
+from .models import TableModel, RestaurantModel, ReservationModel, SpecialHoursModel
 
 
 admin.site.register(RestaurantModel)
 admin.site.register(TableModel)
 admin.site.register(ReservationModel)
+admin.site.register(SpecialHoursModel)
@@ -0,0 +1,105 @@
+"""Slot availability index for the booking page.
+
+Occupancy is stored per reservation date as a mapping of time slot to a
+bitmap of booked table numbers (bit ``n`` set means table ``#n`` is taken).
+Each date lives under its own cache key and is dropped whenever a
+reservation on that date is created or canceled, so the booking page
+answers a whole booking window with a single cache lookup.
+"""
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+
+from RestaurantBookingApp import cache
+
+from .models import ReservationModel
+
+
+AVAILABILITY_CACHE_KEY = "availability:{}"
+AVAILABILITY_CACHE_TIMEOUT = 60 * 5
+BOOKING_WINDOW_DAYS = getattr(settings, "RESERVATION_BOOKING_WINDOW_DAYS", 30)
+
+
+def _cache_key(date):
+    return AVAILABILITY_CACHE_KEY.format(date.isoformat())
+
+
+def booking_window(start=None, days=BOOKING_WINDOW_DAYS):
+    """Dates customers can currently pick on the booking page."""
+
+    start = start or timezone.now().date()
+    return [start + datetime.timedelta(days=offset) for offset in range(days)]
+
+
+def get_occupancy(dates):
+    """Booked-table bitmaps per time slot for every date in ``dates``.
+
+    Cached dates are served straight from the cache, the rest are loaded
+    with one range query and cached for the next request.
+
+    Returns:
+        _type_: dict of {date: {time: bitmap}}
+    """
+
+    keys = {_cache_key(date): date for date in dates}
+    occupancy = {
+        keys[key]: slots
+        for key, slots in cache.get_many("reservation", keys).items()
+    }
+    missing = [date for date in dates if date not in occupancy]
+
+    if missing:
+        loaded = {date: {} for date in missing}
+        rows = (
+            ReservationModel.objects.filter(
+                reservation_date__range=(min(missing), max(missing))
+            )
+            .order_by()
+            .values_list("reservation_date", "reservation_time", "table__table_number")
+        )
+        for date, time, table_number in rows:
+            if date in loaded:
+                slots = loaded[date]
+                slots[time] = slots.get(time, 0) | (1 << table_number)
+        cache.set_many(
+            "reservation",
+            {_cache_key(date): slots for date, slots in loaded.items()},
+            AVAILABILITY_CACHE_TIMEOUT,
+        )
+        occupancy.update(loaded)
+
+    return occupancy
+
+
+def is_table_free(occupancy, time, table_number):
+    return not occupancy.get(time, 0) >> table_number & 1
+
+
+def build_availability(tables, schedule):
+    """Free table numbers for every date and time slot of ``schedule``.
+
+    ``schedule`` maps dates to their "HH:MM" slots (see slots.slots_for_dates).
+    Dates are keyed the way the booking form's date picker posts them
+    (``mm/dd/yyyy``) so the page can hide taken slots before submitting.
+    """
+
+    occupancy = get_occupancy(list(schedule))
+
+    availability = {}
+    for date, times in schedule.items():
+        booked = occupancy[date]
+        availability[date.strftime("%m/%d/%Y")] = {
+            label: [
+                table.table_number
+                for table in tables
+                if is_table_free(booked, parse_time(label), table.table_number)
+            ]
+            for label in times
+        }
+    return availability
+
+
+def invalidate_dates(dates):
+    cache.delete("reservation", *[_cache_key(date) for date in dates])
@@ -0,0 +1,61 @@
+"""Customer emails about their reservations.
+
+Emails are written to the notifications outbox, call these inside the
+transaction that makes the change they report.
+"""
+from django.template.loader import get_template
+
+from notifications.outbox import build_email, queue_email
+
+from . import models
+
+
+def _message(reservation, subject, template, restaurant):
+    customer = reservation.customer
+    if restaurant:
+        subject = f"{subject} at {restaurant.name}"
+    context = {
+        "reservation": reservation,
+        "customer_name": customer.get_full_name() or customer.username,
+        "restaurant": restaurant,
+    }
+    return customer.email, subject, template, context
+
+
+def reservation_confirmed(reservation):
+    return queue_email(
+        *_message(
+            reservation,
+            "Your reservation is confirmed",
+            "emails/reservation_confirmed.txt",
+            models.RestaurantModel.current(),
+        )
+    )
+
+
+def reservation_canceled(reservation):
+    return queue_email(
+        *_message(
+            reservation,
+            "Your reservation is canceled",
+            "emails/reservation_canceled.txt",
+            models.RestaurantModel.current(),
+        )
+    )
+
+
+def reservation_reminders(reservations):
+    """Unsaved reminder emails, stored in bulk by the reminder job
+
+    Returns:
+        _type_: list of OutboxEmail
+    """
+
+    template = get_template("emails/reservation_reminder.txt")
+    restaurant = models.RestaurantModel.current()
+    return [
+        build_email(
+            *_message(reservation, "Reminder: your reservation", template, restaurant)
+        )
+        for reservation in reservations
+    ]
@@ -34,3 +34,29 @@ class CreateTableForm(forms.ModelForm):
         super(CreateTableForm, self).__init__(*args, **kwargs)
         self.helper = FormHelper(self)
         self.helper.form_tag = False
+
+
+class ReservationFilterForm(forms.Form):
+    date_from = forms.DateField(
+        required=False,
+        label="From",
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+    date_to = forms.DateField(
+        required=False,
+        label="To",
+        widget=forms.DateInput(attrs={"type": "date"}),
+    )
+
+    def filter(self, reservations):
+        if not self.is_valid():
+            return reservations
+        if self.cleaned_data["date_from"]:
+            reservations = reservations.filter(
+                reservation_date__gte=self.cleaned_data["date_from"]
+            )
+        if self.cleaned_data["date_to"]:
+            reservations = reservations.filter(
+                reservation_date__lte=self.cleaned_data["date_to"]
+            )
+        return reservations
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from reservation.reminders import REMINDER_BATCH_SIZE, send_reminders
+
+
+class Command(BaseCommand):
+    help = "Email reminders for the reservations starting soon"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=REMINDER_BATCH_SIZE,
+            help="Reminders stored per transaction",
+        )
+
+    def handle(self, *args, **options):
+        sent = send_reminders(batch_size=options["batch_size"])
+        self.stdout.write(f"Sent {sent} reminder(s)")
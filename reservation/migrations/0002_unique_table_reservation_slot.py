@@ -0,0 +1,59 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:10
+
+from django.db import IntegrityError, migrations, models
+
+
+def check_double_bookings(apps, schema_editor):
+    """Refuse to go on while a table slot is booked more than once.
+
+    The bookings are customers' and can not be dropped here: the error lists
+    them with the customers' contact details, cancel or move all but one of
+    each slot and migrate again.
+    """
+
+    ReservationModel = apps.get_model("reservation", "ReservationModel")
+    reservations = ReservationModel.objects.order_by("created_on").values_list(
+        "id",
+        "table__table_number",
+        "reservation_date",
+        "reservation_time",
+        "created_on",
+        "customer__username",
+        "customer__email",
+    )
+    slots = {}
+    for reservation_id, table, date, time, *booking in reservations.iterator():
+        slots.setdefault((table, date, time), []).append((reservation_id, *booking))
+    conflicts = [
+        f"table {table} on {date} at {time}: "
+        + "; ".join(
+            f"reservation {reservation_id} by {username} <{email or 'no email'}>"
+            f" booked {created_on:%Y-%m-%d %H:%M}"
+            for reservation_id, created_on, username, email in bookings
+        )
+        for (table, date, time), bookings in slots.items()
+        if len(bookings) > 1
+    ]
+    if conflicts:
+        raise IntegrityError(
+            "Tables are booked more than once for the same slot, keep one "
+            "reservation of each and migrate again:\n" + "\n".join(conflicts)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservation", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="reservationmodel",
+            constraint=models.UniqueConstraint(
+                fields=("table", "reservation_date", "reservation_time"),
+                name="unique_table_reservation_slot",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservation", "0002_unique_table_reservation_slot"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservationmodel",
+            index=models.Index(
+                fields=["reservation_date", "reservation_time", "id"],
+                name="reservation_date_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reservationmodel",
+            index=models.Index(fields=["-created_on"], name="reservation_created_idx"),
+        ),
+    ]
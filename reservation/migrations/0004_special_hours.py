@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reservation", "0003_reservation_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SpecialHoursModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("opening_hour", models.TimeField(blank=True, null=True)),
+                ("closing_hour", models.TimeField(blank=True, null=True)),
+                ("is_closed", models.BooleanField(default=False)),
+                (
+                    "restaurant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="special_hours",
+                        to="reservation.restaurantmodel",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Special hours",
+                "ordering": ["date"],
+                "unique_together": {("restaurant", "date")},
+            },
+        ),
+    ]
@@ -1,10 +1,22 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError, OperationalError
+from django.db.models import OuterRef, Subquery
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from django.contrib.auth.models import User
+from RestaurantBookingApp import cache
+from . import emails
+import time
 import uuid
 
 
+RESTAURANT_CACHE_KEY = "restaurant"
+RESTAURANT_CACHE_TIMEOUT = 60 * 60
+
+
+class SlotUnavailable(Exception):
+    """Raised when a reservation slot can not be allocated."""
+
+
 class RestaurantModel(models.Model):
     name = models.CharField(max_length=200)
     opening_hour = models.TimeField()
@@ -15,6 +27,75 @@ class RestaurantModel(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def current(cls):
+        """The restaurant, fetched once per cache lifetime.
+        - The cached row is dropped when any restaurant is saved or deleted
+        - None when no restaurant has been created yet
+
+        Returns:
+            _type_: RestaurantModel or None
+        """
+
+        return cache.get_or_set(
+            "reservation",
+            RESTAURANT_CACHE_KEY,
+            lambda: cls.objects.order_by("pk").first(),
+            RESTAURANT_CACHE_TIMEOUT,
+        )
+
+    @staticmethod
+    def forget_current():
+        cache.delete("reservation", RESTAURANT_CACHE_KEY)
+
+
+class SpecialHoursModel(models.Model):
+    """Opening hours overriding the restaurant's regular hours on one date
+    - is_closed marks a blackout date with no reservation slots
+    - Empty hours fall back to the restaurant's regular hours
+    """
+
+    restaurant = models.ForeignKey(
+        RestaurantModel, on_delete=models.CASCADE, related_name="special_hours"
+    )
+    date = models.DateField()
+    opening_hour = models.TimeField(blank=True, null=True)
+    closing_hour = models.TimeField(blank=True, null=True)
+    is_closed = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ("restaurant", "date")
+        ordering = ["date"]
+        verbose_name_plural = "Special hours"
+
+    def __str__(self):
+        if self.is_closed:
+            return f"{self.restaurant.name} closed on {self.date}"
+        return f"{self.restaurant.name} special hours on {self.date}"
+
+
+class TableQuerySet(models.QuerySet):
+    def with_next_reservation(self, date=None):
+        """Annotate every table with its next upcoming reservation.
+        - One correlated subquery per column keeps the whole table list
+          in a single query, however many tables the floor has
+        - Use TableModel.next_reservation to read the result
+
+        Returns:
+            _type_: TableQuerySet
+        """
+
+        upcoming = ReservationModel.objects.filter(
+            table=OuterRef("pk"),
+            reservation_date__gte=date or timezone.now().date(),
+        ).order_by("reservation_date", "reservation_time")
+
+        return self.annotate(
+            next_reservation_id=Subquery(upcoming.values("id")[:1]),
+            next_reservation_date=Subquery(upcoming.values("reservation_date")[:1]),
+            next_reservation_time=Subquery(upcoming.values("reservation_time")[:1]),
+        )
+
 
 class TableModel(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -26,6 +107,8 @@ class TableModel(models.Model):
     )
     seats = models.PositiveIntegerField(validators=[MinValueValidator(1)])
 
+    objects = TableQuerySet.as_manager()
+
     def __str__(self):
         return f"Table #{self.table_number}"
 
@@ -33,6 +116,117 @@ class TableModel(models.Model):
     def get_table_number(self):
         return f"#{self.table_number}"
 
+    @property
+    def next_reservation(self):
+        """Next reservation loaded by TableQuerySet.with_next_reservation()
+        - Only id, date and time are loaded, no extra query is made
+        """
+
+        if getattr(self, "next_reservation_id", None) is None:
+            return None
+        return ReservationModel(
+            id=self.next_reservation_id,
+            table=self,
+            reservation_date=self.next_reservation_date,
+            reservation_time=self.next_reservation_time,
+        )
+
+
+class ReservationQuerySet(models.QuerySet):
+    """Reservation listings ready for rendering.
+    - Every listing joins customer, customer's profile and table, so
+      templates can show them without a query per row
+    """
+
+    def list_ready(self):
+        return self.select_related("customer__profile", "table")
+
+    def today(self):
+        return (
+            self.list_ready()
+            .filter(reservation_date=timezone.now().date())
+            .order_by("reservation_time", "id")
+        )
+
+    def upcoming(self):
+        return (
+            self.list_ready()
+            .filter(reservation_date__gte=timezone.now().date())
+            .order_by("reservation_date", "reservation_time", "id")
+        )
+
+    def past(self):
+        return (
+            self.list_ready()
+            .filter(reservation_date__lt=timezone.now().date())
+            .order_by("-reservation_date", "-reservation_time", "-id")
+        )
+
+    def for_customer(self, customer):
+        return self.list_ready().filter(customer=customer)
+
+
+class ReservationManager(models.Manager.from_queryset(ReservationQuerySet)):
+    # backoff in seconds before retrying a booking that hit a lock
+    allocation_backoff = 0.05
+
+    def allocate(
+        self,
+        customer,
+        table,
+        reservation_date,
+        reservation_time,
+        message=None,
+        retries=3,
+    ):
+        """Atomically book a table for a date and time slot.
+        - The insert itself is the availability check: the unique constraint
+          on (table, date, time) lets the database pick exactly one winner
+          among concurrent bookings, no matter how many workers race for it
+        - Lock timeouts and serialization failures are retried with backoff
+        - The confirmation email is queued in the booking's transaction
+
+        Raises:
+            SlotUnavailable: the slot is taken or the customer already has
+            a reservation at that date and time
+
+        Returns:
+            _type_: ReservationModel
+        """
+
+        for attempt in range(retries + 1):
+            try:
+                try:
+                    with transaction.atomic():
+                        reservation = self.create(
+                            customer=customer,
+                            table=table,
+                            reservation_date=reservation_date,
+                            reservation_time=reservation_time,
+                            message=message,
+                        )
+                        emails.reservation_confirmed(reservation)
+                        return reservation
+                except IntegrityError:
+                    customer_booked = self.filter(
+                        customer=customer,
+                        reservation_date=reservation_date,
+                        reservation_time=reservation_time,
+                    ).exists()
+            except OperationalError:
+                if attempt == retries:
+                    raise
+                time.sleep(min(self.allocation_backoff * 2**attempt, 1))
+                continue
+
+            if customer_booked:
+                raise SlotUnavailable(
+                    "You already have a reservation for the date and time."
+                )
+            raise SlotUnavailable(
+                "This table is already reserved for the date or time."
+            )
+
 
 class ReservationModel(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -47,14 +241,62 @@ class ReservationModel(models.Model):
     message = models.TextField(blank=True, null=True)
     created_on = models.DateTimeField(auto_now_add=True)
 
+    objects = ReservationManager()
+
     def is_valid_date(self):
         return self.reservation_date >= timezone.now().date()
 
+    def cancel(self):
+        """Delete the reservation and queue the cancellation email in the
+        same transaction"""
+
+        with transaction.atomic():
+            self.delete()
+            emails.reservation_canceled(self)
+
     class Meta:
         unique_together = ("customer", "reservation_date", "reservation_time")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["table", "reservation_date", "reservation_time"],
+                name="unique_table_reservation_slot",
+            ),
+        ]
+        # (customer, date, time) and (table, date, time) lookups are served
+        # by the unique constraints above
+        indexes = [
+            models.Index(
+                fields=["reservation_date", "reservation_time", "id"],
+                name="reservation_date_time_idx",
+            ),
+            models.Index(fields=["-created_on"], name="reservation_created_idx"),
+        ]
         ordering = ["-created_on"]
 
     def __str__(self):
         return (
             f"{self.customer.username}'s reservation for {self.table.get_table_number}"
         )
+
+
+class ReservationReminderModel(models.Model):
+    """A reminder sent for a reservation, see reservation/reminders.py
+    - One row per reservation and kind ("24h", "2h") makes reruns send
+      nothing twice
+    """
+
+    reservation = models.ForeignKey(
+        ReservationModel, on_delete=models.CASCADE, related_name="reminders"
+    )
+    kind = models.CharField(max_length=10)
+    sent_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["reservation", "kind"], name="unique_reservation_reminder"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} reminder for reservation {self.reservation_id}"
@@ -0,0 +1,107 @@
+"""Keyset (cursor) pagination for reservation listings.
+
+Pages are sliced on ``(reservation_date, reservation_time, id)`` instead of
+OFFSET/COUNT, so fetching any page costs the same index range scan no
+matter how deep into the history it is, and rows inserted while an admin
+is paging never shift or duplicate entries between pages.
+"""
+import datetime
+import uuid
+
+from django.db.models import Q
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+
+
+KEYSET_FIELDS = ("reservation_date", "reservation_time", "id")
+
+
+def encode_cursor(reservation):
+    value = "|".join(
+        [
+            reservation.reservation_date.isoformat(),
+            reservation.reservation_time.isoformat(),
+            str(reservation.id),
+        ]
+    )
+    return urlsafe_base64_encode(force_bytes(value))
+
+
+def decode_cursor(cursor):
+    """Position encoded by encode_cursor()
+
+    Raises:
+        ValueError: the cursor is malformed
+
+    Returns:
+        _type_: tuple of (date, time, uuid)
+    """
+
+    try:
+        date, time, pk = force_str(urlsafe_base64_decode(cursor)).split("|")
+        return (
+            datetime.date.fromisoformat(date),
+            datetime.time.fromisoformat(time),
+            uuid.UUID(pk),
+        )
+    except (TypeError, ValueError, UnicodeDecodeError) as error:
+        raise ValueError(f"Invalid cursor: {cursor}") from error
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, is_first):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """Paginate reservations by (reservation_date, reservation_time, id)
+    - Newest first when descending, oldest first otherwise
+    - Each page fetches one extra row to know whether another page follows,
+      no COUNT(*) query is made
+    - A malformed cursor starts again from the first page
+    """
+
+    def __init__(self, queryset, per_page, descending=False):
+        self.per_page = per_page
+        self.descending = descending
+        ordering = [f"-{field}" if descending else field for field in KEYSET_FIELDS]
+        self.queryset = queryset.order_by(*ordering)
+
+    def _after(self, date, time, pk):
+        op = "lt" if self.descending else "gt"
+        return (
+            Q(**{f"reservation_date__{op}": date})
+            | Q(reservation_date=date, **{f"reservation_time__{op}": time})
+            | Q(reservation_date=date, reservation_time=time, **{f"id__{op}": pk})
+        )
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        position = None
+        if cursor:
+            try:
+                position = decode_cursor(cursor)
+            except ValueError:
+                position = None
+        if position:
+            queryset = queryset.filter(self._after(*position))
+
+        rows = list(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            next_cursor = encode_cursor(rows[-1])
+
+        return KeysetPage(rows, next_cursor, is_first=position is None)
@@ -0,0 +1,121 @@
+"""Reminder emails sent ahead of reservations.
+
+``send_reminders`` (``manage.py send_reminders``, run every few minutes from
+cron or the Heroku scheduler) emails every customer whose reservation
+starts within one of the RESERVATION_REMINDER_HOURS lead times. A
+reservation gets the reminder of the shortest lead time it falls in, so a
+table booked an hour ahead gets a single "2h" reminder rather than both.
+
+Reservations starting within the longest lead time are read with one range
+query on the (reservation_date, reservation_time, id) index, the reminders
+already sent for them with one more. New reminders and their outbox emails
+are stored with bulk inserts, one transaction per batch, so reruns send
+nothing twice. A batch colliding with a concurrent run is skipped and its
+remaining reminders are sent by the next run.
+"""
+import datetime
+import logging
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications.outbox import queue_emails
+
+from .emails import reservation_reminders
+from .models import ReservationModel, ReservationReminderModel
+
+
+logger = logging.getLogger(__name__)
+
+REMINDER_BATCH_SIZE = 1000
+
+
+def reminder_hours():
+    return sorted(getattr(settings, "RESERVATION_REMINDER_HOURS", [24, 2]))
+
+
+def starting_between(start, end):
+    """Reservations starting after ``start`` and no later than ``end``,
+    as a range on the (reservation_date, reservation_time) index"""
+
+    start, end = timezone.localtime(start), timezone.localtime(end)
+    return ReservationModel.objects.filter(
+        Q(reservation_date__gt=start.date())
+        | Q(reservation_date=start.date(), reservation_time__gt=start.time()),
+        Q(reservation_date__lt=end.date())
+        | Q(reservation_date=end.date(), reservation_time__lte=end.time()),
+        reservation_date__range=(start.date(), end.date()),
+    )
+
+
+def reminder_kind(reservation, now, hours):
+    """Reminder due for ``reservation`` at ``now``, None when it is not in
+    any window"""
+
+    starts_at = timezone.make_aware(
+        datetime.datetime.combine(
+            reservation.reservation_date, reservation.reservation_time
+        )
+    )
+    lead = starts_at - now
+    for lead_hours in hours:
+        if lead <= datetime.timedelta(hours=lead_hours):
+            return f"{lead_hours}h"
+    return None
+
+
+def due_reminders(now, batch_size=REMINDER_BATCH_SIZE):
+    """Reminders due at ``now`` that were not sent yet, soonest first
+
+    Returns:
+        _type_: iterator of (reservation, kind)
+    """
+
+    hours = reminder_hours()
+    upcoming = starting_between(now, now + datetime.timedelta(hours=hours[-1]))
+    sent = set(
+        ReservationReminderModel.objects.filter(
+            reservation__in=upcoming.values("id")
+        ).values_list("reservation_id", "kind")
+    )
+    reservations = upcoming.select_related("customer", "table").order_by(
+        "reservation_date", "reservation_time", "id"
+    )
+    for reservation in reservations.iterator(chunk_size=batch_size):
+        kind = reminder_kind(reservation, now, hours)
+        if kind and (reservation.id, kind) not in sent:
+            yield reservation, kind
+
+
+def send_reminders(now=None, batch_size=REMINDER_BATCH_SIZE):
+    """Record and queue every reminder due at ``now``
+
+    Returns:
+        _type_: number of reminders sent
+    """
+
+    due = due_reminders(now or timezone.now(), batch_size)
+    sent = 0
+    while True:
+        batch = list(islice(due, batch_size))
+        if not batch:
+            break
+        try:
+            with transaction.atomic():
+                ReservationReminderModel.objects.bulk_create(
+                    [
+                        ReservationReminderModel(reservation=reservation, kind=kind)
+                        for reservation, kind in batch
+                    ]
+                )
+                queue_emails(
+                    reservation_reminders(reservation for reservation, _ in batch)
+                )
+        except IntegrityError:
+            logger.warning("Skipped %d reminders sent by another run", len(batch))
+            continue
+        sent += len(batch)
+    return sent
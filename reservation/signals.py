@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import RestaurantModel, SpecialHoursModel, TableModel, ReservationModel
+from .availability import booking_window, invalidate_dates
+from .slots import invalidate_schedule
+
+
+def invalidate(func, *args):
+    """Drop cached values now and again once the change is committed.
+    - A request reading the cache between the two would otherwise cache
+      the rows as they were before the commit
+    - Dropping them now keeps reads later in the same transaction fresh
+    """
+
+    func(*args)
+    transaction.on_commit(lambda: func(*args))
+
+
+@receiver(pre_save, sender=ReservationModel)
+def invalidate_previous_reservation_date(sender, instance, **kwargs):
+    # a reservation moved to another date frees its old slot too
+    if not instance._state.adding:
+        previous = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("reservation_date", flat=True)
+            .first()
+        )
+        if previous and previous != instance.reservation_date:
+            invalidate(invalidate_dates, [previous])
+
+
+@receiver(post_save, sender=ReservationModel)
+@receiver(post_delete, sender=ReservationModel)
+def invalidate_reservation_date(sender, instance, **kwargs):
+    invalidate(invalidate_dates, [instance.reservation_date])
+
+
+@receiver(post_save, sender=TableModel)
+@receiver(post_delete, sender=TableModel)
+def invalidate_booking_window(sender, instance, **kwargs):
+    # occupancy bitmaps are keyed by table number
+    invalidate(invalidate_dates, booking_window())
+
+
+@receiver(post_save, sender=RestaurantModel)
+@receiver(post_delete, sender=RestaurantModel)
+@receiver(post_save, sender=SpecialHoursModel)
+@receiver(post_delete, sender=SpecialHoursModel)
+def invalidate_opening_hours(sender, instance, **kwargs):
+    invalidate(invalidate_schedule)
+
+
+@receiver(post_save, sender=RestaurantModel)
+@receiver(post_delete, sender=RestaurantModel)
+def invalidate_current_restaurant(sender, instance, **kwargs):
+    invalidate(RestaurantModel.forget_current)
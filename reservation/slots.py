@@ -0,0 +1,103 @@
+"""Reservation time slots derived from the restaurant's opening hours.
+
+Slots for a date start at the opening hour and repeat every
+``RESERVATION_SLOT_MINUTES`` as long as a slot still ends by the closing
+hour. A ``SpecialHoursModel`` row for the date overrides the regular hours
+or closes the restaurant for the day.
+
+Generated schedules are memoized per date in the ``reservation.slots``
+cache namespace, which is invalidated whenever the restaurant or its
+special hours are saved, so admins can change hours without a deploy and
+without waiting for the cache to expire.
+"""
+
+import datetime
+
+from django.conf import settings
+
+from RestaurantBookingApp import cache
+
+from .models import RestaurantModel, SpecialHoursModel
+
+SLOT_MINUTES = getattr(settings, "RESERVATION_SLOT_MINUTES", 60)
+SLOTS_CACHE_NAMESPACE = "reservation.slots"
+SLOTS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def generate_slots(opening_hour, closing_hour, slot_minutes=SLOT_MINUTES):
+    """Start times of every slot between opening and closing hour.
+    - A closing hour at or before the opening hour closes at midnight
+
+    Returns:
+        _type_: list of "HH:MM" strings
+    """
+
+    day = datetime.date.min
+    start = datetime.datetime.combine(day, opening_hour)
+    end = datetime.datetime.combine(day, closing_hour)
+    if end <= start:
+        end = datetime.datetime.combine(
+            day + datetime.timedelta(days=1), datetime.time()
+        )
+    length = datetime.timedelta(minutes=slot_minutes)
+
+    slots = []
+    while start + length <= end:
+        slots.append(start.strftime("%H:%M"))
+        start += length
+    return slots
+
+
+def invalidate_schedule():
+    """Drop every memoized schedule after the opening hours changed"""
+
+    cache.invalidate(SLOTS_CACHE_NAMESPACE)
+
+
+def slots_for_dates(dates, restaurant=None):
+    """Reservation slots for every date in ``dates``.
+
+    Returns:
+        _type_: dict of {date: list of "HH:MM" strings}
+    """
+
+    keys = {date.isoformat(): date for date in dates}
+    schedule = {
+        keys[key]: slots
+        for key, slots in cache.get_many(SLOTS_CACHE_NAMESPACE, keys).items()
+    }
+    missing = [date for date in dates if date not in schedule]
+
+    if missing:
+        restaurant = restaurant or RestaurantModel.current()
+        overrides = {}
+        if restaurant:
+            overrides = {
+                special.date: special
+                for special in SpecialHoursModel.objects.filter(
+                    restaurant=restaurant, date__range=(min(missing), max(missing))
+                )
+            }
+
+        generated = {}
+        for date in missing:
+            special = overrides.get(date)
+            if restaurant is None or (special and special.is_closed):
+                generated[date] = []
+            else:
+                generated[date] = generate_slots(
+                    special and special.opening_hour or restaurant.opening_hour,
+                    special and special.closing_hour or restaurant.closing_hour,
+                )
+        cache.set_many(
+            SLOTS_CACHE_NAMESPACE,
+            {date.isoformat(): slots for date, slots in generated.items()},
+            SLOTS_CACHE_TIMEOUT,
+        )
+        schedule.update(generated)
+
+    return schedule
+
+
+def slots_for_date(date, restaurant=None):
+    return slots_for_dates([date], restaurant)[date]
@@ -1,13 +1,37 @@
 from django.shortcuts import reverse
-from django.test import TestCase
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from django.utils.dateparse import parse_time
 import datetime
+import re
+from io import StringIO
+import threading
 
+from django.core.cache import cache
 from django.utils import timezone
-
-from .models import RestaurantModel, TableModel, ReservationModel
+from django.contrib.messages import constants
+
+from RestaurantBookingApp import cache as namespaced_cache
+from food_menus.models import MenuModel
+from notifications.models import OutboxEmail
+
+from .models import (
+    RestaurantModel,
+    TableModel,
+    ReservationModel,
+    SlotUnavailable,
+    SpecialHoursModel,
+    ReservationReminderModel,
+)
 from .forms import CreateRestaurantForm, CreateTableForm
+from .availability import _cache_key, build_availability, get_occupancy
+from .pagination import KeysetPaginator
+from .reminders import send_reminders
+from .slots import generate_slots, slots_for_date
 
 
 class ReservationModelTest(TestCase):
@@ -242,6 +266,7 @@ class ReservationViewTest(TestCase):
         self.assertIn("restaurant", response.context)
         self.assertIn("tables", response.context)
         self.assertIn("available_times", response.context)
+        self.assertIn("availability", response.context)
 
     def test_admin_login_view_should_return_200(self):
         """admin login view should return 200"""
@@ -477,5 +502,841 @@ class ReservationUrlsTest(TestCase):
         self.assertEqual(reverse("user_reservations"), "/reservations/my-reservations/")
         self.assertEqual(reverse("admin_add"), "/reservations/admin/add")
         self.assertEqual(reverse("todays_reservations"), "/reservations/admin/todays/")
-        self.assertEqual(reverse("upcoming_reservations"), "/reservations/admin/upcoming/")
+        self.assertEqual(
+            reverse("upcoming_reservations"), "/reservations/admin/upcoming/"
+        )
         self.assertEqual(reverse("past_reservations"), "/reservations/admin/past/")
+
+
+class SlotAvailabilityTest(TestCase):
+    """Check the availability index only offers free table/slot combinations"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="guest", email="guest@mail.com", password="guest123"
+        )
+        self.restaurant = RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="10:00", closing_hour="18:00"
+        )
+        self.table_1 = TableModel.objects.create(
+            restaurant=self.restaurant, table_number=1, seats=2
+        )
+        self.table_2 = TableModel.objects.create(
+            restaurant=self.restaurant, table_number=2, seats=4
+        )
+        self.tables = TableModel.objects.all()
+        self.date = timezone.now().date() + datetime.timedelta(days=1)
+        self.date_key = self.date.strftime("%m/%d/%Y")
+
+    def book(self, table, time="12:00"):
+        return ReservationModel.objects.create(
+            customer=self.user,
+            table=table,
+            reservation_date=self.date,
+            reservation_time=parse_time(time),
+        )
+
+    def test_booked_table_should_not_be_offered_for_its_slot(self):
+        """a booked table should only disappear from its own time slot"""
+
+        self.book(self.table_1)
+        availability = build_availability(self.tables, {self.date: ["12:00", "13:00"]})
+        self.assertEqual(availability[self.date_key]["12:00"], [2])
+        self.assertEqual(availability[self.date_key]["13:00"], [1, 2])
+
+    def test_canceled_reservation_should_free_the_slot(self):
+        """canceling a reservation should make its slot available again"""
+
+        reservation = self.book(self.table_1)
+        build_availability(self.tables, {self.date: ["12:00"]})
+        reservation.delete()
+        availability = build_availability(self.tables, {self.date: ["12:00"]})
+        self.assertEqual(availability[self.date_key]["12:00"], [1, 2])
+
+    def test_new_reservation_should_refresh_cached_occupancy(self):
+        """creating a reservation should invalidate the cached date"""
+
+        build_availability(self.tables, {self.date: ["12:00"]})
+        self.book(self.table_2)
+        availability = build_availability(self.tables, {self.date: ["12:00"]})
+        self.assertEqual(availability[self.date_key]["12:00"], [1])
+
+    def test_occupancy_cached_before_commit_should_be_dropped(self):
+        """occupancy cached by another request while a booking commits should
+        not outlive the commit"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.table_2)
+            # a concurrent request, not seeing the booking yet, caches the slot free
+            namespaced_cache.set("reservation", _cache_key(self.date), {})
+        availability = build_availability(self.tables, {self.date: ["12:00"]})
+        self.assertEqual(availability[self.date_key]["12:00"], [1])
+
+    def test_cached_occupancy_should_not_query_database(self):
+        """a warm availability index should be served from the cache"""
+
+        self.book(self.table_1)
+        get_occupancy([self.date])
+        with self.assertNumQueries(0):
+            occupancy = get_occupancy([self.date])
+        self.assertEqual(occupancy[self.date], {parse_time("12:00"): 1 << 1})
+
+
+class ReservationAllocationTest(TestCase):
+    """Check a table slot can only be allocated once"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="guest", email="guest@mail.com", password="guest123"
+        )
+        self.other_user = User.objects.create_user(
+            username="other", email="other@mail.com", password="other123"
+        )
+        self.client.force_login(self.user)
+        self.restaurant = RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="10:00", closing_hour="18:00"
+        )
+        self.table = TableModel.objects.create(
+            restaurant=self.restaurant, table_number=1, seats=2
+        )
+        self.date = timezone.now().date() + datetime.timedelta(days=1)
+
+    def allocate(self, customer, table=None):
+        return ReservationModel.objects.allocate(
+            customer=customer,
+            table=table or self.table,
+            reservation_date=self.date,
+            reservation_time=parse_time("12:00"),
+        )
+
+    def test_allocate_should_create_reservation(self):
+        """allocating a free slot should create the reservation"""
+
+        reservation = self.allocate(self.user)
+        self.assertEqual(ReservationModel.objects.get(), reservation)
+
+    def test_allocate_should_reject_booked_table_slot(self):
+        """another customer should not be able to book a taken table slot"""
+
+        self.allocate(self.user)
+        with self.assertRaisesMessage(SlotUnavailable, "already reserved"):
+            self.allocate(self.other_user)
+        self.assertEqual(ReservationModel.objects.count(), 1)
+
+    def test_allocate_should_reject_customer_double_booking(self):
+        """a customer should not hold two tables for the same slot"""
+
+        other_table = TableModel.objects.create(
+            restaurant=self.restaurant, table_number=2, seats=4
+        )
+        self.allocate(self.user)
+        with self.assertRaisesMessage(SlotUnavailable, "You already have"):
+            self.allocate(self.user, table=other_table)
+
+    def test_make_reservation_post_should_not_double_book(self):
+        """posting a taken slot should redirect back without booking"""
+
+        self.allocate(self.other_user)
+        response = self.client.post(
+            reverse("make_reservation"),
+            data={
+                "date": self.date.strftime("%m/%d/%Y"),
+                "time": "12:00",
+                "table_size": "1",
+                "message": "",
+            },
+        )
+        self.assertRedirects(response, reverse("make_reservation"))
+        self.assertFalse(ReservationModel.objects.filter(customer=self.user).exists())
+
+    def test_allocate_should_queue_confirmation_email(self):
+        """a booking should leave its confirmation email in the outbox"""
+
+        self.allocate(self.user)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, "guest@mail.com")
+        self.assertEqual(
+            email.subject, "Your reservation is confirmed at test_restaurant"
+        )
+        self.assertIn("Table: #1", email.body)
+        self.assertEqual(email.status, OutboxEmail.PENDING)
+
+    def test_rejected_booking_should_queue_no_email(self):
+        """a booking that lost the slot should not send a confirmation"""
+
+        self.allocate(self.other_user)
+        with self.assertRaises(SlotUnavailable):
+            self.allocate(self.user)
+        self.assertEqual(
+            list(OutboxEmail.objects.values_list("to", flat=True)), ["other@mail.com"]
+        )
+
+    def test_cancel_should_queue_cancellation_email(self):
+        """canceling should delete the reservation and queue an email"""
+
+        reservation = self.allocate(self.user)
+        reservation.cancel()
+        self.assertFalse(ReservationModel.objects.exists())
+        email = OutboxEmail.objects.latest("id")
+        self.assertEqual(
+            email.subject, "Your reservation is canceled at test_restaurant"
+        )
+        self.assertIn("table #1", email.body)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_confirmation_should_be_sent_after_commit(self):
+        """the worker should send the confirmation once the booking commits"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.allocate(self.user)
+            self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["guest@mail.com"])
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.SENT)
+
+
+class ReservationReminderTest(TestCase):
+    """Check reminders go out once, in the right window"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="guest", email="guest@mail.com", password="guest123"
+        )
+        restaurant = RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="00:00", closing_hour="23:59"
+        )
+        self.tables = [
+            TableModel.objects.create(restaurant=restaurant, table_number=n, seats=2)
+            for n in range(1, 5)
+        ]
+        self.now = timezone.make_aware(datetime.datetime(2030, 1, 10, 23, 0))
+
+    def reserve(self, hours, table=0):
+        starts_at = self.now + datetime.timedelta(hours=hours)
+        return ReservationModel.objects.create(
+            customer=self.user,
+            table=self.tables[table],
+            reservation_date=starts_at.date(),
+            reservation_time=starts_at.time(),
+        )
+
+    def reminders(self):
+        return set(
+            ReservationReminderModel.objects.values_list("reservation_id", "kind")
+        )
+
+    def test_reminders_should_be_sent_in_their_window(self):
+        """each reservation should get the reminder of the shortest window
+        it is in"""
+
+        day_ahead = self.reserve(23, table=0)
+        soon = self.reserve(1.5, table=1)
+        self.reserve(30, table=2)
+        self.reserve(-1, table=3)
+
+        self.assertEqual(send_reminders(self.now), 2)
+        self.assertEqual(self.reminders(), {(day_ahead.id, "24h"), (soon.id, "2h")})
+        email = OutboxEmail.objects.get(body__contains="table #2")
+        self.assertEqual(email.to, "guest@mail.com")
+        self.assertEqual(email.subject, "Reminder: your reservation at test_restaurant")
+
+    def test_rerun_should_send_nothing_twice(self):
+        """a rerun should only send the reminders that became due since"""
+
+        reservation = self.reserve(23)
+        send_reminders(self.now)
+        self.assertEqual(send_reminders(self.now), 0)
+
+        later = self.now + datetime.timedelta(hours=22)
+        self.assertEqual(send_reminders(later), 1)
+        self.assertEqual(
+            self.reminders(), {(reservation.id, "24h"), (reservation.id, "2h")}
+        )
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+
+    def test_reminders_should_be_stored_in_bulk(self):
+        """the queries made should not grow with the number of reminders"""
+
+        for table in range(4):
+            self.reserve(1 + table, table=table)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(send_reminders(self.now), 4)
+        # sent reminders, reservations, the restaurant, then one transaction
+        # with the reminder and email inserts and the dispatch task
+        self.assertLessEqual(len(queries), 9)
+
+    def test_send_reminders_command(self):
+        """send_reminders should report the reminders it sent"""
+
+        self.now = timezone.now()
+        self.reserve(1)
+        out = StringIO()
+        call_command("send_reminders", stdout=out)
+        self.assertIn("Sent 1 reminder(s)", out.getvalue())
+
+
+class ConcurrentReservationAllocationTest(TransactionTestCase):
+    """Hammer one hot slot from many threads and check nobody double books"""
+
+    workers = 12
+
+    def setUp(self):
+        self.restaurant = RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="10:00", closing_hour="18:00"
+        )
+        self.table = TableModel.objects.create(
+            restaurant=self.restaurant, table_number=1, seats=2
+        )
+        self.customers = [
+            User.objects.create_user(username=f"guest{i}") for i in range(self.workers)
+        ]
+        self.date = timezone.now().date() + datetime.timedelta(days=1)
+
+    def test_concurrent_allocation_should_not_double_book(self):
+        """exactly one of many simultaneous bookings should win the slot"""
+
+        barrier = threading.Barrier(self.workers)
+        results = []
+
+        def book(customer):
+            try:
+                barrier.wait()
+                ReservationModel.objects.allocate(
+                    customer=customer,
+                    table=self.table,
+                    reservation_date=self.date,
+                    reservation_time=parse_time("19:00"),
+                    retries=20,
+                )
+                results.append("booked")
+            except SlotUnavailable:
+                results.append("unavailable")
+            except Exception as error:
+                results.append(repr(error))
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=book, args=(customer,))
+            for customer in self.customers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count("booked"), 1, results)
+        self.assertEqual(results.count("unavailable"), self.workers - 1, results)
+        self.assertEqual(
+            ReservationModel.objects.filter(
+                table=self.table, reservation_date=self.date
+            ).count(),
+            1,
+        )
+
+
+class TableNextReservationTest(TestCase):
+    """Check tables are annotated with their next reservation in one query"""
+
+    def setUp(self):
+        self.restaurant = RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="10:00", closing_hour="18:00"
+        )
+        self.today = timezone.now().date()
+        for number in range(1, 6):
+            customer = User.objects.create_user(username=f"guest{number}")
+            table = TableModel.objects.create(
+                restaurant=self.restaurant, table_number=number, seats=2
+            )
+            for days, time in ((-1, "12:00"), (3, "15:00"), (2, "18:00")):
+                ReservationModel.objects.create(
+                    customer=customer,
+                    table=table,
+                    reservation_date=self.today + datetime.timedelta(days=days),
+                    reservation_time=parse_time(time),
+                )
+        self.empty_table = TableModel.objects.create(
+            restaurant=self.restaurant, table_number=6, seats=8
+        )
+
+    def test_next_reservation_should_be_earliest_upcoming(self):
+        """the annotated reservation should be the earliest upcoming one"""
+
+        table = TableModel.objects.with_next_reservation().get(table_number=1)
+        self.assertEqual(
+            table.next_reservation.reservation_date,
+            self.today + datetime.timedelta(days=2),
+        )
+        self.assertEqual(table.next_reservation.reservation_time, parse_time("18:00"))
+
+    def test_table_without_reservations_should_have_none(self):
+        """a table with no upcoming reservation should have none"""
+
+        table = TableModel.objects.with_next_reservation().get(table_number=6)
+        self.assertIsNone(table.next_reservation)
+
+    def test_next_reservation_should_use_single_query(self):
+        """all tables and their next reservations should load in one query"""
+
+        with self.assertNumQueries(1):
+            pairs = [
+                (table, table.next_reservation)
+                for table in TableModel.objects.with_next_reservation()
+            ]
+        self.assertEqual(len(pairs), 6)
+
+
+class ReservationListingTest(TestCase):
+    """Check reservation listings load customers, profiles and tables up front"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="test123", email="test123@mail.com", password="test123"
+        )
+        self.client.force_login(self.admin)
+        self.restaurant = RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="10:00", closing_hour="18:00"
+        )
+        self.today = timezone.now().date()
+
+    def add_reservations(self, count, customer=None):
+        for number in range(1, count + 1):
+            table = TableModel.objects.create(
+                restaurant=self.restaurant, table_number=number, seats=2
+            )
+            for days in (-2, 0, 2):
+                ReservationModel.objects.create(
+                    customer=customer or self.admin,
+                    table=table,
+                    reservation_date=self.today + datetime.timedelta(days=days),
+                    reservation_time=parse_time(f"{9 + number}:00"),
+                )
+
+    def test_listing_methods_should_filter_by_date(self):
+        """today, upcoming and past should split reservations by date"""
+
+        customer = User.objects.create_user(username="guest")
+        self.add_reservations(2, customer=customer)
+        self.assertEqual(ReservationModel.objects.today().count(), 2)
+        self.assertEqual(ReservationModel.objects.upcoming().count(), 4)
+        self.assertEqual(ReservationModel.objects.past().count(), 2)
+        self.assertEqual(ReservationModel.objects.for_customer(customer).count(), 6)
+        self.assertEqual(ReservationModel.objects.for_customer(self.admin).count(), 0)
+
+    def test_listing_rows_should_not_query_related_objects(self):
+        """rendering a listing row should not hit the database"""
+
+        self.add_reservations(3)
+        with self.assertNumQueries(1):
+            for reservation in ReservationModel.objects.upcoming():
+                reservation.customer.profile.name
+                reservation.table.seats
+
+    def test_listing_views_query_count_should_not_grow_with_rows(self):
+        """listing views should make the same number of queries for any size"""
+
+        urls = [
+            reverse("todays_reservations"),
+            reverse("upcoming_reservations"),
+            reverse("past_reservations"),
+            reverse("user_reservations"),
+        ]
+        self.add_reservations(1)
+        counts = {}
+        for url in urls:
+            # warm the per-session role cache first
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            counts[url] = len(queries)
+
+        TableModel.objects.all().delete()
+        self.add_reservations(5)
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            self.assertEqual(len(queries), counts[url], url)
+
+
+class ReservationKeysetPaginationTest(TestCase):
+    """Check admin listings are cursor paginated and date filtered"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="test123", email="test123@mail.com", password="test123"
+        )
+        self.client.force_login(self.admin)
+        restaurant = RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="10:00", closing_hour="18:00"
+        )
+        self.today = timezone.now().date()
+        for number in range(1, 4):
+            table = TableModel.objects.create(
+                restaurant=restaurant, table_number=number, seats=2
+            )
+            for days in range(-5, 0):
+                ReservationModel.objects.create(
+                    customer=User.objects.create_user(username=f"guest{number}{days}"),
+                    table=table,
+                    reservation_date=self.today + datetime.timedelta(days=days),
+                    reservation_time=parse_time("12:00"),
+                )
+
+    def collect_pages(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            pages.append(page.object_list)
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_should_cover_every_row_once_in_order(self):
+        """walking all pages should return every reservation exactly once"""
+
+        paginator = KeysetPaginator(ReservationModel.objects.all(), 4)
+        pages = self.collect_pages(paginator)
+        rows = [reservation for page in pages for reservation in page]
+        self.assertEqual([len(page) for page in pages], [4, 4, 4, 3])
+        self.assertEqual(
+            [r.id for r in rows],
+            list(
+                ReservationModel.objects.order_by(
+                    "reservation_date", "reservation_time", "id"
+                ).values_list("id", flat=True)
+            ),
+        )
+
+    def test_descending_pages_should_start_with_newest(self):
+        """descending pagination should walk from the newest reservation"""
+
+        paginator = KeysetPaginator(ReservationModel.objects.all(), 6, descending=True)
+        pages = self.collect_pages(paginator)
+        dates = [r.reservation_date for page in pages for r in page]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(len(dates), 15)
+
+    def test_page_should_not_count_rows(self):
+        """a page should be fetched with a single query and no COUNT"""
+
+        paginator = KeysetPaginator(ReservationModel.objects.past(), 4)
+        cursor = paginator.page().next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            paginator.page(cursor)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("COUNT", queries[0]["sql"].upper())
+
+    def test_invalid_cursor_should_start_from_first_page(self):
+        """a malformed cursor should fall back to the first page"""
+
+        page = KeysetPaginator(ReservationModel.objects.all(), 4).page("not-a-cursor")
+        self.assertTrue(page.is_first)
+        self.assertEqual(len(page), 4)
+
+    def test_past_view_should_paginate_and_filter_by_date(self):
+        """past reservations view should filter dates and link the next page"""
+
+        date_from = self.today - datetime.timedelta(days=2)
+        response = self.client.get(
+            reverse("past_reservations"), {"date_from": date_from.isoformat()}
+        )
+        reservations = response.context["reservations"]
+        self.assertEqual(len(reservations), 6)
+        self.assertTrue(all(r.reservation_date >= date_from for r in reservations))
+        self.assertFalse(response.context["page"].has_next)
+        self.assertEqual(response.context["filter_query"], f"date_from={date_from}")
+
+
+class ReservationIndexUsageTest(TestCase):
+    """Check every reservation listing is answered by an index, not a table scan"""
+
+    full_scan_patterns = {
+        "sqlite": re.compile(r"\bSCAN (reservation_reservationmodel|U\d+)\b(?! USING)"),
+        "postgresql": re.compile(r"Seq Scan on reservation_reservationmodel"),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username="test123", email="test123@mail.com", password="test123"
+        )
+        restaurant = RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="10:00", closing_hour="18:00"
+        )
+        tables = [
+            TableModel.objects.create(restaurant=restaurant, table_number=n, seats=2)
+            for n in range(1, 21)
+        ]
+        customers = [cls.admin] + [
+            User.objects.create_user(username=f"guest{n}") for n in range(1, 20)
+        ]
+        today = timezone.now().date()
+        ReservationModel.objects.bulk_create(
+            ReservationModel(
+                customer=customer,
+                table=table,
+                reservation_date=today + datetime.timedelta(days=days),
+                reservation_time=datetime.time(hour),
+            )
+            for days in range(-60, 60)
+            for hour in (12, 13, 14, 15)
+            for table, customer in zip(tables, customers)
+        )
+        with connection.cursor() as cursor:
+            if connection.vendor in ("sqlite", "postgresql"):
+                cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def explain(self, sql):
+        prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+
+    def assert_view_uses_indexes(self, url, data=None):
+        pattern = self.full_scan_patterns.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f"No query plan check for {connection.vendor}")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+
+        reservation_queries = [
+            query["sql"]
+            for query in queries
+            if "reservation_reservationmodel" in query["sql"]
+        ]
+        self.assertTrue(reservation_queries, url)
+        for sql in reservation_queries:
+            plan = self.explain(sql)
+            self.assertIsNone(pattern.search(plan), f"{url}\n{sql}\n{plan}")
+
+    def test_admin_listings_should_use_indexes(self):
+        """today, upcoming and past listings should search an index"""
+
+        self.assert_view_uses_indexes(reverse("todays_reservations"))
+        self.assert_view_uses_indexes(reverse("upcoming_reservations"))
+        self.assert_view_uses_indexes(reverse("past_reservations"))
+
+    def test_admin_listing_later_page_should_use_indexes(self):
+        """a later keyset page with a date filter should search an index"""
+
+        response = self.client.get(reverse("past_reservations"))
+        self.assert_view_uses_indexes(
+            reverse("past_reservations"),
+            {
+                "cursor": response.context["page"].next_cursor,
+                "date_from": (timezone.now().date() - datetime.timedelta(days=30)),
+            },
+        )
+
+    def test_admin_dashboard_should_use_indexes(self):
+        """the next reservation of every table should come from an index"""
+
+        self.assert_view_uses_indexes(reverse("admin_dashboard"))
+
+    def test_customer_views_should_use_indexes(self):
+        """customer reservations and the booking page should search an index"""
+
+        self.assert_view_uses_indexes(reverse("user_reservations"))
+        self.assert_view_uses_indexes(reverse("make_reservation"))
+
+
+class ReservationSlotsTest(TestCase):
+    """Check reservation slots follow the restaurant's opening hours"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="guest", email="guest@mail.com", password="guest123"
+        )
+        self.client.force_login(self.user)
+        self.restaurant = RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="12:00", closing_hour="16:00"
+        )
+        TableModel.objects.create(restaurant=self.restaurant, table_number=1, seats=2)
+        self.date = timezone.now().date() + datetime.timedelta(days=1)
+
+    def test_generate_slots_should_fit_between_opening_and_closing(self):
+        """every slot should start at opening hour and end by closing hour"""
+
+        self.assertEqual(
+            generate_slots(parse_time("12:00"), parse_time("16:00")),
+            ["12:00", "13:00", "14:00", "15:00"],
+        )
+        self.assertEqual(
+            generate_slots(parse_time("12:00"), parse_time("13:45"), 30),
+            ["12:00", "12:30", "13:00"],
+        )
+        self.assertEqual(
+            generate_slots(parse_time("22:00"), parse_time("02:00")),
+            ["22:00", "23:00"],
+        )
+
+    def test_slots_should_follow_updated_opening_hours(self):
+        """saving the restaurant should regenerate memoized slots"""
+
+        self.assertEqual(
+            slots_for_date(self.date), ["12:00", "13:00", "14:00", "15:00"]
+        )
+        self.restaurant.closing_hour = parse_time("14:00")
+        self.restaurant.save()
+        self.assertEqual(slots_for_date(self.date), ["12:00", "13:00"])
+
+    def test_special_hours_should_override_regular_hours(self):
+        """special hours and blackout dates should override regular hours"""
+
+        SpecialHoursModel.objects.create(
+            restaurant=self.restaurant,
+            date=self.date,
+            opening_hour=parse_time("18:00"),
+            closing_hour=parse_time("20:00"),
+        )
+        self.assertEqual(slots_for_date(self.date), ["18:00", "19:00"])
+        blackout = self.date + datetime.timedelta(days=1)
+        SpecialHoursModel.objects.create(
+            restaurant=self.restaurant, date=blackout, is_closed=True
+        )
+        self.assertEqual(slots_for_date(blackout), [])
+
+    def test_memoized_slots_should_not_query_database(self):
+        """a memoized date should be served from the cache"""
+
+        slots_for_date(self.date)
+        with self.assertNumQueries(0):
+            slots_for_date(self.date)
+
+    def test_booking_page_should_offer_generated_slots(self):
+        """the booking page should offer the restaurant's slots"""
+
+        response = self.client.get(reverse("make_reservation"))
+        self.assertEqual(
+            response.context["available_times"], ["12:00", "13:00", "14:00", "15:00"]
+        )
+        availability = response.context["availability"]
+        self.assertEqual(availability[self.date.strftime("%m/%d/%Y")]["15:00"], [1])
+
+    def test_booking_outside_opening_hours_should_be_rejected(self):
+        """a reservation outside the slots should not be created"""
+
+        response = self.client.post(
+            reverse("make_reservation"),
+            data={
+                "date": self.date.strftime("%m/%d/%Y"),
+                "time": "10:00",
+                "table_size": "1",
+                "message": "",
+            },
+        )
+        self.assertRedirects(response, reverse("make_reservation"))
+        self.assertFalse(ReservationModel.objects.exists())
+
+
+class CurrentRestaurantTest(TestCase):
+    """Check the restaurant is fetched once and refreshed when it changes"""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="test123", email="test123@mail.com", password="test123"
+        )
+        self.client.force_login(self.user)
+
+    def test_current_should_be_none_without_restaurant(self):
+        """current restaurant should be None before one is created"""
+
+        self.assertIsNone(RestaurantModel.current())
+
+    def test_current_should_be_cached(self):
+        """current restaurant should be served from the cache"""
+
+        RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="10:00", closing_hour="18:00"
+        )
+        RestaurantModel.current()
+        with self.assertNumQueries(0):
+            self.assertEqual(RestaurantModel.current().name, "test_restaurant")
+
+    def test_current_should_refresh_after_save(self):
+        """saving the restaurant should refresh the cached row"""
+
+        self.assertIsNone(RestaurantModel.current())
+        restaurant = RestaurantModel.objects.create(
+            name="test_restaurant", opening_hour="10:00", closing_hour="18:00"
+        )
+        self.assertEqual(RestaurantModel.current(), restaurant)
+        restaurant.name = "renamed"
+        restaurant.save()
+        self.assertEqual(RestaurantModel.current().name, "renamed")
+        restaurant.delete()
+        self.assertIsNone(RestaurantModel.current())
+
+    def test_create_restaurant_view_without_restaurant(self):
+        """create restaurant view should render when no restaurant exists"""
+
+        response = self.client.get(reverse("create_restaurant"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "restaurant_admin/create_restaurant.html")
+
+    def test_add_table_view_without_restaurant(self):
+        """adding a table without a restaurant should redirect to dashboard"""
+
+        response = self.client.post(
+            reverse("add_table"), data={"table_number": 1, "seats": 2}
+        )
+        self.assertRedirects(response, reverse("admin_dashboard"))
+        self.assertFalse(TableModel.objects.exists())
+
+
+class HomePageCacheTest(TestCase):
+    """Check the anonymous home page is served from the cache"""
+
+    def setUp(self):
+        self.menu = MenuModel.objects.create(
+            name="menu1",
+            food_items="item_a, item_b",
+            price=10,
+            menu_image="menu_images/menu.jpg",
+        )
+        self.url = reverse("index")
+
+    def test_anonymous_home_page_should_be_cached(self):
+        """a repeat anonymous visit should make no query and no render"""
+
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertIsNone(response.context)
+        self.assertContains(response, "menu1")
+        self.assertIn("Cookie", response["Vary"])
+
+    def test_menu_change_should_refresh_home_page(self):
+        """saving a menu should drop the cached page and menu fragment"""
+
+        self.client.get(self.url)
+        self.menu.name = "renamed menu"
+        self.menu.save()
+        self.assertContains(self.client.get(self.url), "renamed menu")
+
+    def test_signed_in_home_page_should_not_be_cached(self):
+        """signed in users should always get a rendered page"""
+
+        self.client.force_login(User.objects.create_user(username="customer"))
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, "pages/index.html")
+
+    def test_pending_messages_should_bypass_cache(self):
+        """a visitor with a flash message should see it"""
+
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        request = response.wsgi_request
+        request._messages.add(constants.INFO, "hello visitor")
+        request._messages.update(response)
+        self.client.cookies.update(response.cookies)
+        self.assertContains(self.client.get(self.url), "hello visitor")
@@ -10,16 +10,23 @@ from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
 from django.core.exceptions import ObjectDoesNotExist
 
-from food_menus.models import MenuModel
+from RestaurantBookingApp.cache import cache_anonymous_page
+from food_menus.models import MENU_CACHE_NAMESPACE, MenuModel
 from users.models import RestaurantAdmin
+from users.roles import get_user_role
 from users.forms import (
     RestaurantAdminForm,
     RestaurantAdminAdd,
     RestaurantAdminLoginForm,
     UserUpdateForm,
 )
-from .models import RestaurantModel, TableModel, ReservationModel
-from .forms import CreateRestaurantForm, CreateTableForm
+from .models import RestaurantModel, TableModel, ReservationModel, SlotUnavailable
+from .forms import CreateRestaurantForm, CreateTableForm, ReservationFilterForm
+from .availability import booking_window, build_availability
+from .slots import slots_for_date, slots_for_dates
+from .pagination import KeysetPaginator
+
+ADMIN_RESERVATIONS_PER_PAGE = 50
 
 
 # ===================================
@@ -31,21 +38,14 @@ def is_radmin_check(user):
     - Active restaurant admin can access all restaurand-admin views
     - Nomal user and inactive restaurant admin can not access all(restaurand-admin) views
     - Parameter for @user_passes_test decorator
+    - Uses the role resolved once per request by UserRoleMiddleware
 
     Returns:
         _type_: Boolean
     """
 
-    if user.is_superuser:
-        return True
-    else:
-        try:
-            if user.restaurant_admin.is_active:
-                return True
-            else:
-                return False
-        except ObjectDoesNotExist:
-            return False
+    role = get_user_role(user)
+    return role is not None and role.is_radmin
 
 
 def superuser_only_check(user):
@@ -66,9 +66,20 @@ def superuser_only_check(user):
 # ================================================
 # Home Page View, Restaurant Admin Login View
 # ================================================
+HOME_PAGE_CACHE_TIMEOUT = 60 * 15
+HOME_MENUS_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+@cache_anonymous_page(MENU_CACHE_NAMESPACE, HOME_PAGE_CACHE_TIMEOUT)
 def index_view(request):
+    # only evaluated when the cached menu fragment is missing
     food_menus = MenuModel.objects.all()[:10]
-    return render(request, "pages/index.html", {"food_menus": food_menus})
+    context = {
+        "food_menus": food_menus,
+        "menu_cache_version": MenuModel.cache_version(),
+        "menu_fragment_timeout": HOME_MENUS_FRAGMENT_TIMEOUT,
+    }
+    return render(request, "pages/index.html", context)
 
 
 def admin_login_view(request):
@@ -192,7 +203,7 @@ def delete_admin_view(request, username):
 @login_required
 @user_passes_test(superuser_only_check)
 def all_restaurant_admin_view(request):
-    restaurant_admins = RestaurantAdmin.objects.all()
+    restaurant_admins = RestaurantAdmin.objects.select_related("user")
     user_form = RestaurantAdminAdd()
     admin_form = RestaurantAdminForm()
     return render(
@@ -205,21 +216,9 @@ def all_restaurant_admin_view(request):
 @login_required
 @user_passes_test(is_radmin_check)
 def restaurant_admin_dashboard(request):
-    restaurant = RestaurantModel.objects.all()[0]
-    tables = TableModel.objects.all()
-    tables_with_next_reservation = []
-    for table in tables:
-        if table.reservations:
-            next_reservation = table.reservations.filter(
-                reservation_date__gte=timezone.now().date(),
-            ).order_by("reservation_date", "reservation_time")
-            if next_reservation:
-                tables_with_next_reservation.append((table, next_reservation[0]))
-            else:
-                tables_with_next_reservation.append((table, None))
-
-        else:
-            tables_with_next_reservation.append((table, None))
+    restaurant = RestaurantModel.current()
+    tables = TableModel.objects.with_next_reservation()
+    tables_with_next_reservation = [(table, table.next_reservation) for table in tables]
     form = CreateTableForm()
 
     context = {
@@ -232,54 +231,68 @@ def restaurant_admin_dashboard(request):
     return render(request, "restaurant_admin/dashboard.html", context=context)
 
 
-@login_required
-@user_passes_test(is_radmin_check)
-def todays_reservations_admin_view(request):
-    reservations = ReservationModel.objects.filter(
-        reservation_date=timezone.now().date()
-    )
+def render_reservation_listing(request, reservations, template_name, descending=False):
+    """Render a page of reservations filtered by the requested date range.
+    - Pages are keyset paginated, the ``cursor`` query parameter points
+      at the last reservation of the previous page
+    """
+
+    filter_form = ReservationFilterForm(request.GET or None)
+    reservations = filter_form.filter(reservations)
+    page = KeysetPaginator(
+        reservations, ADMIN_RESERVATIONS_PER_PAGE, descending=descending
+    ).page(request.GET.get("cursor"))
+
+    query = request.GET.copy()
+    query.pop("cursor", None)
 
     context = {
-        "reservations": reservations,
+        "reservations": page.object_list,
+        "page": page,
+        "filter_form": filter_form,
+        "filter_query": query.urlencode(),
     }
 
-    return render(request, "restaurant_admin/todays.html", context=context)
+    return render(request, template_name, context=context)
 
 
 @login_required
 @user_passes_test(is_radmin_check)
-def upcoming_reservations_admin_view(request):
-    upcoming_reservations = ReservationModel.objects.filter(
-        reservation_date__gte=timezone.now().date()
+def todays_reservations_admin_view(request):
+    reservations = ReservationModel.objects.today()
+
+    return render_reservation_listing(
+        request, reservations, "restaurant_admin/todays.html"
     )
 
-    context = {
-        "reservations": upcoming_reservations,
-    }
 
-    return render(
-        request, "restaurant_admin/upcoming_reservations.html", context=context
+@login_required
+@user_passes_test(is_radmin_check)
+def upcoming_reservations_admin_view(request):
+    upcoming_reservations = ReservationModel.objects.upcoming()
+
+    return render_reservation_listing(
+        request, upcoming_reservations, "restaurant_admin/upcoming_reservations.html"
     )
 
 
 @login_required
 @user_passes_test(is_radmin_check)
 def past_reservations_admin_view(request):
-    past_reservations = ReservationModel.objects.filter(
-        reservation_date__lt=timezone.now().date()
-    )
-
-    context = {
-        "reservations": past_reservations,
-    }
+    past_reservations = ReservationModel.objects.past()
 
-    return render(request, "restaurant_admin/past_reservations.html", context=context)
+    return render_reservation_listing(
+        request,
+        past_reservations,
+        "restaurant_admin/past_reservations.html",
+        descending=True,
+    )
 
 
 @login_required
 @user_passes_test(is_radmin_check)
 def create_restaurant_view(request):
-    my_restaurant = RestaurantModel.objects.all()[0]
+    my_restaurant = RestaurantModel.current()
     if my_restaurant:
         messages.warning(
             request, "You already created a restaurant, you can update it."
@@ -301,7 +314,7 @@ def create_restaurant_view(request):
 @login_required
 @user_passes_test(is_radmin_check)
 def update_resturant_view(request):
-    my_restaurant = RestaurantModel.objects.all()[0]
+    my_restaurant = RestaurantModel.current()
     if my_restaurant:
         if request.method == "POST":
             form = CreateRestaurantForm(request.POST, instance=my_restaurant)
@@ -323,7 +336,7 @@ def update_resturant_view(request):
 @login_required
 @user_passes_test(is_radmin_check)
 def add_table_view(request):
-    my_restaurant = RestaurantModel.objects.all()[0]
+    my_restaurant = RestaurantModel.current()
     if my_restaurant:
         if request.method == "POST":
             form = CreateTableForm(request.POST)
@@ -341,6 +354,7 @@ def add_table_view(request):
             return HttpResponseRedirect(request.META.get("HTTP_REFERER"))
     else:
         messages.warning(request, "You don't have a restaurant yet. Add one first.")
+        return redirect("admin_dashboard")
 
 
 @login_required
@@ -378,9 +392,8 @@ def delete_table_view(request, table_id):
 # =======================================
 @login_required
 def make_reservation_view(request):
-    restaurant = RestaurantModel.objects.all()[0]
+    restaurant = RestaurantModel.current()
     tables = TableModel.objects.all()
-    times = ["10:00", "11:00", "12:00", "13:00", "14:00", "15:00", "16:00", "17:00"]
     if request.method == "POST":
         date = request.POST["date"]
         time = request.POST["time"]
@@ -392,54 +405,59 @@ def make_reservation_view(request):
         parsed_date = datetime.datetime.strptime(date, "%m/%d/%Y").date()
         parsed_time = parse_time(time)
 
+        if table is None:
+            messages.error(request, "Please select a valid table.")
+            return redirect("make_reservation")
+
+        if time not in slots_for_date(parsed_date, restaurant):
+            messages.error(request, "The restaurant is closed at the selected time.")
+            return redirect("make_reservation")
+
         if parsed_date >= timezone.now().date():
-            if ReservationModel.objects.filter(
-                customer=customer,
-                table=table,
-                reservation_date=parsed_date,
-                reservation_time=parsed_time,
-            ).exists():
-                messages.error(
-                    request, "This table is already reserved for the date or time."
-                )
-                return redirect("make_reservation")
-            else:
-                reservation = ReservationModel.objects.create(
+            try:
+                ReservationModel.objects.allocate(
                     customer=customer,
                     table=table,
                     reservation_date=parsed_date,
                     reservation_time=parsed_time,
                     message=message,
                 )
-                reservation.save()
-                return render(
-                    request,
-                    "reservation/confirm.html",
-                    {"date": date, "time": time, "table": table_code},
-                )
+            except SlotUnavailable as error:
+                messages.error(request, str(error))
+                return redirect("make_reservation")
+            return render(
+                request,
+                "reservation/confirm.html",
+                {"date": date, "time": time, "table": table_code},
+            )
         else:
             messages.error(request, "You can't reserve a table in the past!")
             return redirect("make_reservation")
 
     else:
+        schedule = slots_for_dates(booking_window(), restaurant)
+        times = sorted({time for slots in schedule.values() for time in slots})
         context = {
             "restaurant": restaurant,
             "tables": tables,
             "available_times": times,
+            "availability": build_availability(tables, schedule),
         }
         return render(request, "reservation/make_reservation.html", context=context)
 
 
 @login_required
 def cancel_reservation_view(request, reservation_id):
-    reservation = get_object_or_404(ReservationModel, id=reservation_id)
+    reservation = get_object_or_404(
+        ReservationModel.objects.select_related("customer", "table"), id=reservation_id
+    )
     table_no = reservation.table.table_number
     datetime = (
         f'at {reservation.reservation_time.strftime("%I:%M %p")} '
         + f'on {reservation.reservation_date.strftime("%m/%d/%Y")}'
     )
 
-    reservation.delete()
+    reservation.cancel()
     messages.success(
         request,
         f"Your reservation for Table #{table_no} {datetime} is canceled successfully",
@@ -450,9 +468,7 @@ def cancel_reservation_view(request, reservation_id):
 
 @login_required
 def user_reservations_view(request):
-    reservations = ReservationModel.objects.filter(
-        customer=request.user, reservation_date__gte=timezone.now().date()
-    )
+    reservations = ReservationModel.objects.for_customer(request.user).upcoming()
 
     return render(
         request, "reservation/user_reservations.html", {"reservations": reservations}
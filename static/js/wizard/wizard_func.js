@@ -58,16 +58,53 @@ jQuery(function ($) {
 	  }
 	});
   
+	// Free tables per date and time slot, rendered by the booking view
+	var availabilityData = document.getElementById("slot-availability");
+	var availability = availabilityData ? JSON.parse(availabilityData.textContent) : null;
+
+	function freeTables(dateText, time) {
+	  var slots = availability && availability[dateText];
+	  return slots ? slots[time] || [] : null;
+	}
+
+	function toggleChoice(input, available) {
+	  $(input).prop("disabled", !available).closest("li").toggle(available);
+	  if (!available) {
+		$(input).prop("checked", false);
+	  }
+	}
+
+	// Only offer the time slots and tables that are still free
+	function filterSlots() {
+	  var dateText = $("#datepicker_field").val();
+	  $("input[name='time']").each(function () {
+		var tables = freeTables(dateText, this.value);
+		toggleChoice(this, tables === null || tables.length > 0);
+	  });
+	  var time = $("input[name='time']:checked").val();
+	  var tables = time ? freeTables(dateText, time) : null;
+	  $("input[name='table_size']").each(function () {
+		toggleChoice(this, tables === null || tables.indexOf(Number(this.value)) !== -1);
+	  });
+	}
+
+	$("input[name='time']").on("change", filterSlots);
+
 	$("#DatePicker").datepicker({
 	  showButtonPanel: false,
 	  inline: true,
 	  onSelect: function (dateText, inst) {
 		$("#datepicker_field").val(dateText);
+		filterSlots();
 	  },
 	  // Monday (first day of the week) disabled. Remove these lines
 	  beforeShowDay: function (date) {
 		var day = date.getDay();
-		return [day != 1, ""];
+		var slots = availability && availability[$.datepicker.formatDate("mm/dd/yy", date)];
+		var fullyBooked = slots && Object.keys(slots).every(function (time) {
+		  return slots[time].length === 0;
+		});
+		return [day != 1 && !fullyBooked, ""];
 	  },
 	  // end disabled
 	  minDate: 0,
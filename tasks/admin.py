@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ["name", "status", "attempts", "run_at", "locked_by"]
+    list_filter = ["status", "name"]
+    ordering = ["run_at"]
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.worker import POOLS, Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=getattr(settings, "TASKS_CONCURRENCY", 2),
+            help="Number of tasks run at the same time",
+        )
+        parser.add_argument(
+            "--pool",
+            choices=POOLS,
+            default=getattr(settings, "TASKS_POOL", "thread"),
+            help="Run tasks in threads (I/O bound work) or processes (CPU bound work)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between looks at an empty queue",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no task is due instead of waiting for more",
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options["concurrency"],
+            pool=options["pool"],
+            poll_interval=options["poll_interval"],
+            burst=options["burst"],
+        )
+        self.stdout.write(
+            f"Worker {worker.id} running {options['concurrency']} "
+            f"{options['pool']}(s)"
+        )
+        processed = worker.run()
+        self.stdout.write(f"Ran {processed} task(s)")
@@ -0,0 +1,220 @@
+"""Background tasks stored in the project database.
+
+Functions decorated with ``@task`` are queued with ``func.enqueue(*args)``,
+which inserts a Task row in the current transaction: a task becomes visible
+to workers only once the surrounding transaction commits and disappears
+with it on rollback. Arguments are stored as JSON, so pass primary keys and
+names rather than model instances.
+
+``manage.py run_worker`` claims due tasks and runs them, see tasks/worker.py.
+Where the database supports ``SELECT ... FOR UPDATE SKIP LOCKED``
+(PostgreSQL, MySQL 8) due rows are locked and claimed in one transaction,
+so concurrent workers never wait on each other's rows. Elsewhere (SQLite)
+each candidate row is claimed with a compare-and-swap UPDATE on its status
+and only the worker whose UPDATE matched the row runs it.
+
+Failed tasks are retried with exponential backoff up to ``max_attempts``
+and then kept as failed for inspection in the admin. Tasks left running by
+a worker that died are queued again once their lock is older than
+TASKS_LOCK_TIMEOUT.
+
+Set ``TASKS_EAGER = True`` to run tasks inline once the transaction
+commits instead, which the tests do.
+"""
+import datetime
+import logging
+import random
+import traceback
+from functools import update_wrapper
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class TaskFunction:
+    """A function that can be queued for the background worker"""
+
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)`` to run as soon as a worker is free
+
+        Returns:
+            _type_: the Task, None in eager mode
+        """
+
+        return self.schedule(None, *args, **kwargs)
+
+    def schedule(self, run_at, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)`` to run at ``run_at`` or later"""
+
+        if getattr(settings, "TASKS_EAGER", False):
+            transaction.on_commit(lambda: self.func(*args, **kwargs))
+            return None
+        return Task.objects.create(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs,
+            run_at=run_at or timezone.now(),
+            max_attempts=self.max_attempts,
+        )
+
+
+def task(func=None, *, name=None, max_attempts=3):
+    """Register a function as a background task
+    - Tasks are looked up by name when run, which defaults to the function's
+      dotted path, so keep it stable while tasks of that name are queued
+    """
+
+    def decorator(func):
+        task_function = TaskFunction(
+            func, name or f"{func.__module__}.{func.__qualname__}", max_attempts
+        )
+        _registry[task_function.name] = task_function
+        return task_function
+
+    return decorator(func) if func else decorator
+
+
+def get_task(name):
+    """Registered task called ``name``, imported from its dotted path when its
+    module was not loaded yet
+
+    Raises:
+        KeyError: no task goes by that name
+    """
+
+    if name not in _registry:
+        try:
+            import_string(name)
+        except ImportError:
+            pass
+    return _registry[name]
+
+
+def backoff(attempts):
+    """Delay before retrying a task that failed ``attempts`` times
+    - Doubles from TASKS_RETRY_BACKOFF seconds up to TASKS_RETRY_BACKOFF_MAX
+    - Jittered so tasks failing together do not retry in lockstep
+    """
+
+    delay = min(
+        getattr(settings, "TASKS_RETRY_BACKOFF", 10) * 2 ** (attempts - 1),
+        getattr(settings, "TASKS_RETRY_BACKOFF_MAX", 60 * 60),
+    )
+    return datetime.timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(worker_id, limit):
+    """Lock up to ``limit`` due tasks for ``worker_id``, oldest first
+
+    Returns:
+        _type_: list of claimed Task ids
+    """
+
+    now = timezone.now()
+    due = Task.objects.filter(status=Task.QUEUED, run_at__lte=now).order_by(
+        "run_at", "id"
+    )
+    lock = dict(status=Task.RUNNING, locked_by=worker_id, locked_at=now)
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            locked = due.select_for_update(skip_locked=True)
+            ids = list(locked.values_list("id", flat=True)[:limit])
+            Task.objects.filter(id__in=ids).update(**lock)
+        return ids
+
+    claimed = []
+    for pk in due.values_list("id", flat=True)[:limit]:
+        if Task.objects.filter(pk=pk, status=Task.QUEUED).update(**lock):
+            claimed.append(pk)
+    return claimed
+
+
+def execute(task_id):
+    """Run a claimed task and record the outcome
+    - Done tasks are deleted
+    - Failed tasks are queued again after a backoff, or marked failed once
+      out of attempts
+    - Nothing is recorded when the lock was lost to another worker meanwhile
+    """
+
+    task = Task.objects.filter(pk=task_id, status=Task.RUNNING).first()
+    if task is None:
+        return
+    claimed = Task.objects.filter(
+        pk=task.pk, locked_by=task.locked_by, locked_at=task.locked_at
+    )
+
+    try:
+        func = get_task(task.name)
+    except KeyError:
+        logger.error("Unknown task %s", task.name)
+        claimed.update(status=Task.FAILED, last_error=f"Unknown task {task.name}")
+        return
+
+    try:
+        func(*task.args, **task.kwargs)
+    except Exception:
+        attempts = task.attempts + 1
+        logger.exception(
+            "Task %s%r failed (attempt %d)", task.name, task.args, attempts
+        )
+        changes = dict(
+            attempts=attempts,
+            last_error=traceback.format_exc(),
+            locked_by="",
+            locked_at=None,
+        )
+        if attempts < task.max_attempts:
+            changes.update(
+                status=Task.QUEUED, run_at=timezone.now() + backoff(attempts)
+            )
+        else:
+            changes.update(status=Task.FAILED)
+        claimed.update(**changes)
+    else:
+        claimed.delete()
+
+
+def requeue_stale():
+    """Queue again tasks whose worker stopped without recording an outcome,
+    counting it as a failed attempt
+
+    Returns:
+        _type_: number of tasks queued again or failed
+    """
+
+    timeout = getattr(settings, "TASKS_LOCK_TIMEOUT", 60 * 10)
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=timezone.now() - datetime.timedelta(seconds=timeout),
+    )
+    release = dict(
+        attempts=F("attempts") + 1,
+        locked_by="",
+        locked_at=None,
+        last_error="Worker stopped while running the task",
+    )
+    failed = stale.filter(attempts__gte=F("max_attempts") - 1).update(
+        status=Task.FAILED, **release
+    )
+    return failed + stale.update(status=Task.QUEUED, **release)
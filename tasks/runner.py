@@ -0,0 +1,21 @@
+"""Entry points of the worker's pools.
+
+Spawned processes import this module to find the function they were
+handed before Django is set up, so it must not import models at load time.
+"""
+import django
+from django.db import connections
+
+
+def setup_process():
+    django.setup()
+
+
+def run_task(task_id):
+    from .queue import execute
+
+    try:
+        execute(task_id)
+    finally:
+        # each pool thread holds its own database connections
+        connections.close_all()
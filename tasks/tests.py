@@ -0,0 +1,166 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Task
+from .queue import backoff, claim, execute, requeue_stale, task
+from .worker import Worker
+
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise RuntimeError("boom")
+
+
+class TaskQueueTest(TestCase):
+    """Check tasks are queued, claimed and run once"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_should_store_task(self):
+        """a queued task should be stored with its arguments"""
+
+        record.enqueue("a")
+        task = Task.objects.get()
+        self.assertEqual(task.name, "tasks.tests.record")
+        self.assertEqual(task.args, ["a"])
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(calls, [])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_task_should_run_after_commit(self):
+        """eager tasks should run once the transaction commits"""
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(record.enqueue("a"))
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ["a"])
+        self.assertFalse(Task.objects.exists())
+
+    def test_task_should_be_claimed_once(self):
+        """a claimed task should not be handed to another worker"""
+
+        record.enqueue("a")
+        record.enqueue("b")
+        first = claim("worker-1", 1)
+        second = claim("worker-2", 5)
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(claim("worker-3", 5), [])
+        self.assertEqual(Task.objects.get(pk=first[0]).locked_by, "worker-1")
+
+    def test_scheduled_task_should_wait(self):
+        """a task should not be claimed before its run_at"""
+
+        record.schedule(timezone.now() + datetime.timedelta(hours=1), "a")
+        self.assertEqual(claim("worker", 5), [])
+
+    def test_done_task_should_be_deleted(self):
+        """a task that ran should be removed from the queue"""
+
+        record.enqueue("a")
+        for task_id in claim("worker", 5):
+            execute(task_id)
+        self.assertEqual(calls, ["a"])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_should_be_retried_then_failed(self):
+        """a failing task should be retried later until out of attempts"""
+
+        explode.enqueue()
+        (task_id,) = claim("worker", 5)
+        execute(task_id)
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(task.attempts, 1)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertIn("boom", task.last_error)
+
+        Task.objects.update(run_at=timezone.now())
+        (task_id,) = claim("worker", 5)
+        execute(task_id)
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    def test_unknown_task_should_fail(self):
+        """a task nobody registered should fail without retries"""
+
+        Task.objects.create(name="tasks.tests.missing", run_at=timezone.now())
+        (task_id,) = claim("worker", 5)
+        execute(task_id)
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    @override_settings(TASKS_RETRY_BACKOFF=10, TASKS_RETRY_BACKOFF_MAX=60)
+    def test_backoff_should_grow_and_cap(self):
+        """retries should wait twice as long each time, up to the max"""
+
+        self.assertAlmostEqual(backoff(1).total_seconds(), 10, delta=2)
+        self.assertAlmostEqual(backoff(3).total_seconds(), 40, delta=8)
+        self.assertAlmostEqual(backoff(10).total_seconds(), 60, delta=12)
+
+    @override_settings(TASKS_LOCK_TIMEOUT=60)
+    def test_stale_task_should_be_requeued(self):
+        """a task left running by a dead worker should be queued again"""
+
+        record.enqueue("a")
+        claim("worker", 5)
+        self.assertEqual(requeue_stale(), 0)
+        Task.objects.update(locked_at=timezone.now() - datetime.timedelta(minutes=5))
+        self.assertEqual(requeue_stale(), 1)
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(task.attempts, 1)
+        self.assertEqual(task.locked_by, "")
+
+
+class WorkerTest(TransactionTestCase):
+    """Check the worker drains the queue with its pool"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_worker_should_survive_database_errors(self):
+        """a failed claim should be retried on the next poll"""
+
+        worker = Worker(poll_interval=0.01, burst=True)
+        with mock.patch.object(queue, "claim", side_effect=OperationalError):
+            self.assertIsNone(worker.poll(1, 2))
+
+    def test_worker_should_run_every_due_task(self):
+        """a burst worker should run every task then exit"""
+
+        for value in range(5):
+            record.enqueue(value)
+        explode.enqueue()
+
+        processed = Worker(concurrency=2, poll_interval=0.01, burst=True).run()
+        self.assertEqual(processed, 6)
+        self.assertEqual(sorted(calls), [0, 1, 2, 3, 4])
+        self.assertEqual(
+            list(Task.objects.values_list("name", flat=True)), ["tasks.tests.explode"]
+        )
+
+    def test_run_worker_command(self):
+        """run_worker --burst should report the tasks it ran"""
+
+        record.enqueue("a")
+        out = StringIO()
+        call_command("run_worker", "--burst", "--concurrency=1", stdout=out)
+        self.assertIn("Ran 1 task(s)", out.getvalue())
+        self.assertEqual(calls, ["a"])
@@ -0,0 +1,127 @@
+"""Worker loop run by ``manage.py run_worker``.
+
+The worker claims as many due tasks as it has free slots and hands their
+ids to a thread or process pool:
+
+- threads suit I/O bound tasks (email, HTTP calls) and share the worker's
+  memory
+- processes suit CPU bound tasks (image resizing) that would otherwise
+  hold the GIL; each process is spawned fresh and sets Django up itself
+
+SIGINT and SIGTERM stop claiming new tasks and wait for the running ones.
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import uuid
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from multiprocessing import get_context
+
+from django.db import DatabaseError, connections
+
+from . import queue
+from .runner import run_task, setup_process
+
+
+logger = logging.getLogger(__name__)
+
+POOLS = ("thread", "process")
+# how often stale locks are looked for, in poll intervals
+REQUEUE_EVERY = 60
+
+
+class Worker:
+    def __init__(self, concurrency=2, pool="thread", poll_interval=1.0, burst=False):
+        if pool not in POOLS:
+            raise ValueError(f"Unknown pool {pool}, expected one of {POOLS}")
+        self.concurrency = concurrency
+        self.pool = pool
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stopping = threading.Event()
+
+    def make_executor(self):
+        if self.pool == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=get_context("spawn"),
+                initializer=setup_process,
+            )
+        return ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="tasks"
+        )
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def poll(self, polls, free):
+        """Claim due tasks for the free slots
+        - Database errors are logged and retried on the next poll rather than
+          stopping the worker
+
+        Returns:
+            _type_: list of claimed Task ids, None on a database error
+        """
+
+        try:
+            if polls % REQUEUE_EVERY == 0 and queue.requeue_stale():
+                logger.warning("Requeued tasks left running by stopped workers")
+            return queue.claim(self.id, free) if free else []
+        except DatabaseError:
+            logger.exception("Claiming tasks failed")
+            connections.close_all()
+            return None
+
+    def run(self):
+        """Claim and run tasks until stopped, or until the queue is empty in
+        burst mode
+
+        Returns:
+            _type_: number of tasks run
+        """
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+
+        executor = self.make_executor()
+        running = set()
+        processed = 0
+        polls = 0
+        try:
+            while not self.stopping.is_set():
+                claimed = self.poll(polls, self.concurrency - len(running))
+                polls += 1
+                if claimed is None:
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                for task_id in claimed:
+                    running.add(executor.submit(run_task, task_id))
+                processed += len(claimed)
+
+                if claimed and len(running) < self.concurrency:
+                    # more tasks may be due, claim again right away
+                    continue
+                if running:
+                    done, running = wait(
+                        running, timeout=self.poll_interval, return_when=FIRST_COMPLETED
+                    )
+                    for future in done:
+                        if future.exception():
+                            logger.error("Task runner crashed: %r", future.exception())
+                elif self.burst:
+                    break
+                else:
+                    self.stopping.wait(self.poll_interval)
+        finally:
+            executor.shutdown(wait=True)
+            connections.close_all()
+        return processed
@@ -0,0 +1,9 @@
+from django.utils.functional import SimpleLazyObject
+
+from .roles import get_user_role
+
+
+def user_role(request):
+    """Expose the user's role to templates as ``user_role``"""
+
+    return {"user_role": SimpleLazyObject(lambda: get_user_role(request.user))}
@@ -0,0 +1,25 @@
+from django.contrib.auth.middleware import get_user
+from django.utils.functional import SimpleLazyObject
+
+from .roles import get_role
+
+
+class UserRoleMiddleware:
+    """Attach the user's role to ``request.user.role``.
+    - Must come after AuthenticationMiddleware
+    - The role is resolved lazily and at most once per request
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user = SimpleLazyObject(lambda: self.get_user_with_role(request))
+        return self.get_response(request)
+
+    @staticmethod
+    def get_user_with_role(request):
+        user = get_user(request)
+        if user.is_authenticated:
+            user.role = SimpleLazyObject(lambda: get_role(request, user))
+        return user
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:34
+
+from django.db import migrations, models
+import imaging.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="restaurantadmin",
+            name="avatar_ready",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="avatar_ready",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="restaurantadmin",
+            name="avatar",
+            field=imaging.fields.RenditionImageField(
+                default="restaurant_admin.jpg",
+                quality=80,
+                ready_field="avatar_ready",
+                size=[300, 300],
+                upload_to="avatars",
+                verbose_name="avatar",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="userprofile",
+            name="avatar",
+            field=imaging.fields.RenditionImageField(
+                blank=True,
+                default="default.jpg",
+                null=True,
+                quality=70,
+                ready_field="avatar_ready",
+                size=[300, 300],
+                upload_to="avatars",
+                verbose_name="avatar",
+            ),
+        ),
+    ]
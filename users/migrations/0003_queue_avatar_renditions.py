@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from imaging.fields import queue_pending_renditions
+
+
+def queue_avatar_renditions(apps, schema_editor):
+    """Avatars uploaded before renditions existed were never processed."""
+
+    queue_pending_renditions(apps, "users.RestaurantAdmin", "users.UserProfile")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_renditions"),
+        ("tasks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(queue_avatar_renditions, migrations.RunPython.noop),
+    ]
@@ -2,7 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
 
-from django_resized import ResizedImageField
+from imaging.fields import RenditionImageField
 
 
 PHONE_NUMBER_VALIDATOR = RegexValidator(r"^[0-9]{11}$", "Enter a valid phone number.")
@@ -13,17 +13,17 @@ NAME_VALIDATOR = RegexValidator(
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
-    avatar = ResizedImageField(
+    avatar = RenditionImageField(
         size=[300, 300],
-        crop=["middle", "center"],
+        ready_field="avatar_ready",
         upload_to="avatars",
         default="default.jpg",
         quality=70,
-        keep_meta=False,
         verbose_name="avatar",
         blank=True,
         null=True,
     )
+    avatar_ready = models.BooleanField(default=False, editable=False)
     name = models.CharField(max_length=100, validators=[NAME_VALIDATOR])
     phone = models.CharField(max_length=11, validators=[PHONE_NUMBER_VALIDATOR])
 
@@ -32,6 +32,7 @@ class UserProfile(models.Model):
 
     # delete user's avater when user is deleted
     def delete(self, *args, **kwargs):
+        self.avatar.delete_renditions()
         self.avatar.delete()
 
         return super(UserProfile, self).delete(*args, **kwargs)
@@ -42,15 +43,15 @@ class RestaurantAdmin(models.Model):
         User, on_delete=models.CASCADE, related_name="restaurant_admin"
     )
     name = models.CharField(max_length=100, validators=[NAME_VALIDATOR])
-    avatar = ResizedImageField(
+    avatar = RenditionImageField(
         size=[300, 300],
-        crop=["middle", "center"],
+        ready_field="avatar_ready",
         upload_to="avatars",
         default="restaurant_admin.jpg",
         quality=80,
-        keep_meta=False,
         verbose_name="avatar",
     )
+    avatar_ready = models.BooleanField(default=False, editable=False)
     role = models.CharField(max_length=20)
     phone = models.CharField(max_length=11, validators=[PHONE_NUMBER_VALIDATOR])
     is_active = models.BooleanField(default=True)
@@ -60,10 +61,11 @@ class RestaurantAdmin(models.Model):
 
     # delete user's avater when user is deleted
     def delete(self, *args, **kwargs):
+        self.avatar.delete_renditions()
         self.avatar.delete()
 
         return super(RestaurantAdmin, self).delete(*args, **kwargs)
 
     @property
     def get_admin_avatar_url(self):
-        return self.avatar.url
+        return self.avatar.thumb_url
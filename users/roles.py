@@ -0,0 +1,101 @@
+"""Per-request role resolution for the navbar and permission checks.
+
+A user's role (restaurant-admin status and avatar) is loaded with one
+query joining the profile and restaurant admin rows, then kept in the
+session. Each user has a role version in the cache that is bumped whenever
+their profile, restaurant admin or user row is saved, which makes every
+session holding an older role resolve it again on its next request.
+"""
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
+
+from RestaurantBookingApp import cache
+
+
+ROLE_SESSION_KEY = "_user_role"
+ROLE_VERSION_KEY = "role-version:{}"
+
+
+class UserRole:
+    def __init__(self, is_superuser, is_active_restaurant_admin, avatar_url):
+        self.is_superuser = is_superuser
+        self.is_active_restaurant_admin = is_active_restaurant_admin
+        self.avatar_url = avatar_url
+
+    @property
+    def is_radmin(self):
+        """Super user or active restaurant admin"""
+
+        return self.is_superuser or self.is_active_restaurant_admin
+
+    @classmethod
+    def resolve(cls, user):
+        """Load a user's role with a single joined query"""
+
+        user = User.objects.select_related("profile", "restaurant_admin").get(
+            pk=user.pk
+        )
+        try:
+            is_active_restaurant_admin = user.restaurant_admin.is_active
+        except ObjectDoesNotExist:
+            is_active_restaurant_admin = False
+
+        avatar_url = None
+        try:
+            avatar = user.profile.avatar
+            if avatar and not avatar.is_default:
+                avatar_url = avatar.thumb_url
+        except ObjectDoesNotExist:
+            pass
+
+        return cls(user.is_superuser, is_active_restaurant_admin, avatar_url)
+
+
+def _role_version(user_id):
+    return cache.get_or_set(
+        "users", ROLE_VERSION_KEY.format(user_id), lambda: uuid.uuid4().hex, None
+    )
+
+
+def invalidate_role(user_id):
+    cache.set("users", ROLE_VERSION_KEY.format(user_id), uuid.uuid4().hex, None)
+
+
+def get_role(request, user):
+    """Role of the request's user, resolved at most once per role change.
+
+    Returns:
+        _type_: UserRole or None for anonymous users
+    """
+
+    if not user.is_authenticated:
+        return None
+
+    version = _role_version(user.pk)
+    cached = request.session.get(ROLE_SESSION_KEY)
+    if cached and cached["user"] == user.pk and cached["version"] == version:
+        return UserRole(
+            user.is_superuser,
+            cached["is_active_restaurant_admin"],
+            cached["avatar_url"],
+        )
+
+    role = UserRole.resolve(user)
+    request.session[ROLE_SESSION_KEY] = {
+        "user": user.pk,
+        "version": version,
+        "is_active_restaurant_admin": role.is_active_restaurant_admin,
+        "avatar_url": role.avatar_url,
+    }
+    return role
+
+
+def get_user_role(user):
+    """Role attached by UserRoleMiddleware, or resolved outside a request"""
+
+    role = getattr(user, "role", None)
+    if role is None and user.is_authenticated:
+        role = UserRole.resolve(user)
+    return role
@@ -1,8 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 
-from .models import UserProfile
+from imaging.signals import renditions_ready
+
+from .models import UserProfile, RestaurantAdmin
+from .roles import invalidate_role
 
 
 @receiver(post_save, sender=User)
@@ -14,3 +17,14 @@ def create_profile(sender, instance=None, created=False, **kwargs):
 @receiver(post_save, sender=User)
 def save_profile(sender, instance, **kwargs):
     instance.profile.save()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=RestaurantAdmin)
+@receiver(post_delete, sender=RestaurantAdmin)
+@receiver(renditions_ready, sender=UserProfile)
+@receiver(renditions_ready, sender=RestaurantAdmin)
+def invalidate_user_role(sender, instance, **kwargs):
+    invalidate_role(instance.pk if sender is User else instance.user_id)
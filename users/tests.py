@@ -1,9 +1,12 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
 from django.shortcuts import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from .models import UserProfile, RestaurantAdmin
 from .forms import RestaurantAdminForm
+from .roles import UserRole
 
 
 class UserProfileModelTest(TestCase):
@@ -187,3 +190,60 @@ class UserAppUrlsTest(TestCase):
         """user app urls should have urls"""
 
         self.assertEqual(reverse("update_profile"), "/profile/update/")
+
+
+class UserRoleTest(TestCase):
+    """Test user roles are resolved once and refreshed when they change"""
+
+    def setUp(self) -> None:
+        """Set up an active restaurant admin"""
+
+        self.user = User.objects.create_user(username="radmin", password="test123")
+        self.radmin = RestaurantAdmin.objects.create(
+            user=self.user, name="radmin", phone="01234567891", role="manager"
+        )
+        self.client.force_login(self.user)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [query["sql"] for query in queries]
+
+    def test_resolve_should_use_single_query(self):
+        """role resolution should join profile and restaurant admin"""
+
+        with self.assertNumQueries(1):
+            role = UserRole.resolve(self.user)
+        self.assertTrue(role.is_radmin)
+        self.assertIsNone(role.avatar_url)
+
+    def test_role_should_be_cached_in_session(self):
+        """later requests should not query profile or restaurant admin"""
+
+        self.client.get(reverse("update_profile"))
+        response, queries = self.count_queries(reverse("index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            [sql for sql in queries if "users_restaurantadmin" in sql], queries
+        )
+        self.assertTrue(response.context["user_role"].is_radmin)
+
+    def test_role_should_refresh_when_restaurant_admin_changes(self):
+        """deactivating a restaurant admin should revoke admin access"""
+
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.radmin.is_active = False
+        self.radmin.save()
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertEqual(response.status_code, 302)
+
+    def test_normal_user_should_not_be_radmin(self):
+        """a user without restaurant admin should not be an admin"""
+
+        user = User.objects.create_user(username="guest", password="test123")
+        self.client.force_login(user)
+        response = self.client.get(reverse("index"))
+        self.assertFalse(response.context["user_role"].is_radmin)
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertEqual(response.status_code, 302)